@@ -0,0 +1,242 @@
+"""
+Correctness check and benchmark of the per-client send queue.
+
+Fans a stream of audio frames out to a fast and a slow client, the way a
+broadcast audience does, once with direct socket sends and once through a
+ClientSender per client. With direct sends every frame waits for the slowest
+socket; with the queues the fast client gets its frames as they are produced
+and the slow one sheds audio according to the policy. Also checks that the
+control frames jump ahead of the queued audio, that the chain markers,
+stream headers and stream ends are never dropped, that whole sentences are
+dropped once the chunks are gone so the budget holds, and that a header is
+never sent without its binary audio.
+
+Run from the project root:
+    python -m benchmarks.bench_client_sender
+"""
+
+import asyncio
+import json
+import time
+
+from loguru import logger
+
+from src.open_llm_vtuber.client_sender import (
+    ClientSender,
+    FRAME_AUDIO,
+    FRAME_AUDIO_CHUNK,
+    FRAME_MARKER,
+    FRAME_SENTENCE,
+    SLOW_CLIENT_POLICIES,
+)
+
+SENTENCES = 20
+CHUNKS = 8
+CHUNK_BYTES = 8000
+FRAME_INTERVAL = 0.002
+SLOW_SEND = 0.01
+BUDGET = 64 * 1024
+
+
+class FakeSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.frames = []
+
+    async def send_text(self, text: str, kind: str = "") -> None:
+        await asyncio.sleep(self.delay)
+        self.frames.append((time.perf_counter(), text))
+
+    async def send_bytes(self, data: bytes, kind: str = "") -> None:
+        await asyncio.sleep(self.delay)
+        self.frames.append((time.perf_counter(), data))
+
+
+def make_frames() -> list:
+    """
+    (frame, kind) pairs of a binary audio stream. The first binary frame of
+    a sentence is the audio announced by its header.
+    """
+    start = json.dumps({"type": "control", "text": "conversation-chain-start"})
+    frames = [(start, FRAME_MARKER)]
+    for seq in range(1, SENTENCES + 1):
+        header = {"type": "audio-chunk", "index": 0, "is_final": False, "seq": seq}
+        frames.append((json.dumps(header), FRAME_AUDIO))
+        chunk = seq.to_bytes(4, "big") + bytes(CHUNK_BYTES)
+        frames.append((chunk, FRAME_AUDIO))
+        frames += [(chunk, FRAME_AUDIO_CHUNK)] * (CHUNKS - 1)
+        final = {"type": "audio-chunk", "is_final": True, "seq": seq}
+        frames.append((json.dumps(final), FRAME_AUDIO))
+    end = json.dumps({"type": "control", "text": "conversation-chain-end"})
+    frames.append((end, FRAME_MARKER))
+    return frames
+
+
+async def broadcast(frames: list, clients: list) -> float:
+    """
+    Sends the frames to every client, dropping the clients whose send fails
+    like a broadcast does. Returns the time the producer took.
+    """
+    start = time.perf_counter()
+    clients = list(clients)
+    for frame, kind in frames:
+        send = "send_text" if isinstance(frame, str) else "send_bytes"
+        results = await asyncio.gather(
+            *(getattr(client, send)(frame, kind) for client in clients),
+            return_exceptions=True,
+        )
+        clients = [c for c, r in zip(clients, results) if not isinstance(r, Exception)]
+        await asyncio.sleep(FRAME_INTERVAL)
+    return time.perf_counter() - start
+
+
+async def run(frames: list, policy: str = "") -> dict:
+    fast, slow = FakeSocket(0.0), FakeSocket(SLOW_SEND)
+    if policy:
+        senders = [
+            ClientSender(socket.send_text, socket.send_bytes, BUDGET, policy)
+            for socket in (fast, slow)
+        ]
+        clients = senders
+    else:
+        senders = []
+        clients = [fast, slow]
+    start = time.perf_counter()
+    produce = await broadcast(frames, clients)
+    # Let the slow client drain its queue
+    while any(sender.stats()["depth"] for sender in senders):
+        await asyncio.sleep(SLOW_SEND)
+    await asyncio.sleep(SLOW_SEND * 2)
+    fast_done = fast.frames[-1][0] - start if fast.frames else 0.0
+    stats = senders[1].stats() if senders else {}
+    for sender in senders:
+        sender.close()
+    return {
+        "produce": produce,
+        "fast_done": fast_done,
+        "fast": fast.frames,
+        "slow": slow.frames,
+        "stats": stats,
+    }
+
+
+def check(frames: list, result: dict) -> None:
+    assert [frame for _, frame in result["fast"]] == frames_of(frames)
+    slow = [frame for _, frame in result["slow"]]
+    texts = [frame for frame in slow if isinstance(frame, str)]
+    # Only binary chunks may be dropped, every text frame arrives in order
+    expected = [frame for frame in frames_of(frames) if isinstance(frame, str)]
+    assert texts == expected, "text frame dropped"
+    # and each stream header is followed by the audio it announces
+    for position, frame in enumerate(slow):
+        if isinstance(frame, str) and '"index": 0' in frame:
+            assert isinstance(slow[position + 1], bytes), "header audio dropped"
+
+
+def frames_of(frames: list) -> list:
+    return [frame for frame, _ in frames]
+
+
+async def check_priority() -> None:
+    socket = FakeSocket(SLOW_SEND)
+    sender = ClientSender(socket.send_text, socket.send_bytes)
+    for _ in range(5):
+        await sender.send_bytes(bytes(10))
+    await sender.send_text(json.dumps({"type": "control", "text": "stop-audio"}))
+    await asyncio.sleep(SLOW_SEND * 8)
+    sender.close()
+    # At most the frame being sent when stop-audio was queued goes first
+    position = [frame for _, frame in socket.frames].index(
+        json.dumps({"type": "control", "text": "stop-audio"})
+    )
+    assert position <= 1, position
+
+
+async def check_kinds() -> None:
+    """Intermediate JSON chunks are dropped before sentences, headers are kept"""
+    socket = FakeSocket(SLOW_SEND)
+    sender = ClientSender(socket.send_text, socket.send_bytes, 5000, "skip_to_latest")
+    header = json.dumps({"type": "audio-chunk", "index": 0, "audio": "x" * 1000})
+    sentence = json.dumps({"type": "audio-and-expression", "audio": "x" * 1000})
+    await sender.send_text(header, FRAME_AUDIO)
+    for index in range(1, 10):
+        chunk = json.dumps({"type": "audio-chunk", "index": index, "audio": "x" * 1000})
+        await sender.send_text(chunk, FRAME_AUDIO_CHUNK)
+    for _ in range(3):
+        await sender.send_text(sentence, FRAME_SENTENCE)
+    await drain(sender)
+    sent = [frame for _, frame in socket.frames]
+    assert sender.stats()["drops"]["skip_to_latest"] > 0
+    assert sent.count(header) == 1 and sent.count(sentence) == 3, sent
+
+
+async def drain(sender: ClientSender) -> None:
+    while sender.stats()["depth"]:
+        await asyncio.sleep(SLOW_SEND)
+    await asyncio.sleep(SLOW_SEND * 2)
+    sender.close()
+
+
+async def check_sentence_budget() -> None:
+    """
+    Clients without audio streaming get whole sentences only: the oldest
+    ones are dropped to keep the budget, in binary mode with their audio
+    """
+    budget, size = 100_000, 50_000
+    for policy in ("drop_oldest", "skip_to_latest"):
+        socket = FakeSocket(SLOW_SEND)
+        sender = ClientSender(socket.send_text, socket.send_bytes, budget, policy)
+        for seq in range(50):
+            await sender.send_text(json.dumps({"seq": seq, "audio": "x" * size}), FRAME_SENTENCE)
+        assert sender.stats()["max_bytes"] <= budget + size + 100, sender.stats()
+        assert sender.stats()["drops"][policy] > 0
+        await drain(sender)
+
+        socket = FakeSocket(SLOW_SEND)
+        sender = ClientSender(socket.send_text, socket.send_bytes, budget, policy)
+        for seq in range(50):
+            await sender.send_text(json.dumps({"seq": seq}), FRAME_SENTENCE)
+            await sender.send_bytes(seq.to_bytes(4, "big") + bytes(size), FRAME_SENTENCE)
+        assert sender.stats()["max_bytes"] <= budget + size + 100, sender.stats()
+        await drain(sender)
+        sent = [frame for _, frame in socket.frames]
+        for position, frame in enumerate(sent):
+            if isinstance(frame, str):
+                seq = json.loads(frame)["seq"]
+                assert sent[position + 1][:4] == seq.to_bytes(4, "big"), "audio dropped"
+        headers = sum(isinstance(frame, str) for frame in sent)
+        assert 0 < headers < 50 and len(sent) == 2 * headers
+
+
+async def main():
+    logger.disable("src.open_llm_vtuber")
+    frames = make_frames()
+    await check_priority()
+    await check_kinds()
+    await check_sentence_budget()
+
+    direct = await run(frames)
+    print(
+        f"{'sends':16} {'producer (s)':>13} {'fast client (s)':>16} "
+        f"{'slow frames':>12} {'dropped':>8} {'p95 latency (ms)':>17}"
+    )
+    print(
+        f"{'direct':16} {direct['produce']:13.2f} {direct['fast_done']:16.2f} "
+        f"{len(direct['slow']):12} {0:8} {'':>17}"
+    )
+    for policy in SLOW_CLIENT_POLICIES:
+        result = await run(frames, policy)
+        stats = result["stats"]
+        if policy == "disconnect":
+            assert stats["drops"]["disconnect"] == 1
+        else:
+            check(frames, result)
+        dropped = sum(stats["drops"].values())
+        print(
+            f"{policy:16} {result['produce']:13.2f} {result['fast_done']:16.2f} "
+            f"{len(result['slow']):12} {dropped:8} {stats['p95_latency'] * 1e3:17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+Correctness check and benchmark of the compiled emotion tag matcher.
+
+Compares Live2dModel.extract_emotion / remove_emotion_keywords with the
+previous character scan and find/rebuild loop on a random corpus, then times
+both on long replies with small and large emotion maps, along with the single
+pass extract_and_remove_emotions.
+
+The previous remove_emotion_keywords removed the keys one after the other, so
+a tag formed by removing another ("[jo[joy]y]") was removed or not depending
+on the order of the keys. The single pass leaves it, so outputs are only
+compared when no tag is left after one pass.
+
+Run from the project root:
+    python -m benchmarks.bench_emotion_tags
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from loguru import logger
+
+from src.open_llm_vtuber.live2d_model import Live2dModel
+
+CASES = 5000
+REPEATS = 5
+BASE_EMOTIONS = ["neutral", "anger", "disgust", "fear", "joy", "smirk", "sadness", "surprise"]
+# Keys with brackets use the compiled alternation instead of the map lookup
+BRACKET_EMOTIONS = ["joy", "a]b", "a", "[x", "anger"]
+
+
+# ==== previous implementations
+
+
+def reference_extract_emotion(emo_map: dict, str_to_check: str) -> list:
+    expression_list = []
+    str_to_check = str_to_check.lower()
+
+    i = 0
+    while i < len(str_to_check):
+        if str_to_check[i] != "[":
+            i += 1
+            continue
+        for key in emo_map.keys():
+            emo_tag = f"[{key}]"
+            if str_to_check[i : i + len(emo_tag)] == emo_tag:
+                expression_list.append(emo_map[key])
+                i += len(emo_tag) - 1
+                break
+        i += 1
+    return expression_list
+
+
+def reference_remove_emotion_keywords(emo_map: dict, target_str: str) -> str:
+    lower_str = target_str.lower()
+
+    for key in emo_map.keys():
+        lower_key = f"[{key}]".lower()
+        while lower_key in lower_str:
+            start_index = lower_str.find(lower_key)
+            end_index = start_index + len(lower_key)
+            target_str = target_str[:start_index] + target_str[end_index:]
+            lower_str = lower_str[:start_index] + lower_str[end_index:]
+    return target_str
+
+
+def make_model(emotions: list) -> Live2dModel:
+    emotion_map = {name.capitalize(): index for index, name in enumerate(emotions)}
+    model_dict = [{"name": "bench", "url": "/bench.model3.json", "emotionMap": emotion_map}]
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump(model_dict, file)
+    try:
+        return Live2dModel("bench", model_dict_path=file.name)
+    finally:
+        os.unlink(file.name)
+
+
+def make_corpus(emotions: list, count: int) -> list:
+    rng = random.Random(0)
+    pieces = ["Hello", " ", "[", "]", "jo", "y", "joy]", "[joy", "!", "Chào"]
+    pieces += [f"[{name}]" for name in emotions[:10]]
+    pieces += [f"[{name.upper()}]" for name in emotions[:3]]
+    return [
+        "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        for _ in range(count)
+    ]
+
+
+def make_reply(emotions: list, rng: random.Random, tags: int = 40) -> str:
+    words = "so the viewer asked about the stream schedule and I think".split()
+    parts = []
+    for _ in range(tags):
+        parts += rng.sample(words, 6) + [f"[{rng.choice(emotions)}]"]
+    return " ".join(parts)
+
+
+def check(model: Live2dModel, corpus: list) -> int:
+    """Returns the number of inputs where removing a tag formed another one"""
+    formed = 0
+    for text in corpus:
+        expected = reference_extract_emotion(model.emo_map, text)
+        assert model.extract_emotion(text) == expected, text
+
+        removed = model.remove_emotion_keywords(text)
+        assert model.extract_and_remove_emotions(text) == (removed, expected), text
+        if model.extract_emotion(removed):
+            formed += 1
+            continue
+        reference = reference_remove_emotion_keywords(model.emo_map, text)
+        assert removed == reference, f"{text!r}: {removed!r} != {reference!r}"
+    return formed
+
+
+def best_of(func, texts: list) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main():
+    logger.disable("src.open_llm_vtuber")
+    formed = 0
+    for emotions in (BASE_EMOTIONS, BRACKET_EMOTIONS):
+        formed += check(make_model(emotions), make_corpus(emotions, CASES))
+    print(f"checked {2 * CASES} random inputs ({formed} with tags formed by removal)\n")
+
+    print(
+        f"{'emotion map':12} {'before (us)':>12} {'after (us)':>11} "
+        f"{'one pass (us)':>14} {'speedup':>9}"
+    )
+    for size in (8, 100, 1000):
+        emotions = (BASE_EMOTIONS + [f"emotion_{i}" for i in range(size)])[:size]
+        model = make_model(emotions)
+        rng = random.Random(size)
+        replies = [make_reply(emotions, rng) for _ in range(50)]
+
+        def before(text):
+            reference_extract_emotion(model.emo_map, text)
+            reference_remove_emotion_keywords(model.emo_map, text)
+
+        def after(text):
+            model.extract_emotion(text)
+            model.remove_emotion_keywords(text)
+
+        old = best_of(before, replies)
+        new = best_of(after, replies)
+        one_pass = best_of(model.extract_and_remove_emotions, replies)
+        print(f"{size:12} {old:12.1f} {new:11.1f} {one_pass:14.1f} {old / one_pass:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+"""
+Offline end-to-end load test of the WebSocket server.
+
+Boots WebSocketServer.app in-process with deterministic local stubs in place
+of the network services:
+
+- the agent (AgentFactory) streams a canned reply at a configurable first
+  token latency and token rate,
+- the TTS engine (edge-tts) returns a WAV clip after a configurable latency,
+  produced at a configurable real-time factor,
+- pytchat replays a recorded chat stream, from a JSONL file or generated.
+  The chat service polls it as it polls YouTube, adaptive interval included.
+
+N simulated clients connect to /client-ws through the ASGI interface, on the
+same event loop, in a mix of wire formats (binary or base64 JSON audio,
+streamed or per sentence). Every chat message carries an id ("#12") that the
+stub agent repeats in the first sentence of its reply, so each client
+measures the time from a message being posted to the first audio of its
+answer.
+
+Reports throughput (answered messages, turns, audio delivered), the time to
+first audio per message and client (p50/p95/p99/max), and the server-side
+stage latencies of /metrics. Nothing leaves the process.
+
+Recorded chat format, one JSON object per line:
+    {"at": 1.5, "author": "alice", "message": "hello", "type": "textMessage"}
+`at` is in seconds from the start of the replay; `type` may be "superChat"
+with an "amount" such as "$5.00".
+
+Run from the project root:
+    python -m benchmarks.bench_load_test --clients 20 --messages 100
+    python -m benchmarks.bench_load_test --chat chat.jsonl --max-p95-ms 3000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import re
+import struct
+import sys
+import time
+import wave
+from types import SimpleNamespace
+
+from loguru import logger
+
+from src.open_llm_vtuber import service_context
+from src.open_llm_vtuber.server import WebSocketServer
+from src.open_llm_vtuber.config_manager import read_yaml, validate_config
+from src.open_llm_vtuber.tts.tts_cache import TTSCache
+from src.open_llm_vtuber.youtube import youtube_chat_service
+
+MESSAGE_ID = re.compile(r"#(\d+)")
+SAMPLE_RATE = 16000
+FILLER = (
+    "thanks for hanging out with me on stream today and for all the lovely "
+    "messages in chat while we keep playing this game together"
+).split()
+
+
+# ==== stubs
+
+
+class StubAgent:
+    """
+    Streams a canned reply: the first sentence names the ids of the answered
+    messages, followed by filler sentences. Tokens are words.
+    """
+
+    def __init__(
+        self,
+        first_token_latency: float,
+        token_rate: float,
+        sentences: int,
+        words_per_sentence: int,
+        **_,
+    ):
+        self.first_token_latency = first_token_latency
+        self.token_rate = token_rate
+        self.sentences = sentences
+        self.words_per_sentence = words_per_sentence
+        self.flush_policy = None
+        self.replies = 0
+        self.interrupted = 0
+
+    def _reply(self, user_input: str) -> list:
+        self.replies += 1
+        ids = " ".join(f"#{i}" for i in MESSAGE_ID.findall(user_input))
+        sentences = [f"Thanks {ids or 'everyone'}!"]
+        for index in range(1, self.sentences):
+            start = (self.replies * 7 + index * 3) % len(FILLER)
+            words = [FILLER[(start + i) % len(FILLER)] for i in range(self.words_per_sentence)]
+            # Unique per reply, so the TTS cache does not hide the synthesis
+            sentences.append(f"{' '.join(words).capitalize()} {self.replies}.{index}.")
+        return sentences
+
+    async def chat(self, user_input: str):
+        await asyncio.sleep(self.first_token_latency)
+        for sentence in self._reply(user_input):
+            await asyncio.sleep(len(sentence.split()) / self.token_rate)
+            yield {
+                "type": "audio-and-expression",
+                "text": sentence,
+                "tts_text": sentence,
+                "actions": {"expression": "happy", "motion": "idle"},
+            }
+
+    def handle_interrupt(self, heard_response: str) -> None:
+        self.interrupted += 1
+
+    def set_memory_from_history(self, **kwargs):
+        pass
+
+
+class StubTTSEngine:
+    """
+    Returns a 16 kHz mono WAV clip lasting `len(text) / chars_per_second`
+    seconds, after `latency` seconds, in `chunks` parts produced at
+    `real_time_factor` times the clip duration.
+    """
+
+    def __init__(
+        self,
+        latency: float,
+        chars_per_second: float,
+        real_time_factor: float,
+        chunks: int = 4,
+    ):
+        self.latency = latency
+        self.chars_per_second = chars_per_second
+        self.real_time_factor = real_time_factor
+        self.chunks = chunks
+        self.calls = 0
+        # One second of a quiet tone, sliced for every clip
+        self._tone = b"".join(
+            struct.pack("<h", int(3000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)))
+            for i in range(SAMPLE_RATE)
+        )
+
+    def cache_settings(self) -> dict:
+        return {"engine": "stub", "chars_per_second": self.chars_per_second}
+
+    def _clip(self, duration: float) -> bytes:
+        frames = int(duration * SAMPLE_RATE) * 2
+        pcm = (self._tone * (frames // len(self._tone) + 1))[:frames]
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as clip:
+            clip.setnchannels(1)
+            clip.setsampwidth(2)
+            clip.setframerate(SAMPLE_RATE)
+            clip.writeframes(pcm)
+        return buffer.getvalue()
+
+    async def stream_audio(self, text: str):
+        self.calls += 1
+        duration = max(0.2, len(text) / self.chars_per_second)
+        audio = self._clip(duration)
+        await asyncio.sleep(self.latency)
+        size = -(-len(audio) // self.chunks)
+        for start in range(0, len(audio), size):
+            await asyncio.sleep(duration * self.real_time_factor / self.chunks)
+            yield audio[start : start + size]
+
+
+class ReplayChat:
+    """pytchat chat object replaying a recorded chat stream, in real time"""
+
+    def __init__(self, recording: list, clock_start: float):
+        self.recording = recording
+        self.start = clock_start
+        self.next = 0
+        self.alive = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def get(self):
+        now = time.perf_counter() - self.start
+        due = []
+        while self.next < len(self.recording) and self.recording[self.next]["at"] <= now:
+            due.append(self._item(self.recording[self.next]))
+            self.next += 1
+        return SimpleNamespace(sync_items=lambda: iter(due))
+
+    @staticmethod
+    def _item(record: dict) -> SimpleNamespace:
+        author = SimpleNamespace(
+            name=record["author"],
+            channelId=f"channel-{record['author']}",
+            isChatSponsor=record.get("member", False),
+            isChatOwner=False,
+            isChatModerator=False,
+        )
+        return SimpleNamespace(
+            type=record.get("type", "textMessage"),
+            message=record["message"],
+            author=author,
+            amountString=record.get("amount", ""),
+        )
+
+    def terminate(self) -> None:
+        self.alive = False
+
+
+def generate_recording(messages: int, rate: float, authors: int, seed: int) -> list:
+    """Chat at `rate` messages per second on average, Poisson arrivals"""
+    rng = random.Random(seed)
+    recording, at = [], 0.0
+    for _ in range(messages):
+        at += rng.expovariate(rate)
+        record = {
+            "at": round(at, 3),
+            "author": f"viewer{rng.randrange(authors)}",
+            "message": " ".join(rng.sample(FILLER, 5)),
+            "type": "textMessage",
+        }
+        if rng.random() < 0.05:
+            record.update(type="superChat", amount="$5.00")
+        recording.append(record)
+    return recording
+
+
+def load_recording(path: str) -> list:
+    with open(path, encoding="utf-8") as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    return sorted(records, key=lambda record: record["at"])
+
+
+# ==== simulated clients
+
+
+class SimClient:
+    """
+    A frontend connected to /client-ws through the ASGI interface.
+    `receive_delay` slows down its socket, to exercise the send queues.
+    """
+
+    def __init__(self, app, index: int, ready: dict, sent_at: dict, receive_delay: float):
+        self.app = app
+        self.index = index
+        self.ready = ready
+        self.sent_at = sent_at
+        self.receive_delay = receive_delay
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.first_audio: dict = {}
+        self.frames = 0
+        self.audio_bytes = 0
+        self.turns = 0
+        self.task = None
+
+    def _scope(self) -> dict:
+        return {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": "/client-ws",
+            "raw_path": b"/client-ws",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 40000 + self.index),
+            "server": ("127.0.0.1", 12393),
+            "subprotocols": [],
+        }
+
+    async def _receive(self) -> dict:
+        return await self.inbox.get()
+
+    async def _send(self, message: dict) -> None:
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self.accepted.set()
+        elif kind == "websocket.close":
+            self.closed.set()
+        elif kind == "websocket.send":
+            if self.receive_delay:
+                await asyncio.sleep(self.receive_delay)
+            self._on_frame(message.get("text"), message.get("bytes"))
+
+    def _on_frame(self, text, data) -> None:
+        now = time.perf_counter()
+        self.frames += 1
+        if data is not None:
+            self.audio_bytes += len(data) - 4
+            return
+        frame = json.loads(text)
+        frame_type = frame.get("type")
+        if frame_type == "control" and frame.get("text") == "conversation-chain-end":
+            self.turns += 1
+        if frame_type not in ("audio-chunk", "audio-and-expression"):
+            return
+        if frame.get("audio"):
+            self.audio_bytes += len(frame["audio"]) * 3 // 4
+        if frame.get("text"):
+            for message_id in MESSAGE_ID.findall(frame["text"]):
+                self.first_audio.setdefault(int(message_id), now)
+
+    async def connect(self) -> None:
+        self.inbox.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(self.app(self._scope(), self._receive, self._send))
+        await self.accepted.wait()
+        self.inbox.put_nowait({"type": "websocket.receive", "text": json.dumps(self.ready)})
+
+    async def disconnect(self) -> None:
+        self.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self.task, 5)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+
+    def latencies(self) -> list:
+        return [
+            at - self.sent_at[message_id]
+            for message_id, at in self.first_audio.items()
+            if message_id in self.sent_at
+        ]
+
+
+def client_modes(count: int) -> list:
+    """Cycle through the wire formats of the frontends"""
+    modes = [
+        {"audio_transport": "binary", "stream_audio": True},
+        {"audio_transport": "json", "stream_audio": True},
+        {"audio_transport": "json", "stream_audio": False},
+    ]
+    return [{"type": "frontend-ready", **modes[i % len(modes)]} for i in range(count)]
+
+
+# ==== run
+
+
+def install_stubs(args, recording: list, clock: dict) -> dict:
+    """Swap the agent, TTS engine and chat source of the server for stubs"""
+    agents = []
+
+    class StubAgentFactory:
+        @staticmethod
+        def create_agent(**kwargs):
+            agents.append(
+                StubAgent(
+                    first_token_latency=args.first_token_ms / 1e3,
+                    token_rate=args.token_rate,
+                    sentences=args.sentences,
+                    words_per_sentence=args.words,
+                    **kwargs,
+                )
+            )
+            return agents[-1]
+
+    tts = StubTTSEngine(args.tts_latency_ms / 1e3, args.chars_per_second, args.tts_rtf)
+
+    def create_chat(video_id, interruptable=True):
+        # The replay clock starts when the first client starts the broadcast
+        clock.setdefault("start", time.perf_counter())
+        return ReplayChat(recording, clock["start"])
+
+    service_context.AgentFactory = StubAgentFactory
+    service_context.EdgeTTSEngine = lambda: tts
+    service_context.TTSCache = lambda: TTSCache(cache_dir=None)
+    youtube_chat_service.pytchat = SimpleNamespace(create=create_chat)
+    return {"agents": agents, "tts": tts}
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e3
+
+    return {
+        "count": len(ordered),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+async def run(args) -> dict:
+    if args.chat:
+        recording = load_recording(args.chat)
+    else:
+        recording = generate_recording(args.messages, args.rate, args.authors, args.seed)
+    for index, record in enumerate(recording):
+        record["message"] = f"{record['message']} (#{index})"
+
+    clock: dict = {}
+    stubs = install_stubs(args, recording, clock)
+    server = WebSocketServer(
+        validate_config(read_yaml("conf.yaml")), enable_metrics=not args.no_metrics
+    )
+    sent_at = {}
+
+    clients = [
+        SimClient(server.app, i, ready, sent_at, args.slow_delay if i < args.slow_clients else 0.0)
+        for i, ready in enumerate(client_modes(args.clients))
+    ]
+    for client in clients:
+        await client.connect()
+    while "start" not in clock:
+        await asyncio.sleep(0.01)
+    start = clock["start"]
+    for index, record in enumerate(recording):
+        sent_at[index] = start + record["at"]
+
+    # Replay, then drain until every client is idle for `idle` seconds
+    replay_end = start + (recording[-1]["at"] if recording else 0.0)
+    last_frames, idle_since = -1, time.perf_counter()
+    while True:
+        await asyncio.sleep(0.1)
+        now = time.perf_counter()
+        frames = sum(client.frames for client in clients)
+        if frames != last_frames:
+            last_frames, idle_since = frames, now
+        if now > replay_end and now - idle_since > args.idle:
+            break
+        if now - start > args.timeout:
+            logger.warning("Load test timed out")
+            break
+    elapsed = idle_since - start
+
+    for client in clients:
+        await client.disconnect()
+
+    latencies = [latency for client in clients for latency in client.latencies()]
+    answered = set().union(*(client.first_audio for client in clients))
+    audio_bytes = sum(client.audio_bytes for client in clients)
+    return {
+        "clients": args.clients,
+        "messages": len(recording),
+        "answered": len(answered & set(sent_at)),
+        "turns": max((client.turns for client in clients), default=0),
+        "agent_replies": sum(agent.replies for agent in stubs["agents"]),
+        "tts_calls": stubs["tts"].calls,
+        "elapsed_s": elapsed,
+        "messages_per_s": len(answered) / elapsed if elapsed else 0.0,
+        "frames_per_s": sum(client.frames for client in clients) / elapsed if elapsed else 0.0,
+        "audio_mb_per_s": audio_bytes / elapsed / 1e6 if elapsed else 0.0,
+        "time_to_first_audio": percentiles(latencies),
+        "server": server.metrics.snapshot(turns=0),
+    }
+
+
+def report(result: dict) -> None:
+    print(
+        f"{result['clients']} clients, {result['messages']} chat messages, "
+        f"{result['answered']} answered in {result['turns']} turns "
+        f"({result['agent_replies']} agent replies, {result['tts_calls']} TTS calls) "
+        f"in {result['elapsed_s']:.1f}s"
+    )
+    print(
+        f"throughput: {result['messages_per_s']:.2f} messages/s, "
+        f"{result['frames_per_s']:.0f} frames/s, {result['audio_mb_per_s']:.2f} MB/s of audio"
+    )
+    ttfa = result["time_to_first_audio"]
+    if ttfa["count"]:
+        print(
+            f"time to first audio ({ttfa['count']} samples): p50 {ttfa['p50_ms']:.0f} ms, "
+            f"p95 {ttfa['p95_ms']:.0f} ms, p99 {ttfa['p99_ms']:.0f} ms, max {ttfa['max_ms']:.0f} ms"
+        )
+    histograms = result["server"].get("histograms", {})
+    if histograms:
+        print(f"\n{'server stage':18} {'count':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+        for name, summary in histograms.items():
+            if summary.get("count"):
+                print(
+                    f"{name:18} {summary['count']:7} {summary['p50_ms']:9.1f} "
+                    f"{summary['p95_ms']:9.1f} {summary['p99_ms']:9.1f}"
+                )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test")
+    parser.add_argument("--clients", type=int, default=10, help="Simulated WebSocket clients")
+    parser.add_argument("--chat", help="Recorded chat stream (JSONL) to replay")
+    parser.add_argument("--messages", type=int, default=60, help="Generated chat messages")
+    parser.add_argument("--rate", type=float, default=3.0, help="Generated messages per second")
+    parser.add_argument("--authors", type=int, default=40, help="Generated chat authors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first-token-ms", type=float, default=300, help="Stub LLM first token latency")
+    parser.add_argument("--token-rate", type=float, default=60, help="Stub LLM tokens per second")
+    parser.add_argument("--sentences", type=int, default=3, help="Sentences per stub reply")
+    parser.add_argument("--words", type=int, default=8, help="Words per filler sentence")
+    parser.add_argument("--tts-latency-ms", type=float, default=150, help="Stub TTS latency")
+    parser.add_argument("--tts-rtf", type=float, default=0.1, help="Stub TTS real-time factor")
+    parser.add_argument("--chars-per-second", type=float, default=15, help="Speech rate of the stub audio")
+    parser.add_argument("--slow-clients", type=int, default=0, help="Clients with a slow socket")
+    parser.add_argument("--slow-delay", type=float, default=0.02, help="Delay per frame of slow clients (s)")
+    parser.add_argument("--idle", type=float, default=2.0, help="Idle seconds ending the drain")
+    parser.add_argument("--timeout", type=float, default=300, help="Maximum run time (s)")
+    parser.add_argument("--no-metrics", action="store_true", help="Run with the metrics disabled")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if the p95 time to first audio is higher")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logger.disable("src.open_llm_vtuber")
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
+
+    p95 = result["time_to_first_audio"].get("p95_ms")
+    if args.max_p95_ms is not None:
+        if p95 is None:
+            print("FAIL: no message was answered")
+            return 1
+        if p95 > args.max_p95_ms:
+            print(f"FAIL: p95 time to first audio {p95:.0f} ms > {args.max_p95_ms:.0f} ms")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Correctness check and benchmark of the shared Live2D model registry.
+
+Compares Live2dModel.set_model, which looks the model up in the shared
+ModelRegistry, with the previous lookup that read, decoded and parsed
+model_dict.json and scanned it by name on every call. Also checks that the
+registry reloads the file when it changes.
+
+Run from the project root:
+    python -m benchmarks.bench_model_registry
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from loguru import logger
+
+from src.open_llm_vtuber.live2d_model import Live2dModel, ModelRegistry, load_file_content
+
+MODEL_COUNTS = [10, 200, 2000]
+LOOKUPS = 200
+
+
+def make_model_dict(count: int) -> list:
+    emotion_map = {name: index for index, name in enumerate(["neutral", "joy", "anger"])}
+    return [
+        {
+            "name": f"model_{i}",
+            "description": "",
+            "url": f"/live2d-models/model_{i}/model_{i}.model3.json",
+            "kScale": 0.5,
+            "initialXshift": 0,
+            "initialYshift": 0,
+            "emotionMap": emotion_map,
+            "tapMotions": {"HitAreaHead": {"": 1}, "HitAreaBody": {"": 1}},
+        }
+        for i in range(count)
+    ]
+
+
+def reference_lookup(model_dict_path: str, model_name: str) -> dict:
+    """The lookup done by set_model before the registry"""
+    model_dict = json.loads(load_file_content(model_dict_path))
+    return next(model for model in model_dict if model["name"] == model_name)
+
+
+def write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+
+
+def check(path: str) -> None:
+    write_json(path, make_model_dict(3))
+    model = Live2dModel("model_1", model_dict_path=path)
+    assert model.model_info == reference_lookup(path, "model_1")
+    model.model_info["kScale"] = 2  # Must not leak into the registry
+    assert Live2dModel("model_1", model_dict_path=path).model_info["kScale"] == 0.5
+
+    renamed = make_model_dict(3)
+    renamed[1]["name"] = "renamed"
+    write_json(path, renamed)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    model.set_model("renamed")
+    try:
+        model.set_model("model_1")
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("stale model dictionary served after the file changed")
+
+
+def per_lookup_us(func, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        func(f"model_{(i * 7) % count}")
+    return (time.perf_counter() - start) / LOOKUPS * 1e6
+
+
+def main():
+    logger.disable("src.open_llm_vtuber")
+    with tempfile.TemporaryDirectory() as directory:
+        check(os.path.join(directory, "check.json"))
+        print("checked lookups, copies and reload on change\n")
+
+        print(f"{'models':8} {'re-read (us)':>13} {'registry (us)':>14} {'speedup':>9}")
+        for count in MODEL_COUNTS:
+            path = os.path.join(directory, f"model_dict_{count}.json")
+            write_json(path, make_model_dict(count))
+            model = Live2dModel("model_0", model_dict_path=path)
+
+            before = per_lookup_us(lambda name: reference_lookup(path, name), count)
+            after = per_lookup_us(model.set_model, count)
+            loads = ModelRegistry.get_shared(path).loads
+            print(f"{count:8} {before:13.1f} {after:14.1f} {before / after:8.1f}x  ({loads} load)")
+
+
+if __name__ == "__main__":
+    main()
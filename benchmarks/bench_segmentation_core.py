@@ -0,0 +1,158 @@
+"""
+Correctness check and benchmark of the regex segmentation core.
+
+Compares the module-level compiled pattern / frozenset implementations of
+segment_text_by_regex, is_complete_sentence, contains_comma,
+contains_end_punctuation and is_punctuation with the previous implementations
+on a random corpus, then times both.
+
+The previous segment_text_by_regex dropped the text of a sentence ending with
+an abbreviation ("Hello Mr." in "Hello Mr. Smith.") and treated "|" as end
+punctuation. Both are fixed, so inputs containing them are checked against the
+expected output instead of the previous one.
+
+Run from the project root:
+    python -m benchmarks.bench_segmentation_core
+"""
+
+import random
+import re
+import time
+
+from src.open_llm_vtuber.utils.sentence_divider import (
+    ABBREVIATIONS,
+    COMMAS,
+    END_PUNCTUATIONS,
+    contains_comma,
+    contains_end_punctuation,
+    is_complete_sentence,
+    is_punctuation,
+    segment_text_by_regex,
+)
+
+CASES = 20000
+REPEATS = 5
+
+PIECES = (
+    ["Hello", "world", "there", "Chào bạn", "你好", " ", " ", "\n", "3", "ok"]
+    + END_PUNCTUATIONS
+    + COMMAS[:6]
+)
+
+
+# ==== previous implementations
+
+
+def reference_segment_text_by_regex(text: str):
+    if not text:
+        return [], ""
+
+    complete_sentences = []
+    remaining_text = text.strip()
+
+    escaped_punctuations = [re.escape(p) for p in END_PUNCTUATIONS]
+    pattern = r"(.*?(?:[" + "|".join(escaped_punctuations) + r"]))"
+
+    while remaining_text:
+        match = re.search(pattern, remaining_text)
+        if not match:
+            break
+
+        end_pos = match.end(1)
+        potential_sentence = remaining_text[:end_pos].strip()
+
+        if any(potential_sentence.endswith(abbrev) for abbrev in ABBREVIATIONS):
+            remaining_text = remaining_text[end_pos:].lstrip()
+            continue
+
+        complete_sentences.append(potential_sentence)
+        remaining_text = remaining_text[end_pos:].lstrip()
+
+    return complete_sentences, remaining_text
+
+
+def reference_is_complete_sentence(text: str) -> bool:
+    text = text.strip()
+    if not text:
+        return False
+    if any(text.endswith(abbrev) for abbrev in ABBREVIATIONS):
+        return False
+    return any(text.endswith(punct) for punct in END_PUNCTUATIONS)
+
+
+def reference_contains_comma(text: str) -> bool:
+    return any(comma in text for comma in COMMAS)
+
+
+def reference_contains_end_punctuation(text: str) -> bool:
+    return any(punct in text for punct in END_PUNCTUATIONS)
+
+
+def reference_is_punctuation(text: str) -> bool:
+    return text in COMMAS or text in END_PUNCTUATIONS
+
+
+PAIRS = [
+    ("segment_text_by_regex", reference_segment_text_by_regex, segment_text_by_regex),
+    ("is_complete_sentence", reference_is_complete_sentence, is_complete_sentence),
+    ("contains_comma", reference_contains_comma, contains_comma),
+    (
+        "contains_end_punctuation",
+        reference_contains_end_punctuation,
+        contains_end_punctuation,
+    ),
+    ("is_punctuation", reference_is_punctuation, is_punctuation),
+]
+
+# Inputs whose output changed on purpose, with the expected output
+FIXED_CASES = [
+    ("Hello Mr. Smith. Bye", (["Hello Mr. Smith."], "Bye")),
+    ("See Dr. Who! Then", (["See Dr. Who!"], "Then")),
+    ("Ask Prof.", ([], "Ask Prof.")),
+    ("a | b. c", (["a | b."], "c")),
+]
+
+
+def make_corpus(count: int) -> list:
+    rng = random.Random(0)
+    return [
+        "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+        for _ in range(count)
+    ]
+
+
+def check(corpus: list) -> None:
+    for name, reference, implementation in PAIRS:
+        for text in corpus:
+            assert implementation(text) == reference(text), f"{name} differs on {text!r}"
+    for text, expected in FIXED_CASES:
+        actual = segment_text_by_regex(text)
+        assert actual == expected, f"segment_text_by_regex({text!r}) = {actual!r}"
+    for piece in END_PUNCTUATIONS + COMMAS:
+        assert is_punctuation(piece) and not is_punctuation(piece + "x")
+
+
+def best_of(func, corpus: list) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    corpus = make_corpus(CASES)
+    check(corpus)
+    print(f"checked {len(corpus)} random inputs and {len(FIXED_CASES)} fixed cases\n")
+
+    print(f"{'function':26} {'before (us)':>12} {'after (us)':>11} {'speedup':>9}")
+    for name, reference, implementation in PAIRS:
+        before = best_of(reference, corpus)
+        after = best_of(implementation, corpus)
+        print(f"{name:26} {before:12.2f} {after:11.2f} {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
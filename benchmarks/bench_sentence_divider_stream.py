@@ -0,0 +1,76 @@
+"""
+Benchmark of SentenceDivider.process_stream on long token streams.
+
+Feeds 1k to 10k token streams through the divider and reports the cost per
+token. With the append-only token buffer the cost per token stays flat as the
+stream grows, including long <think> passages without punctuation that used
+to be re-copied and re-scanned on every token.
+
+Run from the project root:
+    python -m benchmarks.bench_sentence_divider_stream
+"""
+
+import asyncio
+import time
+
+from loguru import logger
+
+from src.open_llm_vtuber.utils.sentence_divider import SentenceDivider
+
+TOKEN_COUNTS = [1000, 5000, 10000]
+
+WORDS = "so the viewer asked about the stream schedule and I think we can".split()
+
+
+def chat_tokens(count: int) -> list:
+    """Short sentences, a boundary every dozen tokens"""
+    tokens = []
+    while len(tokens) < count:
+        tokens += [" " + word for word in WORDS] + ["."]
+    return tokens[:count]
+
+
+def thinking_tokens(count: int) -> list:
+    """One long <think> passage without punctuation, then a short answer"""
+    answer = [" Sure", ",", " see", " you", " tonight", "!"]
+    body = [" " + WORDS[i % len(WORDS)] for i in range(count - len(answer) - 2)]
+    return ["<think>"] + body + ["</think>"] + answer
+
+
+async def run_divider(tokens: list, segment_method: str) -> int:
+    async def stream():
+        for token in tokens:
+            yield token
+
+    divider = SentenceDivider(segment_method=segment_method, language="en")
+    emitted = []
+    async for sentence in divider.process_stream(stream()):
+        emitted.append(sentence.text)
+    assert divider.complete_response == "".join(tokens)
+    # Sentences are sliced off the committed cursor: all text, each once
+    assert "".join(emitted).replace(" ", "") == "".join(tokens).replace(" ", "")
+    return len(emitted)
+
+
+def per_token_us(tokens: list, segment_method: str) -> float:
+    start = time.perf_counter()
+    asyncio.run(run_divider(tokens, segment_method))
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+
+def main():
+    # Per-flush debug logging would dominate the timings
+    logger.disable("src.open_llm_vtuber")
+    header = "".join(f"{f'{count} tok (us)':>16}" for count in TOKEN_COUNTS)
+    print(f"{'stream':24}{header}")
+    for label, make_tokens in (("chat", chat_tokens), ("long thinking", thinking_tokens)):
+        for segment_method in ("regex", "pysbd"):
+            timings = "".join(
+                f"{per_token_us(make_tokens(count), segment_method):16.1f}"
+                for count in TOKEN_COUNTS
+            )
+            print(f"{f'{label} ({segment_method})':24}{timings}")
+
+
+if __name__ == "__main__":
+    main()
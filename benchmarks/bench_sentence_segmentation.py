@@ -0,0 +1,111 @@
+"""
+Benchmark of one SentenceDivider buffer flush with pysbd segmentation.
+
+Compares the per-flush cost of detecting the language and building a new
+pysbd Segmenter on every call with the cached Segmenter and the language
+fixed once per stream, on typical 25-character buffers.
+
+Run from the project root:
+    python -m benchmarks.bench_sentence_segmentation
+"""
+
+import asyncio
+import time
+
+import pysbd
+from loguru import logger
+
+from src.open_llm_vtuber.utils import sentence_divider
+from src.open_llm_vtuber.utils.sentence_divider import (
+    SentenceDivider,
+    detect_language,
+    get_segmenter,
+    is_complete_sentence,
+    segment_text_by_pysbd,
+    segment_text_by_regex,
+)
+
+FLUSHES = 400
+
+# Buffers of ~25 characters, the flush threshold of process_stream
+BUFFERS = {
+    "en": [
+        "Hello there! How are you",
+        "I think it is a nice day.",
+        "Let me check that for you",
+        "Sure, here it is. Anythin",
+    ],
+    "de": [
+        "Guten Tag! Wie geht es di",
+        "Das ist eine gute Frage. ",
+        "Ich schaue gleich nach, o",
+        "Natürlich. Bis später, ok",
+    ],
+}
+
+
+def segment_uncached(text: str):
+    """The flush done before caching: detection and a new Segmenter each time"""
+    lang = detect_language(text)
+    if lang is None:
+        return segment_text_by_regex(text)
+    sentences = pysbd.Segmenter(language=lang, clean=False).segment(text)
+    complete = [s.strip() for s in sentences[:-1] if s.strip()]
+    last = sentences[-1].strip() if sentences else ""
+    if is_complete_sentence(last):
+        return complete + [last], ""
+    return complete, last
+
+
+def per_flush_us(func, buffers, *args) -> float:
+    start = time.perf_counter()
+    for i in range(FLUSHES):
+        func(buffers[i % len(buffers)], *args)
+    return (time.perf_counter() - start) / FLUSHES * 1e6
+
+
+def check_detect_once():
+    """Without a configured language, a response stream is detected once"""
+    calls = []
+
+    def counting_detect(text):
+        calls.append(text)
+        return detect_language(text)
+
+    async def tokens():
+        for word in ("Hi, there. " + "This is a longer reply to segment. " * 20).split(" "):
+            yield word + " "
+
+    async def divide():
+        divider = SentenceDivider(language=None)
+        return [s.text async for s in divider.process_stream(tokens())]
+
+    sentence_divider.detect_language = counting_detect
+    try:
+        sentences = asyncio.run(divide())
+    finally:
+        sentence_divider.detect_language = detect_language
+    assert len(calls) == 1, f"language detected {len(calls)} times"
+    assert len(calls[0]) >= sentence_divider.MIN_DETECT_LENGTH, calls[0]
+    assert sentences[:2] == ["Hi,", "there."], sentences[:2]
+
+
+def main():
+    print(f"{'language':10} {'uncached (us)':>14} {'cached (us)':>12} {'speedup':>9}")
+    for lang, buffers in BUFFERS.items():
+        get_segmenter(lang)  # Built once, on the first flush of a stream
+        for text in buffers:
+            expected = segment_uncached(text)
+            actual = segment_text_by_pysbd(text, detect_language(text))
+            assert actual == expected, f"{lang}: segmentation differs for {text!r}"
+
+        uncached = per_flush_us(segment_uncached, buffers)
+        cached = per_flush_us(segment_text_by_pysbd, buffers, lang)
+        print(f"{lang:10} {uncached:14.0f} {cached:12.0f} {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    # Per-flush debug logging would dominate the timings
+    logger.disable("src.open_llm_vtuber")
+    check_detect_once()
+    main()
@@ -0,0 +1,118 @@
+"""
+Correctness check and benchmark of the async translation stage.
+
+Uses the local StubTranslate, which blocks like a network call, to compare
+calling the translator synchronously once per sentence on the event loop (what
+tts_filter does) with TranslationStage: the time to translate a response, the
+longest event loop stall while doing it, and the cost of a repeated response
+served from the cache. Also checks order, batching and the timeout fallback.
+
+Run from the project root:
+    python -m benchmarks.bench_translation_stage
+"""
+
+import asyncio
+import time
+
+from loguru import logger
+
+from src.open_llm_vtuber.translate.stub import StubTranslate
+from src.open_llm_vtuber.translate.translation_stage import TranslationStage
+from src.open_llm_vtuber.utils.tts_preprocessor import tts_filter
+
+DELAY = 0.05  # Seconds per stub translation call
+SENTENCES = [f"This is sentence number {i}." for i in range(12)]
+
+
+async def sentence_stream(interval: float = 0.01):
+    """Sentences arriving like split_sentences output, with display-only ones"""
+    for index, text in enumerate(SENTENCES):
+        await asyncio.sleep(interval)
+        yield {"text": text, "tts_text": text if index % 4 else "", "actions": None}
+
+
+async def max_loop_stall(work) -> tuple:
+    """Run `work` and measure the longest gap between event loop ticks"""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    result = await work()
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return result, elapsed, stall
+
+
+async def run_sync():
+    translator = StubTranslate(delay=DELAY)
+    output = []
+    async for sentence in sentence_stream():
+        if sentence["tts_text"]:
+            sentence["tts_text"] = tts_filter(
+                sentence["tts_text"], False, True, True, True, True, translator
+            )
+        output.append(sentence)
+    return output
+
+
+async def run_stage(stage: TranslationStage):
+    return [sentence async for sentence in stage.stream(sentence_stream())]
+
+
+async def check():
+    translator = StubTranslate(delay=DELAY)
+    stage = TranslationStage(translator, batch_size=4)
+    output = await run_stage(stage)
+    assert [s["text"] for s in output] == SENTENCES
+    for index, sentence in enumerate(output):
+        expected = f"[stub] {SENTENCES[index]}" if index % 4 else ""
+        assert sentence["tts_text"] == expected, sentence
+    assert stage.batches < 9, "ready sentences were not batched"
+
+    calls = translator.calls
+    await run_stage(stage)
+    assert translator.calls == calls, "repeated response was not cached"
+    assert stage.stats()["hits"] == 9
+
+    slow = TranslationStage(StubTranslate(delay=0.5), timeout=0.05)
+    assert await slow.translate("Hello.") == "Hello."
+    assert slow.stats()["timeouts"] == 1 and slow.stats()["entries"] == 0
+    await slow.close()
+    await stage.close()
+
+
+async def main_async():
+    await check()
+    print("checked order, display-only sentences, batching, cache and timeout\n")
+
+    stage = TranslationStage(StubTranslate(delay=DELAY))
+    print(f"{'mode':22} {'total (ms)':>11} {'max loop stall (ms)':>20} {'calls':>6}")
+    _, elapsed, stall = await max_loop_stall(run_sync)
+    print(f"{'sync, per sentence':22} {elapsed * 1e3:11.0f} {stall * 1e3:20.1f} {9:6}")
+    for label in ("stage, cold cache", "stage, warm cache"):
+        before = stage.translator.calls
+        _, elapsed, stall = await max_loop_stall(lambda: run_stage(stage))
+        calls = stage.translator.calls - before
+        print(f"{label:22} {elapsed * 1e3:11.0f} {stall * 1e3:20.1f} {calls:6}")
+    print(f"\nstage stats: {stage.stats()}")
+    await stage.close()
+
+
+def main():
+    logger.disable("src.open_llm_vtuber")
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
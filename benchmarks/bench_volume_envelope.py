@@ -0,0 +1,166 @@
+"""
+Benchmark of the volume envelope (RMS per 20 ms chunk) used for lip sync.
+
+Compares the per-chunk pydub implementation with the vectorized NumPy one on
+minute-long synthetic clips and checks that both return the same volumes.
+
+Run from the project root:
+    python -m benchmarks.bench_volume_envelope
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from src.open_llm_vtuber.tts.tts_cache import CachedTTSEngine, TTSCache
+from src.open_llm_vtuber.utils.stream_audio import (
+    PcmFormat,
+    _get_volume_by_chunks,
+    _get_volume_by_chunks_pydub,
+    get_volumes_from_bytes,
+    load_audio_payload,
+    make_wav_header,
+)
+
+CHUNK_LENGTH_MS = 20
+REPEATS = 5
+
+# (label, frame rate, channels, sample width)
+CLIPS = [
+    ("24 kHz mono 16-bit (edge-tts)", 24000, 1, 2),
+    ("44.1 kHz stereo 16-bit", 44100, 2, 2),
+    ("48 kHz mono 16-bit", 48000, 1, 2),
+    ("11.025 kHz mono 16-bit (uneven)", 11025, 1, 2),
+]
+
+
+def make_clip(frame_rate: int, channels: int, sample_width: int, seconds: int = 60):
+    """A speech-like clip: a tone whose loudness changes every few hundred ms"""
+    rng = np.random.default_rng(0)
+    frames = frame_rate * seconds
+    t = np.arange(frames) / frame_rate
+    envelope = np.repeat(rng.random(seconds * 4), -(-frame_rate // 4))[:frames]
+    wave = np.sin(2 * np.pi * 220 * t) * envelope * 0.8 * (2 ** (8 * sample_width - 1))
+    samples = np.repeat(wave, channels).astype(f"<i{sample_width}")
+    return AudioSegment(
+        data=samples.tobytes(),
+        sample_width=sample_width,
+        frame_rate=frame_rate,
+        channels=channels,
+    )
+
+
+def best_of(func, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'clip':32} {'pydub (ms)':>12} {'numpy (ms)':>12} {'speedup':>9}")
+    for label, frame_rate, channels, sample_width in CLIPS:
+        clip = make_clip(frame_rate, channels, sample_width)
+        expected = _get_volume_by_chunks_pydub(clip, CHUNK_LENGTH_MS)
+        actual = _get_volume_by_chunks(clip, CHUNK_LENGTH_MS)
+        assert actual == expected, f"{label}: volumes differ"
+
+        pydub_time = best_of(_get_volume_by_chunks_pydub, clip, CHUNK_LENGTH_MS)
+        numpy_time = best_of(_get_volume_by_chunks, clip, CHUNK_LENGTH_MS)
+        print(
+            f"{label:32} {pydub_time * 1000:12.1f} {numpy_time * 1000:12.1f} "
+            f"{pydub_time / numpy_time:8.1f}x"
+        )
+
+
+def load_with_pydub(path: str):
+    """The payload loading done before the WAV fast path"""
+    audio = AudioSegment.from_file(path)
+    audio_bytes = audio.export(format="wav").read()
+    return _get_volume_by_chunks(audio, CHUNK_LENGTH_MS), audio_bytes
+
+
+def main_wav_payload():
+    print(f"\n{'wav payload':32} {'pydub (ms)':>12} {'mmap (ms)':>12} {'speedup':>9}")
+    for label, frame_rate, channels, sample_width in CLIPS:
+        clip = make_clip(frame_rate, channels, sample_width)
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            clip.export(f, format="wav")
+        try:
+            payload, audio_bytes = load_audio_payload(f.name, CHUNK_LENGTH_MS)
+            volumes, _ = load_with_pydub(f.name)
+            assert payload["volumes"] == volumes, f"{label}: volumes differ"
+            with open(f.name, "rb") as wav_file:
+                assert audio_bytes == wav_file.read(), f"{label}: audio changed"
+
+            pydub_time = best_of(load_with_pydub, f.name)
+            mmap_time = best_of(load_audio_payload, f.name, CHUNK_LENGTH_MS)
+        finally:
+            os.unlink(f.name)
+        print(
+            f"{label:32} {pydub_time * 1000:12.1f} {mmap_time * 1000:12.1f} "
+            f"{pydub_time / mmap_time:8.1f}x"
+        )
+
+
+def check_silent_wav():
+    """Silent TTS output raises ValueError, with the mmap released"""
+    silent = AudioSegment.silent(duration=500, frame_rate=24000)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        silent.export(f, format="wav")
+    try:
+        try:
+            load_audio_payload(f.name, CHUNK_LENGTH_MS)
+        except ValueError as e:
+            assert "all zero" in str(e), e
+        else:
+            raise AssertionError("silent WAV did not raise ValueError")
+        with open(f.name, "rb") as wav_file:
+            assert get_volumes_from_bytes(wav_file.read(), CHUNK_LENGTH_MS) == []
+    finally:
+        os.unlink(f.name)
+
+
+class PcmEngine:
+    """TTS engine streaming a fixed clip as raw 16-bit PCM"""
+
+    def __init__(self, clip: AudioSegment):
+        self.clip = clip
+        self.pcm_format = PcmFormat(clip.frame_rate, clip.sample_width, clip.channels)
+
+    async def stream_audio(self, text: str):
+        pcm = self.clip.raw_data
+        for start in range(0, len(pcm), 4096):
+            yield pcm[start : start + 4096]
+
+
+def check_pcm_passthrough():
+    """PCM from a TTS engine is sent and cached untouched behind a WAV header"""
+    clip = make_clip(24000, 1, 2, seconds=2)
+    engine = CachedTTSEngine(PcmEngine(clip), TTSCache(cache_dir=None))
+
+    async def synthesize():
+        return [chunk async for chunk in engine.stream_audio("hello")]
+
+    streamed = asyncio.run(synthesize())
+    assert streamed[0][:4] == b"RIFF" and len(streamed[0]) == 44
+    assert b"".join(streamed[1:]) == clip.raw_data
+
+    cached = asyncio.run(engine.async_generate_audio("hello"))
+    assert cached == make_wav_header(len(clip.raw_data), 24000) + clip.raw_data
+    expected = _get_volume_by_chunks_pydub(clip, CHUNK_LENGTH_MS)
+    assert np.allclose(engine.volumes_for("hello"), expected)
+    assert np.allclose(get_volumes_from_bytes(b"".join(streamed), CHUNK_LENGTH_MS), expected)
+
+
+if __name__ == "__main__":
+    check_silent_wav()
+    check_pcm_passthrough()
+    main()
+    main_wav_payload()
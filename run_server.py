@@ -6,6 +6,7 @@ import tomli
 import uvicorn
 from loguru import logger
 from src.open_llm_vtuber.server import WebSocketServer
+from src.open_llm_vtuber.config_manager import read_yaml, validate_config
 
 os.environ["HF_HOME"] = str(Path(__file__).parent / "models")
 os.environ["MODELSCOPE_CACHE"] = str(Path(__file__).parent / "models")
@@ -44,6 +45,7 @@ def parse_args():
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     parser.add_argument("--port", type=int, default=12393, help="Server port (default: 12393)")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Server host (default: 127.0.0.1)")
+    parser.add_argument("--no-metrics", action="store_true", help="Disable the latency metrics served on /metrics")
     return parser.parse_args()
 
 
@@ -55,7 +57,8 @@ def run(console_log_level: str):
     args = parse_args()
     
     # Initialize and run the WebSocket server
-    server = WebSocketServer()
+    config = validate_config(read_yaml("conf.yaml"))
+    server = WebSocketServer(config, enable_metrics=not args.no_metrics)
     uvicorn.run(
         app=server.app,
         host=args.host,
@@ -1,101 +1,307 @@
-import json
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from loguru import logger
-from openai import OpenAI
-
-class SimpleAgent:
-    """Simple agent that handles chat with OpenAI"""
-    def __init__(self):
-        """Initialize OpenAI client"""
-        self.executor = ThreadPoolExecutor(max_workers=1)
-        # API key should be loaded from environment variable or config file
-        self.client = OpenAI()
-        logger.info("Initialized SimpleAgent")
-
-    def _call_openai(self, messages):
-        """Call OpenAI API"""
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=800,
-                top_p=0.95,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-            return response
-        except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            raise
-
-    async def chat(self, user_input: str):
-        """Chat with OpenAI and return response with actions"""
-        try:
-            logger.info(f"Processing chat input: {user_input}")
-
-            # Split username and message
-            try:
-                username, message = user_input.split(":", 1)
-                formatted_input = f"Người xem '{username.strip()}' nhắn: {message.strip()}"
-            except ValueError:
-                formatted_input = user_input
-                logger.warning("Input not in username:message format, using as is")
-
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai,
-                [
-                    {
-                        "role": "system", 
-                        "content": """You are a cute and friendly VTuber. Your responses should be:
-                        1. Natural and conversational
-                        2. Show personality and emotion
-                        3. Engage with viewers
-                        4. Keep responses concise (1-2 sentences)
-                        5. Use appropriate expressions and motions
-                        
-                        Response format:
-                        {
-                            "text": "What you want to say",
-                            "expression": "happy/sad/angry/surprised",
-                            "motion": "idle/wave/nod/shake"
-                        }
-                        """
-                    },
-                    {"role": "user", "content": formatted_input}
-                ]
-            )
-            
-            # Parse OpenAI response
-            content = json.loads(response.choices[0].message.content)
-            logger.info(f"Got response: {content}")
-
-            # Format response for frontend
-            response_payload = {
-                "type": "audio-and-expression",
-                "text": content["text"],
-                "actions": {
-                    "expression": content["expression"],
-                    "motion": content["motion"]
-                }
-            }
-            logger.debug(f"Formatted response payload: {response_payload}")
-
-            yield response_payload
-
-        except Exception as e:
-            logger.error(f"Error in chat: {e}")
-            yield {
-                "type": "audio-and-expression", 
-                "text": "Xin lỗi, có lỗi xảy ra rồi ạ",
-                "actions": {
-                    "expression": "sad",
-                    "motion": "shake"
-                }
-            }
-
-    def set_memory_from_history(self, **kwargs):
-        """Required by interface"""
-        pass 
\ No newline at end of file
+import re
+import json
+from typing import AsyncIterator, Optional
+from loguru import logger
+
+from .llm_client_pool import LLMClientPool
+from ..utils.sentence_divider import SentenceDivider, TagState
+from ..utils.flush_policy import AdaptiveFlushPolicy
+from ..metrics import get_metrics
+
+EXPRESSIONS = ["happy", "sad", "angry", "surprised"]
+MOTIONS = ["idle", "wave", "nod", "shake"]
+
+# Inline expression tags used by the streaming prompt, e.g. "[happy]"
+EXPRESSION_TAG_PATTERN = re.compile(
+    r"\[(" + "|".join(EXPRESSIONS) + r")\]", re.IGNORECASE
+)
+
+SYSTEM_PROMPT = """You are a cute and friendly VTuber. Your responses should be:
+                        1. Natural and conversational
+                        2. Show personality and emotion
+                        3. Engage with viewers
+                        4. Keep responses concise (1-2 sentences)
+                        5. Use appropriate expressions and motions
+
+                        Response format:
+                        {
+                            "text": "What you want to say",
+                            "expression": "happy/sad/angry/surprised",
+                            "motion": "idle/wave/nod/shake"
+                        }
+                        """
+
+STREAMING_SYSTEM_PROMPT = f"""You are a cute and friendly VTuber. Your responses should be:
+1. Natural and conversational
+2. Show personality and emotion
+3. Engage with viewers
+4. Keep responses concise (1-2 sentences)
+5. Use appropriate expressions and motions
+
+Reply in plain text, not JSON.
+Start a sentence with an expression tag when your emotion changes: {", ".join(f"[{e}]" for e in EXPRESSIONS)}.
+Put a motion tag before the sentence it goes with: {", ".join(f"<{m}/>" for m in MOTIONS)}.
+Example: <wave/>[happy] Chào bạn nha! [surprised] Bạn đến sớm thế?
+"""
+
+ERROR_RESPONSE = {
+    "type": "audio-and-expression",
+    "text": "Xin lỗi, có lỗi xảy ra rồi ạ",
+    "actions": {
+        "expression": "sad",
+        "motion": "shake"
+    }
+}
+
+
+class SimpleAgent:
+    """Simple agent that handles chat with OpenAI"""
+    def __init__(
+        self,
+        stream: bool = False,
+        model: str = "gpt-3.5-turbo",
+        provider: str = "openai",
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        client_pool: Optional[LLMClientPool] = None,
+        segment_language: Optional[str] = None,
+        flush_policy: Optional[AdaptiveFlushPolicy] = None,
+    ):
+        """
+        Initialize OpenAI client
+
+        Args:
+            stream: Stream the completion token by token and yield each
+                sentence as soon as it is complete, instead of waiting for the
+                whole JSON reply
+            model: Chat model to use
+            provider: Provider name used for the per-provider concurrency limit
+            base_url: OpenAI compatible endpoint. Defaults to the OpenAI API.
+            api_key: API key. Defaults to the OPENAI_API_KEY environment variable.
+            client_pool: Pool providing the shared async client. Defaults to
+                the process-wide pool.
+            segment_language: Language used to split streamed replies into
+                sentences. Detected once per reply if None.
+            flush_policy: Policy adapting the streamed sentence chunks to the
+                TTS backlog
+        """
+        self.stream = stream
+        self.segment_language = segment_language
+        self.flush_policy = flush_policy
+        self.model = model
+        self.provider = provider
+        self.client_pool = client_pool or LLMClientPool.get_shared()
+        self.client = self.client_pool.get_client(provider, base_url, api_key)
+        logger.info(f"Initialized SimpleAgent (stream={stream})")
+
+    async def _call_openai(self, messages):
+        """Call OpenAI API"""
+        try:
+            async with self.client_pool.limit(self.provider):
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=800,
+                    top_p=0.95,
+                    frequency_penalty=0,
+                    presence_penalty=0
+                )
+            return response
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise
+
+    @staticmethod
+    def _format_input(user_input: str) -> str:
+        """Turn a "username: message" chat line into the prompt for the LLM"""
+        try:
+            username, message = user_input.split(":", 1)
+            return f"Người xem '{username.strip()}' nhắn: {message.strip()}"
+        except ValueError:
+            logger.warning("Input not in username:message format, using as is")
+            return user_input
+
+    async def _stream_tokens(self, messages) -> AsyncIterator[str]:
+        """
+        Stream the completion of the async OpenAI client token by token.
+        The response is closed when the stream is abandoned or cancelled, so
+        an interrupted reply stops the upstream generation.
+        """
+        async with self.client_pool.limit(self.provider):
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=800,
+                top_p=0.95,
+                frequency_penalty=0,
+                presence_penalty=0,
+                stream=True,
+            )
+            metrics = get_metrics()
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        metrics.mark("llm_first_token", once=True)
+                        yield token
+                metrics.mark("llm_complete")
+            finally:
+                await stream.close()
+
+    async def _chat_stream(self, formatted_input: str) -> AsyncIterator[dict]:
+        """
+        Yield one payload per sentence while the completion is still streaming.
+
+        Motion tags (<wave/>) and expression tags ([happy]) are parsed as the
+        sentences come out of SentenceDivider and apply to the sentence that
+        follows them. The first sentence always carries full actions.
+        """
+        divider = SentenceDivider(
+            valid_tags=["think"] + MOTIONS,
+            language=self.segment_language,
+            flush_policy=self.flush_policy,
+        )
+        tokens = self._stream_tokens(
+            [
+                {"role": "system", "content": STREAMING_SYSTEM_PROMPT},
+                {"role": "user", "content": formatted_input},
+            ]
+        )
+        actions = {}
+        is_first = True
+
+        async for sentence in divider.process_stream(tokens):
+            tag = sentence.tags[0] if sentence.tags else None
+            if tag and tag.state == TagState.SELF_CLOSING and tag.name in MOTIONS:
+                actions["motion"] = tag.name
+                continue
+            if tag and tag.state in (TagState.START, TagState.END):
+                continue
+
+            expressions = EXPRESSION_TAG_PATTERN.findall(sentence.text)
+            if expressions:
+                actions["expression"] = expressions[-1].lower()
+            text = EXPRESSION_TAG_PATTERN.sub("", sentence.text).strip()
+            if not text:
+                continue
+
+            if is_first:
+                actions = {"expression": "happy", "motion": "idle", **actions}
+                is_first = False
+            is_thought = any(t.state == TagState.INSIDE for t in sentence.tags)
+
+            yield {
+                "type": "audio-and-expression",
+                "text": text,
+                "tts_text": "" if is_thought else text,
+                "actions": actions or None,
+            }
+            actions = {}
+
+        logger.info(f"Got streamed response: {divider.complete_response}")
+
+    async def chat(self, user_input: str):
+        """Chat with OpenAI and return response with actions"""
+        try:
+            logger.info(f"Processing chat input: {user_input}")
+
+            formatted_input = self._format_input(user_input)
+
+            if self.stream:
+                async for sentence in self._chat_stream(formatted_input):
+                    yield sentence
+                return
+
+            response = await self._call_openai(
+                [
+                    {
+                        "role": "system",
+                        "content": SYSTEM_PROMPT
+                    },
+                    {"role": "user", "content": formatted_input}
+                ]
+            )
+            # The whole reply comes at once
+            get_metrics().mark("llm_first_token")
+            get_metrics().mark("llm_complete")
+
+            # Parse OpenAI response
+            content = json.loads(response.choices[0].message.content)
+            logger.info(f"Got response: {content}")
+
+            # Format response for frontend
+            response_payload = {
+                "type": "audio-and-expression",
+                "text": content["text"],
+                "actions": {
+                    "expression": content["expression"],
+                    "motion": content["motion"]
+                }
+            }
+            logger.debug(f"Formatted response payload: {response_payload}")
+
+            yield response_payload
+
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            yield dict(ERROR_RESPONSE)
+
+    def handle_interrupt(self, heard_response: str) -> None:
+        """
+        Called when a reply is interrupted. Every chat call is independent,
+        there is no memory to amend, so the heard part is only logged.
+        """
+        logger.info(f"Reply interrupted, heard: {heard_response}")
+
+    def set_memory_from_history(self, **kwargs):
+        """Required by interface"""
+        pass
+
+
+class AgentFactory:
+    """Creates the conversation agents. All agents share the process-wide
+    LLM client pool, so connections and concurrency limits are shared too."""
+
+    @staticmethod
+    def create_agent(
+        stream: bool = True,
+        model: str = "gpt-3.5-turbo",
+        provider: str = "openai",
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        client_pool: Optional[LLMClientPool] = None,
+        segment_language: Optional[str] = None,
+        flush_policy: Optional[AdaptiveFlushPolicy] = None,
+    ) -> SimpleAgent:
+        """
+        Create an agent backed by the shared async LLM client pool
+
+        Args:
+            stream: Use the token-streaming chat mode
+            model: Chat model to use
+            provider: Provider name used for the per-provider concurrency limit
+            base_url: OpenAI compatible endpoint. Defaults to the OpenAI API.
+            api_key: API key. Defaults to the OPENAI_API_KEY environment variable.
+            client_pool: Pool to use instead of the process-wide one
+            segment_language: Language used to split streamed replies into
+                sentences. Detected once per reply if None.
+            flush_policy: Policy adapting the streamed sentence chunks to the
+                TTS backlog
+
+        Returns:
+            SimpleAgent: The agent
+        """
+        return SimpleAgent(
+            stream=stream,
+            model=model,
+            provider=provider,
+            base_url=base_url,
+            api_key=api_key,
+            client_pool=client_pool or LLMClientPool.get_shared(),
+            segment_language=segment_language,
+            flush_policy=flush_policy,
+        )
@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from loguru import logger
+from openai import AsyncOpenAI
+
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_PROVIDER_LIMIT = 8
+
+
+class LLMClientPool:
+    """
+    Process-wide pool of async LLM clients shared by every agent and connection.
+
+    All clients share one keep-alive `httpx.AsyncClient`, so HTTP connections
+    to the providers are reused across sessions. Requests are admitted through
+    a global in-flight semaphore and a per-provider semaphore, so many
+    concurrent WebSocket sessions scale on the event loop without threads.
+    """
+
+    _shared: Optional["LLMClientPool"] = None
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_provider_limit: int = DEFAULT_PROVIDER_LIMIT,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ):
+        """
+        Args:
+            max_in_flight: Maximum concurrent LLM requests across all providers
+            provider_limits: Maximum concurrent requests per provider name
+            default_provider_limit: Limit for providers not in provider_limits
+            max_connections: Maximum open HTTP connections
+            max_keepalive_connections: Idle connections kept alive for reuse
+            keepalive_expiry: Seconds an idle connection is kept alive
+        """
+        self.max_in_flight = max_in_flight
+        self.provider_limits = dict(provider_limits or {})
+        self.default_provider_limit = default_provider_limit
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, Optional[str], Optional[str]], AsyncOpenAI] = {}
+        # Semaphores are created lazily so they bind to the running loop
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight = 0
+
+    @classmethod
+    def get_shared(cls) -> "LLMClientPool":
+        """Get the process-wide pool, creating it with defaults if needed"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def configure(cls, **kwargs) -> "LLMClientPool":
+        """
+        Replace the process-wide pool with one built from kwargs.
+        Call before agents are created. Clients of the old pool stay usable
+        until they are closed.
+        """
+        cls._shared = cls(**kwargs)
+        logger.info(f"Configured LLM client pool: {kwargs}")
+        return cls._shared
+
+    def get_client(
+        self,
+        provider: str = "openai",
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> AsyncOpenAI:
+        """
+        Get the async client for a provider endpoint, creating it on first use.
+        Clients are cached per (provider, base_url, api_key).
+        """
+        key = (provider, base_url, api_key)
+        client = self._clients.get(key)
+        if client is None:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = httpx.AsyncClient(limits=self._limits)
+            kwargs = {"http_client": self._http_client}
+            if base_url:
+                kwargs["base_url"] = base_url
+            if api_key:
+                kwargs["api_key"] = api_key
+            client = AsyncOpenAI(**kwargs)
+            self._clients[key] = client
+            logger.info(f"Created pooled LLM client for provider: {provider}")
+        return client
+
+    def _provider_semaphore(self, provider: str) -> asyncio.Semaphore:
+        semaphore = self._provider_semaphores.get(provider)
+        if semaphore is None:
+            limit = self.provider_limits.get(provider, self.default_provider_limit)
+            semaphore = asyncio.Semaphore(limit)
+            self._provider_semaphores[provider] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, provider: str = "openai") -> AsyncIterator[None]:
+        """
+        Hold an in-flight slot for the provider for the duration of a request,
+        including the whole stream for streaming completions.
+        """
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._global_semaphore:
+            async with self._provider_semaphore(provider):
+                self.in_flight += 1
+                try:
+                    yield
+                finally:
+                    self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and forget the cached clients"""
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
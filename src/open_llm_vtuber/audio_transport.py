@@ -0,0 +1,142 @@
+import json
+import base64
+import struct
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from .metrics import get_metrics
+from .client_sender import FRAME_AUDIO, FRAME_AUDIO_CHUNK, FRAME_SENTENCE
+
+# Binary audio frames start with the big-endian sequence id of the header
+# frame they belong to, followed by the raw audio bytes.
+SEQ_PREFIX = struct.Struct(">I")
+
+TRANSPORT_JSON = "json"
+TRANSPORT_BINARY = "binary"
+
+
+class AudioTransport:
+    """
+    Sends audio payloads to a single client in the wire format negotiated on
+    the `/client-ws` endpoint.
+
+    - json (default, text-only clients): the audio is base64-encoded into the
+      `audio` field of a single JSON text frame.
+    - binary: a small JSON header frame (the payload without `audio`, plus
+      `seq` and `audio_bytes`) followed by the raw audio as binary frames.
+      Every binary frame is prefixed with the 4-byte big-endian `seq`, so the
+      client can match audio to its header.
+
+    Frames are sent with their kind (see client_sender), so the send queue
+    of a slow client knows which frames it may drop. The binary audio of a
+    header frame is sent with the header's kind, so both go or neither.
+    """
+
+    def __init__(
+        self,
+        send_text: Callable[[str, str], Awaitable[None]],
+        send_bytes: Optional[Callable[[bytes, str], Awaitable[None]]] = None,
+        mode: str = TRANSPORT_JSON,
+    ):
+        """
+        Args:
+            send_text: Coroutine function sending a text frame of a given kind
+            send_bytes: Coroutine function sending a binary frame of a given
+                kind. Required for
+                the binary mode.
+            mode: "json" or "binary"
+        """
+        if mode not in (TRANSPORT_JSON, TRANSPORT_BINARY):
+            raise ValueError(f"Unknown audio transport mode: {mode}")
+        if mode == TRANSPORT_BINARY and send_bytes is None:
+            raise ValueError("Binary audio transport requires send_bytes")
+        self.send_text = send_text
+        self.send_bytes = send_bytes
+        self.mode = mode
+        self._seq = 0
+
+    @property
+    def binary(self) -> bool:
+        """Whether audio goes out as binary frames"""
+        return self.mode == TRANSPORT_BINARY
+
+    def next_seq(self) -> int:
+        """Reserve a sequence id for the next audio payload"""
+        self._seq = (self._seq + 1) % (1 << 32)
+        return self._seq
+
+    async def send_json(self, payload: dict, kind: str = FRAME_AUDIO) -> None:
+        """Send a payload without audio, e.g. a stream end, as a JSON text frame"""
+        await self.send_text(json.dumps(payload), kind)
+
+    async def send_audio(
+        self,
+        payload: dict,
+        audio: bytes | None,
+        seq: int | None = None,
+        kind: str = FRAME_SENTENCE,
+    ) -> int:
+        """
+        Send a payload together with its audio.
+
+        Args:
+            payload: Frame fields (type, text, actions, volumes...) without audio
+            audio: The encoded audio, or None for a silent payload
+            seq: Sequence id to use. A new one is reserved when omitted.
+            kind: FRAME_SENTENCE for a whole sentence, FRAME_AUDIO for the
+                header of a stream, FRAME_AUDIO_CHUNK for its intermediate
+                chunks
+
+        Returns:
+            int: The sequence id of the payload
+        """
+        seq = self.next_seq() if seq is None else seq
+
+        if not self.binary:
+            with get_metrics().span("payload_encode", timeline=False):
+                frame = dict(payload)
+                frame["audio"] = base64.b64encode(audio).decode() if audio else None
+                text = json.dumps(frame)
+            await self.send_text(text, kind)
+            return seq
+
+        with get_metrics().span("payload_encode", timeline=False):
+            header = dict(payload)
+            header["seq"] = seq
+            header["audio_bytes"] = len(audio) if audio else 0
+            text = json.dumps(header)
+        await self.send_text(text, kind)
+        if audio:
+            await self.send_audio_data(seq, audio, kind)
+        return seq
+
+    async def send_audio_data(
+        self, seq: int, audio: bytes, kind: str = FRAME_AUDIO_CHUNK
+    ) -> None:
+        """
+        Send more raw audio for an already announced sequence id.
+        Only valid in binary mode. `kind` is the kind of the header when the
+        audio is the one it announces.
+        """
+        if not self.binary:
+            raise RuntimeError("send_audio_data requires the binary transport")
+        await self.send_bytes(SEQ_PREFIX.pack(seq) + audio, kind)
+
+
+def negotiate_transport(
+    request: dict,
+    send_text: Callable[[str, str], Awaitable[None]],
+    send_bytes: Optional[Callable[[bytes, str], Awaitable[None]]] = None,
+) -> AudioTransport:
+    """
+    Build the transport requested by the client in its `frontend-ready`
+    message (`"audio_transport": "binary"`), falling back to json.
+    """
+    mode = request.get("audio_transport", TRANSPORT_JSON)
+    if mode != TRANSPORT_BINARY or send_bytes is None:
+        if mode not in (TRANSPORT_JSON, TRANSPORT_BINARY):
+            logger.warning(f"Unsupported audio transport {mode}, using json")
+        mode = TRANSPORT_JSON
+    logger.info(f"Audio transport negotiated: {mode}")
+    return AudioTransport(send_text, send_bytes, mode)
@@ -0,0 +1,316 @@
+import time
+import asyncio
+import itertools
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+
+from loguru import logger
+
+from .metrics import get_metrics
+
+# What to do when the audio backlog of a client exceeds its byte budget
+POLICY_DROP_OLDEST = "drop_oldest"  # Drop the oldest audio until it fits
+POLICY_SKIP_TO_LATEST = "skip_to_latest"  # Drop all queued audio, keep the new frame
+POLICY_DISCONNECT = "disconnect"  # Close the client
+SLOW_CLIENT_POLICIES = (POLICY_DROP_OLDEST, POLICY_SKIP_TO_LATEST, POLICY_DISCONNECT)
+
+DEFAULT_SEND_BUDGET = 2 * 1024 * 1024
+
+# Kinds of frames, given by the code producing them
+FRAME_CONTROL = "control"  # Control and state frames, sent before the stream
+FRAME_MARKER = "marker"  # conversation-chain-start/end, in order with the audio
+FRAME_AUDIO = "audio"  # Stream headers and ends, never dropped
+FRAME_SENTENCE = "sentence"  # Whole sentences with their audio, dropped last
+FRAME_AUDIO_CHUNK = "audio-chunk"  # Intermediate audio chunks, dropped first
+FRAME_KINDS = (FRAME_CONTROL, FRAME_MARKER, FRAME_AUDIO, FRAME_SENTENCE, FRAME_AUDIO_CHUNK)
+_AUDIO_KINDS = (FRAME_AUDIO, FRAME_SENTENCE, FRAME_AUDIO_CHUNK)
+
+_LATENCY_SAMPLES = 256
+
+
+class ClientSender:
+    """
+    Outbound queue and writer task of one WebSocket client.
+
+    `send_text` and `send_bytes` only queue the frame, so a slow client never
+    holds up the broadcast that feeds every client. The producer tells the
+    kind of each text frame, which picks its lane:
+
+    - control: control and state frames (stop-audio, model and config
+      switches, errors...), sent before anything else.
+    - stream: audio frames and the conversation-chain-start/end markers
+      around them, sent in order. The queued bytes of this lane are bounded
+      by `budget`. When a new frame does not fit, `policy` decides: drop the
+      oldest audio, drop all queued audio (skip to the latest), or
+      disconnect the client.
+
+    Intermediate audio chunks are dropped first. If that is not enough,
+    whole sentences (`audio-and-expression` frames) are dropped, oldest
+    first. Chain markers, stream headers and stream ends are never dropped,
+    so a streaming client still sees every stream start and end; when only
+    those are left and the budget is still exceeded, the client is
+    disconnected.
+
+    A binary frame sent with a kind other than FRAME_AUDIO_CHUNK carries the
+    audio of the text frame queued just before it (a binary transport
+    header). The two are dropped or kept together, so a client is never told
+    about audio bytes that do not come.
+
+    After a send error or a disconnect, `send_text` and `send_bytes` raise
+    ConnectionError, which makes the broadcast drop the subscriber.
+    """
+
+    def __init__(
+        self,
+        send_text: Callable[[str], Awaitable[None]],
+        send_bytes: Optional[Callable[[bytes], Awaitable[None]]] = None,
+        budget: int = DEFAULT_SEND_BUDGET,
+        policy: str = POLICY_DROP_OLDEST,
+        name: str = "",
+    ):
+        """
+        Args:
+            send_text: Coroutine function sending a text frame on the socket
+            send_bytes: Coroutine function sending a binary frame on the socket
+            budget: Maximum bytes of queued stream frames
+            policy: "drop_oldest", "skip_to_latest" or "disconnect"
+            name: Client name used in logs
+        """
+        if policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy: {policy}")
+        self._send_text = send_text
+        self._send_bytes = send_bytes
+        self.budget = budget
+        self.policy = policy
+        self.name = name
+
+        # (frame, kind, unit, queued at, metrics turn), binary frames are
+        # bytes. Frames of a unit (a header and its audio) are dropped together.
+        self._control: Deque[Tuple] = deque()
+        self._stream: Deque[Tuple] = deque()
+        self._stream_bytes = 0
+        self._units = itertools.count()
+        self._last_unit: Optional[int] = None
+        # Unit whose first frame went out: its other frames must follow
+        self._sending_unit: Optional[int] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.error: Optional[BaseException] = None
+        self.reset_stats()
+        self._writer = asyncio.create_task(self._write())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ==== producers
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ConnectionError(f"Client {self.name} is disconnected")
+
+    async def send_text(self, text: str, kind: str = FRAME_CONTROL) -> None:
+        """
+        Args:
+            text: The frame
+            kind: One of FRAME_KINDS
+        """
+        self._check_open()
+        if kind not in FRAME_KINDS:
+            raise ValueError(f"Unknown frame kind: {kind}")
+        turn = get_metrics().current_turn()
+        if kind == FRAME_CONTROL:
+            self._control.append((text, kind, None, time.monotonic(), turn))
+            self._ready.set()
+            return
+        unit = next(self._units)
+        self._push_stream((text, kind, unit, time.monotonic(), turn), len(text))
+        self._last_unit = unit
+
+    async def send_bytes(self, data: bytes, kind: str = FRAME_AUDIO_CHUNK) -> None:
+        """
+        Args:
+            data: The frame
+            kind: FRAME_AUDIO_CHUNK for audio of its own, or the kind of the
+                text frame queued just before, whose audio it carries
+        """
+        self._check_open()
+        if self._send_bytes is None:
+            raise RuntimeError("Binary frames require send_bytes")
+        if kind not in _AUDIO_KINDS:
+            raise ValueError(f"Not an audio frame kind: {kind}")
+        attached = kind != FRAME_AUDIO_CHUNK and self._last_unit is not None
+        unit = self._last_unit if attached else next(self._units)
+        turn = get_metrics().current_turn()
+        self._push_stream((data, kind, unit, time.monotonic(), turn), len(data))
+        if not attached:
+            self._last_unit = unit
+
+    def _disconnect(self) -> None:
+        self._drops["disconnect"] += 1
+        logger.warning(
+            f"Disconnecting slow client {self.name}: {self._stream_bytes} bytes queued"
+        )
+        self.close()
+        raise ConnectionError(f"Client {self.name} is too slow")
+
+    def _push_stream(self, entry: Tuple, size: int) -> None:
+        if self._stream_bytes + size > self.budget and self._stream:
+            if self.policy == POLICY_DISCONNECT:
+                self._disconnect()
+            # Never split the unit the new frame belongs to
+            for kind in (FRAME_AUDIO_CHUNK, FRAME_SENTENCE):
+                self._shed(size, kind, keep=entry[2])
+                if self._stream_bytes + size <= self.budget:
+                    break
+            else:
+                if self._stream:
+                    # Only frames that cannot be dropped are left
+                    self._disconnect()
+        self._stream.append(entry)
+        self._stream_bytes += size
+        self._max_bytes = max(self._max_bytes, self._stream_bytes)
+        self._max_frames = max(self._max_frames, len(self._stream))
+        self._ready.set()
+
+    def _shed(self, size: int, kind: str, keep: int) -> None:
+        """
+        Drop queued units of a kind to make room for `size` bytes: the oldest
+        ones until it fits, or all of them when skipping to the latest
+        """
+        skip_all = self.policy == POLICY_SKIP_TO_LATEST
+        protected = (keep, self._sending_unit)
+        dropped = set()
+        kept = deque()
+        for entry in self._stream:
+            frame, frame_kind, unit, _, _ = entry
+            if unit not in dropped and (
+                frame_kind != kind
+                or unit in protected
+                or not (skip_all or self._stream_bytes + size > self.budget)
+            ):
+                kept.append(entry)
+                continue
+            dropped.add(unit)
+            self._stream_bytes -= len(frame)
+            self._drops[self.policy] += 1
+            self._dropped_bytes += len(frame)
+        self._stream = kept
+
+    # ==== writer task
+
+    def _next(self) -> Optional[Tuple]:
+        if self._control:
+            return self._control.popleft()
+        if self._stream:
+            entry = self._stream.popleft()
+            self._stream_bytes -= len(entry[0])
+            self._sending_unit = entry[2]
+            return entry
+        return None
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                entry = self._next()
+                if entry is None:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                frame, kind, _, queued, turn = entry
+                started = time.monotonic()
+                if isinstance(frame, str):
+                    await self._send_text(frame)
+                else:
+                    await self._send_bytes(frame)
+                done = time.monotonic()
+                self._sent += 1
+                self._sent_bytes += len(frame)
+                self._send_times.append(done - started)
+                self._latencies.append(done - queued)
+                metrics = get_metrics()
+                metrics.observe("ws_send", done - started, turn, timeline=False)
+                if kind in _AUDIO_KINDS:
+                    metrics.mark("first_audio_sent", turn, once=True)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Send to client {self.name} failed: {e}")
+            self.error = e
+            self._closed = True
+            self._discard()
+
+    def drop_audio(self) -> int:
+        """
+        Drop the queued audio frames, e.g. when the reply is interrupted.
+        Chain markers are kept.
+
+        Returns:
+            int: The number of dropped frames
+        """
+        kept = deque()
+        dropped = 0
+        for entry in self._stream:
+            frame, kind, _, _, _ = entry
+            if kind == FRAME_MARKER:
+                kept.append(entry)
+                continue
+            self._stream_bytes -= len(frame)
+            self._dropped_bytes += len(frame)
+            dropped += 1
+        self._stream = kept
+        self._drops["interrupted"] += dropped
+        return dropped
+
+    def _discard(self) -> None:
+        self._control.clear()
+        self._stream.clear()
+        self._stream_bytes = 0
+
+    def close(self) -> None:
+        """Stop the writer and discard the queued frames"""
+        self._closed = True
+        self._discard()
+        if not self._writer.done():
+            self._writer.cancel()
+
+    # ==== metrics
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> dict:
+        """
+        Queue depth, drops per policy and latency of the recent frames:
+        `latency` from queueing to sent, `send_time` spent in the socket send
+        """
+        latencies = self._latencies
+        return {
+            "depth": len(self._control) + len(self._stream),
+            "queued_bytes": self._stream_bytes,
+            "max_frames": self._max_frames,
+            "max_bytes": self._max_bytes,
+            "sent": self._sent,
+            "sent_bytes": self._sent_bytes,
+            "drops": dict(self._drops),
+            "dropped_bytes": self._dropped_bytes,
+            "avg_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p95_latency": self._percentile(latencies, 0.95),
+            "max_latency": max(latencies, default=0.0),
+            "p95_send_time": self._percentile(self._send_times, 0.95),
+        }
+
+    def reset_stats(self) -> None:
+        self._sent = 0
+        self._sent_bytes = 0
+        self._max_frames = 0
+        self._max_bytes = 0
+        self._dropped_bytes = 0
+        self._drops = {policy: 0 for policy in SLOW_CLIENT_POLICIES}
+        self._drops["interrupted"] = 0
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._send_times: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
@@ -29,6 +29,7 @@ class BasicMemoryAgentConfig(I18nMixin, BaseModel):
 
     faster_first_response: Optional[bool] = Field(True, alias="faster_first_response")
     segment_method: Literal["regex", "pysbd"] = Field("pysbd", alias="segment_method")
+    segment_language: Optional[str] = Field(None, alias="segment_language")
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         "llm_provider": Description(
             en="LLM provider to use for this agent",
@@ -42,6 +43,10 @@ class BasicMemoryAgentConfig(I18nMixin, BaseModel):
             en="Method for segmenting sentences: 'regex' or 'pysbd' (default: 'pysbd')",
             zh="分割句子的方法：'regex' 或 'pysbd'（默认：'pysbd'）",
         ),
+        "segment_language": Description(
+            en="Language code used by pysbd to segment sentences, e.g. 'en'. Detected once per response if not set (default: None)",
+            zh="pysbd 分割句子使用的语言代码，如 'en'。未设置时每次回复检测一次（默认：None）",
+        ),
     }
 
 
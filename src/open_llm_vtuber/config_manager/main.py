@@ -1,6 +1,6 @@
 # config_manager/main.py
 from pydantic import BaseModel, Field
-from typing import Dict, ClassVar
+from typing import Dict, ClassVar, Optional
 
 from .system import SystemConfig
 from .character import CharacterConfig
@@ -18,7 +18,7 @@ class Config(I18nMixin, BaseModel):
 
     system_config: SystemConfig = Field(default=None, alias="system_config")
     character_config: CharacterConfig = Field(..., alias="character_config")
-    youtube_api: YouTubeConfig
+    youtube_api: Optional[YouTubeConfig] = None
 
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         "system_config": Description(
@@ -27,4 +27,8 @@ class Config(I18nMixin, BaseModel):
         "character_config": Description(
             en="Character configuration settings", zh="角色配置设置"
         ),
+        "youtube_api": Description(
+            en="YouTube Data API credentials, not needed to read the live chat",
+            zh="YouTube Data API 凭据，读取直播聊天时不需要",
+        ),
     }
@@ -1,6 +1,6 @@
 # config_manager/system.py
 from pydantic import Field, model_validator
-from typing import Dict, ClassVar
+from typing import Dict, ClassVar, Literal
 from .i18n import I18nMixin, Description
 
 
@@ -12,6 +12,10 @@ class SystemConfig(I18nMixin):
     port: int = Field(..., alias="port")
     config_alts_dir: str = Field(..., alias="config_alts_dir")
     tool_prompts: Dict[str, str] = Field(..., alias="tool_prompts")
+    client_send_budget: int = Field(2 * 1024 * 1024, alias="client_send_budget")
+    slow_client_policy: Literal["drop_oldest", "skip_to_latest", "disconnect"] = Field(
+        "drop_oldest", alias="slow_client_policy"
+    )
 
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         "conf_version": Description(en="Configuration version", zh="配置文件版本"),
@@ -24,6 +28,14 @@ class SystemConfig(I18nMixin):
             en="Tool prompts to be inserted into persona prompt",
             zh="要插入到角色提示词中的工具提示词",
         ),
+        "client_send_budget": Description(
+            en="Maximum bytes of audio queued for a client before the slow client policy applies",
+            zh="每个客户端排队音频的最大字节数，超出后应用慢客户端策略",
+        ),
+        "slow_client_policy": Description(
+            en="What to do with a client that cannot keep up: drop_oldest, skip_to_latest or disconnect",
+            zh="客户端跟不上时的处理方式：drop_oldest、skip_to_latest 或 disconnect",
+        ),
     }
 
     @model_validator(mode="after")
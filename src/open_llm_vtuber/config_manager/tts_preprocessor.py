@@ -11,6 +11,8 @@ class DeepLXConfig(I18nMixin):
 
     deeplx_target_lang: str = Field(..., alias="deeplx_target_lang")
     deeplx_api_endpoint: str = Field(..., alias="deeplx_api_endpoint")
+    deeplx_timeout: float = Field(5.0, alias="deeplx_timeout")
+    deeplx_async: bool = Field(True, alias="deeplx_async")
 
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         "deeplx_target_lang": Description(
@@ -20,6 +22,14 @@ class DeepLXConfig(I18nMixin):
         "deeplx_api_endpoint": Description(
             en="API endpoint URL for DeepLX service", zh="DeepLX 服务的 API 端点 URL"
         ),
+        "deeplx_timeout": Description(
+            en="HTTP timeout of one DeepLX request, in seconds",
+            zh="单个 DeepLX 请求的 HTTP 超时时间（秒）",
+        ),
+        "deeplx_async": Description(
+            en="Send requests with a non-blocking HTTP client instead of a worker thread",
+            zh="使用非阻塞 HTTP 客户端发送请求，而不是工作线程",
+        ),
     }
 
 
@@ -57,9 +67,12 @@ class TranslatorConfig(I18nMixin):
     """Configuration for translation services."""
 
     translate_audio: bool = Field(..., alias="translate_audio")
-    translate_provider: Literal["deeplx", "tencent"] = Field(
+    translate_provider: Literal["deeplx", "tencent", "stub"] = Field(
         ..., alias="translate_provider"
     )
+    translate_cache_size: int = Field(512, alias="translate_cache_size")
+    translate_timeout: float = Field(3.0, alias="translate_timeout")
+    translate_batch_size: int = Field(8, alias="translate_batch_size")
     deeplx: Optional[DeepLXConfig] = Field(None, alias="deeplx")
     tencent: Optional[TencentConfig] = Field(None, alias="tencent")
 
@@ -69,7 +82,20 @@ class TranslatorConfig(I18nMixin):
             zh="启用音频翻译（需要部署 DeepLX）",
         ),
         "translate_provider": Description(
-            en="Translation service provider to use", zh="要使用的翻译服务提供者"
+            en="Translation service provider to use ('stub' only marks the text, for testing)",
+            zh="要使用的翻译服务提供者（'stub' 仅标记文本，用于测试）",
+        ),
+        "translate_cache_size": Description(
+            en="Number of translated sentences kept in memory",
+            zh="内存中缓存的已翻译句子数量",
+        ),
+        "translate_timeout": Description(
+            en="Seconds to wait for a translation before speaking the original text",
+            zh="等待翻译的秒数，超时后朗读原文",
+        ),
+        "translate_batch_size": Description(
+            en="Maximum number of ready sentences translated together",
+            zh="一次一起翻译的已就绪句子的最大数量",
         ),
         "deeplx": Description(
             en="Configuration for DeepLX translation service", zh="DeepLX 翻译服务配置"
@@ -1,71 +1,247 @@
-import asyncio
 import json
-import uuid
-import os
+import asyncio
+from typing import AsyncIterator, Callable
 from loguru import logger
-import base64
-from edge_tts import Communicate
+
+from .tts.edge_tts import EdgeTTSEngine
+from .tts.tts_pipeline import TTSPipeline, TTSJob, DEFAULT_LOOKAHEAD
+from .audio_transport import AudioTransport
+from .client_sender import FRAME_AUDIO, FRAME_AUDIO_CHUNK, FRAME_MARKER
+from .utils.sentence_divider import SentenceDivider, TagState
+from .utils.flush_policy import AdaptiveFlushPolicy
+from .translate.translation_stage import TranslationStage
+from .metrics import get_metrics
+
+# Minimum number of bytes gathered before an intermediate audio chunk is sent.
+# The first chunk is always sent as soon as it arrives so playback can start.
+STREAM_CHUNK_BYTES = 8192
+
+
+# Slice length of the volume envelopes computed by the TTS cache
+VOLUME_SLICE_MS = 20
+
+DEFAULT_ACTIONS = {"expression": "happy", "motion": "idle"}
+
+
+async def send_audio_stream(
+    text: str,
+    actions: dict,
+    chunks: AsyncIterator[bytes],
+    audio_transport: AudioTransport,
+    chunk_bytes: int = STREAM_CHUNK_BYTES,
+    volumes: Callable[[], list | None] | None = None,
+) -> int:
+    """
+    Forward synthesized audio to the frontend as incremental `audio-chunk`
+    frames while the TTS engine is still producing it.
+
+    The first frame carries the text and actions and is sent on the first
+    chunk. With the binary transport the following chunks are bare binary
+    frames tagged with the same sequence id. A final frame with `is_final`
+    set and no audio closes the stream. It carries the volume envelope when
+    the `volumes` callback can provide one once the audio is complete.
+
+    Returns:
+        int: Total number of audio bytes sent
+    """
+    index = 0
+    total_bytes = 0
+    seq = audio_transport.next_seq()
+    pending = bytearray()
+
+    async def flush():
+        nonlocal index
+        if index > 0 and audio_transport.binary:
+            await audio_transport.send_audio_data(seq, bytes(pending))
+        else:
+            frame = {"type": "audio-chunk", "index": index, "is_final": False}
+            if index == 0:
+                frame["text"] = text
+                frame["actions"] = actions
+            kind = FRAME_AUDIO if index == 0 else FRAME_AUDIO_CHUNK
+            await audio_transport.send_audio(frame, bytes(pending), seq, kind)
+        index += 1
+        pending.clear()
+
+    async for chunk in chunks:
+        pending += chunk
+        total_bytes += len(chunk)
+        if index == 0 or len(pending) >= chunk_bytes:
+            await flush()
+
+    if pending or index == 0:
+        # Also announces display-only sentences that produced no audio
+        await flush()
+
+    final = {"type": "audio-chunk", "index": index, "is_final": True}
+    envelope = volumes() if volumes else None
+    if envelope:
+        final["volumes"] = envelope
+        final["slice_length"] = VOLUME_SLICE_MS
+    if audio_transport.binary:
+        final["seq"] = seq
+    else:
+        final["audio"] = None
+    await audio_transport.send_json(final)
+    return total_bytes
+
+
+async def split_sentences(
+    responses: AsyncIterator[dict],
+    flush_policy: AdaptiveFlushPolicy | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Split agent responses into sentences with SentenceDivider so each
+    sentence can be synthesized on its own.
+
+    The actions of a response go with its first sentence. Sentences inside
+    tags (e.g. <think>) are display-only and get no TTS text. Responses that
+    already carry `tts_text` come from a streaming agent that divides its
+    own output, and are passed through unchanged.
+
+    Args:
+        responses: Agent responses
+        flush_policy: Policy adapting the sentence chunks to the TTS backlog
+
+    Yields:
+        dict: `text`, `tts_text` and `actions` of one sentence
+    """
+    async for response in responses:
+        logger.info(f"Got agent response: {response}")
+        response_text = response.get("text", "")
+        if not response_text:
+            logger.warning("Empty response from agent")
+            continue
+
+        if "tts_text" in response:
+            get_metrics().mark("sentence_emitted")
+            yield {
+                "text": response_text,
+                "tts_text": response["tts_text"],
+                "actions": response.get("actions"),
+            }
+            continue
+
+        actions = response.get("actions", DEFAULT_ACTIONS)
+
+        async def tokens():
+            yield response_text
+
+        divider = SentenceDivider(flush_policy=flush_policy)
+        async for sentence in divider.process_stream(tokens()):
+            if not sentence.text:
+                continue
+            states = {tag.state for tag in sentence.tags}
+            if states & {TagState.START, TagState.END, TagState.SELF_CLOSING}:
+                # The tag itself is not spoken nor displayed
+                continue
+            get_metrics().mark("sentence_emitted")
+            yield {
+                "text": sentence.text,
+                "tts_text": sentence.text if states == {TagState.NONE} else "",
+                "actions": actions,
+            }
+            actions = None
+
 
 async def conversation_chain(
     user_input: str,
     agent_engine,
     websocket_send,
+    tts_engine=None,
+    stream_audio: bool = False,
+    audio_transport: AudioTransport | None = None,
+    tts_lookahead: int = DEFAULT_LOOKAHEAD,
+    flush_policy: AdaptiveFlushPolicy | None = None,
+    translation: TranslationStage | None = None,
+    spoken: list | None = None,
+    received: float | None = None,
 ):
     """Main conversation chain that handles:
     1. Agent response
-    2. TTS
+    2. TTS, pipelined per sentence
     3. Live2D animation
+
+    Sentence N+1 is synthesized while sentence N is being sent, so a
+    multi-sentence reply costs roughly the LLM time plus one TTS call.
+
+    Args:
+        user_input: Text to send to the agent
+        agent_engine: Agent producing responses with text and actions
+        websocket_send: Coroutine function sending a text frame of a given
+            kind (see client_sender) to the client
+        tts_engine: Engine used to synthesize speech. Defaults to edge-tts.
+        stream_audio: Forward audio as incremental `audio-chunk` frames instead
+            of one `audio-and-expression` frame per sentence
+        audio_transport: Wire format for audio. Defaults to base64-in-JSON
+            frames sent through websocket_send.
+        tts_lookahead: Sentences synthesized ahead of the one being sent
+        flush_policy: Policy adapting the sentence chunks to the TTS backlog.
+            Defaults to the agent's policy, if it has one.
+        translation: Stage translating the TTS text of each sentence.
+            Subtitles keep the original text.
+        spoken: List the text of each sentence is appended to once its audio
+            is sent, so the caller knows what was said if the chain is
+            cancelled
+        received: time.perf_counter() time the input was received, marked
+            as `chat_received` in the turn metrics
     """
-    audio_file = None
-    try:
-        logger.info(f"Processing input: {user_input}")
-        
-        # 1. Get response & actions from agent
-        async for response in agent_engine.chat(user_input):
-            logger.info(f"Got agent response: {response}")
-            
-            response_text = response.get("text", "")
-            if not response_text:
-                logger.warning("Empty response from agent")
-                continue
+    tts_engine = tts_engine or EdgeTTSEngine()
+    audio_transport = audio_transport or AudioTransport(websocket_send)
+    pipeline = TTSPipeline(tts_engine, max_lookahead=tts_lookahead)
+    flush_policy = flush_policy or getattr(agent_engine, "flush_policy", None)
+    if flush_policy:
+        flush_policy.attach(lambda: pipeline.backlog)
+    spoken = [] if spoken is None else spoken
+    metrics = get_metrics()
+    turn = metrics.start_turn(user_input)
+    if received is not None:
+        metrics.mark("chat_received", turn, at=received)
+    interrupted = False
 
-            # 2. Generate audio with edge-tts
-            try:
-                communicate = Communicate(response_text, "vi-VN-HoaiMyNeural")
-                audio_file = f"temp_{uuid.uuid4()}.wav"
-                logger.info(f"Generating audio to {audio_file}")
-                await communicate.save(audio_file)
-                
-                # 3. Convert audio to base64
-                with open(audio_file, "rb") as f:
-                    audio_base64 = base64.b64encode(f.read()).decode()
-                    logger.info("Audio converted to base64")
-
-                # 4. Send payload to frontend
+    async def send_sentence(job: TTSJob):
+        text = job.payload["text"]
+        actions = job.payload["actions"]
+        try:
+            if stream_audio:
+                sent_bytes = await send_audio_stream(
+                    text,
+                    actions,
+                    job.iter_chunks(),
+                    audio_transport,
+                    volumes=lambda: job.volumes,
+                )
+                logger.info(f"Streamed {sent_bytes} audio bytes for sentence {job.seq}, text length: {len(text)}")
+            else:
+                audio_bytes = await job.audio()
                 payload = {
                     "type": "audio-and-expression",
-                    "text": response_text,
-                    "audio": audio_base64,
-                    "actions": response.get("actions", {
-                        "expression": "happy",
-                        "motion": "idle"
-                    })
+                    "text": text,
+                    "actions": actions,
                 }
-                logger.info(f"Sending payload to frontend: {payload['type']}, text length: {len(response_text)}, audio length: {len(audio_base64)}")
-                await websocket_send(json.dumps(payload))
-                logger.info("Payload sent successfully")
+                if job.volumes:
+                    payload["volumes"] = job.volumes
+                    payload["slice_length"] = VOLUME_SLICE_MS
+                logger.info(f"Sending sentence {job.seq}: text length: {len(text)}, audio bytes: {len(audio_bytes)}")
+                await audio_transport.send_audio(payload, audio_bytes or None)
+            spoken.append(text)
+        except Exception as e:
+            logger.error(f"Error in audio generation/sending: {e}")
+            logger.exception(e)
 
-            except Exception as e:
-                logger.error(f"Error in audio generation/sending: {e}")
-                logger.exception(e)
-            finally:
-                # Cleanup temp audio file
-                if audio_file and os.path.exists(audio_file):
-                    os.remove(audio_file)
-                    logger.debug(f"Cleaned up temp file: {audio_file}")
- 
-        return response_text
+    try:
+        logger.info(f"Processing input: {user_input}")
+
+        # Get responses from the agent and synthesize them sentence by sentence
+        sentences = split_sentences(agent_engine.chat(user_input), flush_policy)
+        if translation:
+            sentences = translation.stream(sentences)
+        await pipeline.run(sentences, send_sentence)
+        return " ".join(spoken)
 
+    except asyncio.CancelledError:
+        interrupted = True
+        raise
     except Exception as e:
         logger.error(f"Error in conversation chain: {e}")
         logger.exception(e)
@@ -77,44 +253,143 @@ async def conversation_chain(
                 "actions": {"expression": "sad"},
                 "volumes": [],
                 "slice_length": 0
-            }))
+            }), FRAME_AUDIO)
         except:
             logger.error("Failed to send error message to frontend")
     finally:
+        metrics.end_turn(turn, interrupted)
         await websocket_send(json.dumps({
             "type": "control",
             "text": "conversation-chain-end"
-        }))
+        }), FRAME_MARKER)
         logger.info("Conversation chain completed")
 
+class TurnController:
+    """
+    Runs conversation chains one at a time and cancels the running one on
+    barge-in.
+
+    Cancelling the chain task aborts the streaming LLM request and the
+    pending TTS jobs of the TTS pipeline. The agent is then told what the
+    listeners heard: the text reported by the client, or else the sentences
+    whose audio was sent before the interruption.
+    """
+
+    def __init__(self, agent_engine):
+        self.agent_engine = agent_engine
+        self.task: asyncio.Task | None = None
+        self.spoken: list = []
+        self.interrupts = 0
+        self._heard: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def _notify_agent(self, heard: str) -> None:
+        agent_interrupt = getattr(self.agent_engine, "handle_interrupt", None)
+        if agent_interrupt:
+            agent_interrupt(heard)
+
+    async def run(self, user_input: str, **chain_kwargs) -> str | None:
+        """
+        Run conversation_chain for the input.
+
+        Returns:
+            The text that was said, or None if the turn was interrupted
+        """
+        self.spoken = []
+        self._heard = None
+        self.task = asyncio.create_task(
+            conversation_chain(
+                user_input=user_input,
+                agent_engine=self.agent_engine,
+                spoken=self.spoken,
+                **chain_kwargs,
+            )
+        )
+        try:
+            # Unlike awaiting the task, wait() does not cancel the chain when
+            # the caller itself is cancelled, so cancel it explicitly
+            await asyncio.wait({self.task})
+        except asyncio.CancelledError:
+            self.task.cancel()
+            raise
+        if not self.task.cancelled():
+            return self.task.result()
+
+        heard = self._heard if self._heard is not None else " ".join(self.spoken)
+        logger.info(f"Turn interrupted, heard: {heard}")
+        self._notify_agent(heard)
+        return None
+
+    def interrupt(self, heard: str | None = None) -> bool:
+        """
+        Cancel the running turn.
+
+        Args:
+            heard: Text the client played before it stopped. Without a running
+                turn, the agent is told right away: the generation was over
+                but the client was still playing it.
+
+        Returns:
+            bool: Whether a running turn was cancelled
+        """
+        if not self.running:
+            if heard is not None:
+                self._notify_agent(heard)
+            return False
+        self._heard = heard
+        self.interrupts += 1
+        self.task.cancel()
+        return True
+
+
 async def handle_youtube_chat(
     youtube_service,
     agent_engine,
     websocket_send,
+    tts_engine=None,
+    stream_audio: bool = False,
+    audio_transport: AudioTransport | None = None,
+    get_translation: Callable[[], TranslationStage | None] | None = None,
+    turns: TurnController | None = None,
 ):
-    """Handle YouTube chat messages"""
+    """
+    Handle YouTube chat messages. Each chat batch is answered in a turn of
+    `turns`, which can be interrupted without stopping the chat handler.
+
+    `get_translation` returns the current translation stage. It is read for
+    each message, so a stage replaced by a config switch applies to the next
+    turn.
+    """
     logger.info("Starting YouTube chat handler...")
+    turns = turns or TurnController(agent_engine)
     try:
         async for message in youtube_service.listen():
             if not youtube_service.is_active():
                 break
-                
+
             try:
                 await websocket_send(json.dumps({
                     "type": "control",
                     "text": "conversation-chain-start"
-                }))
-                
-                await conversation_chain(
-                    user_input=message,
-                    agent_engine=agent_engine,
-                    websocket_send=websocket_send
+                }), FRAME_MARKER)
+
+                await turns.run(
+                    message,
+                    received=getattr(youtube_service, "batch_received", None),
+                    websocket_send=websocket_send,
+                    tts_engine=tts_engine,
+                    stream_audio=stream_audio,
+                    audio_transport=audio_transport,
+                    translation=get_translation() if get_translation else None,
                 )
-                
+
             except Exception as e:
                 logger.error(f"Error processing message: {e}")
                 continue
-                
+
     except Exception as e:
         logger.error(f"YouTube chat handler error: {e}")
         youtube_service.stop()
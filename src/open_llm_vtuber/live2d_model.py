@@ -1,7 +1,153 @@
+import os
+import re
 import json
+import threading
+from typing import Dict, Optional, Tuple
+
 import chardet
 from loguru import logger
 
+# A possible `[emotion]` tag: a bracketed span without brackets inside
+_BRACKETED_SPAN = re.compile(r"\[([^\[\]]*)\]")
+
+def load_file_content(file_path: str) -> str:
+    """Load the content of a file with robust encoding handling."""
+    # Try common encodings first
+    encodings = ["utf-8", "utf-8-sig", "gbk", "gb2312", "ascii"]
+
+    for encoding in encodings:
+        try:
+            with open(file_path, "r", encoding=encoding) as file:
+                return file.read()
+        except UnicodeDecodeError:
+            continue
+
+    # If all common encodings fail, try to detect encoding
+    try:
+        with open(file_path, "rb") as file:
+            raw_data = file.read()
+        detected = chardet.detect(raw_data)
+        detected_encoding = detected["encoding"]
+
+        if detected_encoding:
+            try:
+                return raw_data.decode(detected_encoding)
+            except UnicodeDecodeError:
+                pass
+    except Exception as e:
+        logger.error(f"Error detecting encoding for {file_path}: {e}")
+
+    raise UnicodeError(f"Failed to decode {file_path} with any encoding")
+
+
+class ModelRegistry:
+    """
+    Name-indexed view of a model dictionary file, shared by every Live2dModel
+    reading that file.
+
+    The file is parsed once into a map from model name to model information.
+    Each lookup only stats the file and reloads it when its modification time
+    or size changed, so config switches and new sessions do not re-parse it.
+    """
+
+    _shared: Dict[str, "ModelRegistry"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, model_dict_path: str):
+        """
+        Args:
+            model_dict_path: The path to the model dictionary file
+        """
+        self.model_dict_path = model_dict_path
+        self._models: Dict[str, dict] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    @classmethod
+    def get_shared(cls, model_dict_path: str) -> "ModelRegistry":
+        """Get the process-wide registry of a model dictionary file"""
+        key = os.path.abspath(model_dict_path)
+        with cls._shared_lock:
+            registry = cls._shared.get(key)
+            if registry is None:
+                registry = cls._shared[key] = cls(model_dict_path)
+            return registry
+
+    def lookup(self, model_name: str) -> dict:
+        """
+        Return the information of a model, reloading the file if it changed.
+
+        Raises:
+            FileNotFoundError if the model dictionary file is not found.
+
+            json.JSONDecodeError if the model dictionary file is not a valid JSON file.
+
+            KeyError if the model name is not found in the model dictionary.
+        """
+        with self._lock:
+            self._refresh()
+            matched_model = self._models.get(model_name)
+
+        if matched_model is None:
+            logger.critical(f"Unable to find {model_name} in {self.model_dict_path}.")
+            raise KeyError(
+                f"{model_name} not found in model dictionary {self.model_dict_path}."
+            )
+        # Callers own their copy, the registry entry stays unchanged
+        return dict(matched_model)
+
+    def names(self) -> list:
+        """Names of the models in the dictionary"""
+        with self._lock:
+            self._refresh()
+            return list(self._models)
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.model_dict_path)
+        except FileNotFoundError as file_e:
+            logger.critical(
+                f"Model dictionary file not found at {self.model_dict_path}."
+            )
+            raise file_e
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+
+        try:
+            model_dict = json.loads(load_file_content(self.model_dict_path))
+        except FileNotFoundError as file_e:
+            logger.critical(
+                f"Model dictionary file not found at {self.model_dict_path}."
+            )
+            raise file_e
+        except json.JSONDecodeError as json_e:
+            logger.critical(
+                f"Error decoding JSON from model dictionary file at {self.model_dict_path}."
+            )
+            raise json_e
+        except UnicodeError as uni_e:
+            logger.critical(
+                f"Error reading model dictionary file at {self.model_dict_path}."
+            )
+            raise uni_e
+        except Exception as e:
+            logger.critical(
+                f"Error occurred while reading model dictionary file at {self.model_dict_path}."
+            )
+            raise e
+
+        models: Dict[str, dict] = {}
+        for model in model_dict:
+            # The first entry of a name wins, like the previous linear scan
+            models.setdefault(model["name"], model)
+        self._models = models
+        self._stamp = stamp
+        self.loads += 1
+        logger.debug(f"Loaded {len(models)} models from {self.model_dict_path}")
+
+
 # This class will only prepare the payload for the live2d model
 # the process of sending the payload should be done by the caller
 # This class is **Not responsible** for sending the payload to the server
@@ -24,6 +170,8 @@ class Live2dModel:
     model_info: dict
     emo_map: dict
     emo_str: str
+    _emo_pattern: re.Pattern
+    _emo_values: Optional[list]
 
     def __init__(
         self, live2d_model_name: str, model_dict_path: str = "model_dict.json"
@@ -51,39 +199,36 @@ class Live2dModel:
         self.emo_str: str = " ".join([f"[{key}]," for key in self.emo_map.keys()])
         # emo_str is a string of the keys in the emoMap dictionary. The keys are enclosed in square brackets.
         # example: `"[fear], [anger], [disgust], [sadness], [joy], [neutral], [surprise]"`
+        self._compile_emotion_pattern()
 
-    def _load_file_content(self, file_path: str) -> str:
-        """Load the content of a file with robust encoding handling."""
-        # Try common encodings first
-        encodings = ["utf-8", "utf-8-sig", "gbk", "gb2312", "ascii"]
-
-        for encoding in encodings:
-            try:
-                with open(file_path, "r", encoding=encoding) as file:
-                    return file.read()
-            except UnicodeDecodeError:
-                continue
-
-        # If all common encodings fail, try to detect encoding
-        try:
-            with open(file_path, "rb") as file:
-                raw_data = file.read()
-            detected = chardet.detect(raw_data)
-            detected_encoding = detected["encoding"]
-
-            if detected_encoding:
-                try:
-                    return raw_data.decode(detected_encoding)
-                except UnicodeDecodeError:
-                    pass
-        except Exception as e:
-            logger.error(f"Error detecting encoding for {file_path}: {e}")
+    def _compile_emotion_pattern(self) -> None:
+        """
+        Prepare the case-insensitive matcher of the `[emotion]` tags.
 
-        raise UnicodeError(f"Failed to decode {file_path} with any encoding")
+        When no key contains a bracket, a tag can only be a bracketed span
+        without brackets inside, so any such span is matched and looked up in
+        `emo_map`, whatever the size of the map. Otherwise each key is its own
+        group of one compiled alternation, tried in emo_map order like the
+        previous scan, and `match.lastindex` gives its expression index.
+        """
+        if not any("[" in key or "]" in key for key in self.emo_map):
+            self._emo_pattern = _BRACKETED_SPAN
+            self._emo_values = None
+            return
+        self._emo_values = list(self.emo_map.values())
+        alternatives = "|".join(f"({re.escape(key)})" for key in self.emo_map)
+        self._emo_pattern = re.compile(rf"\[(?:{alternatives})\]", re.IGNORECASE)
+
+    def _emotion_of(self, match: re.Match) -> Optional[int]:
+        """Expression index of a matched tag, None if it is not an emotion"""
+        if self._emo_values is None:
+            return self.emo_map.get(match.group(1).lower())
+        return self._emo_values[match.lastindex - 1]
 
     def _lookup_model_info(self, model_name: str) -> dict:
         """
         Find the model information from the model dictionary and return the information about the matched model.
+        The dictionary is read through the shared ModelRegistry of `model_dict_path`, so it is only parsed again when the file changes.
 
         Parameters:
             model_name (str): The name of the live2d model.
@@ -102,47 +247,37 @@ class Live2dModel:
 
         self.live2d_model_name = model_name
 
-        try:
-            file_content = self._load_file_content(self.model_dict_path)
-            model_dict = json.loads(file_content)
-        except FileNotFoundError as file_e:
-            logger.critical(
-                f"Model dictionary file not found at {self.model_dict_path}."
-            )
-            raise file_e
-        except json.JSONDecodeError as json_e:
-            logger.critical(
-                f"Error decoding JSON from model dictionary file at {self.model_dict_path}."
-            )
-            raise json_e
-        except UnicodeError as uni_e:
-            logger.critical(
-                f"Error reading model dictionary file at {self.model_dict_path}."
-            )
-            raise uni_e
-        except Exception as e:
-            logger.critical(
-                f"Error occurred while reading model dictionary file at {self.model_dict_path}."
-            )
-            raise e
+        # The feature: "translate model url to full url if it starts with '/' " is no longer implemented here
 
-        # Find the model in the model_dict
-        matched_model = next(
-            (model for model in model_dict if model["name"] == model_name), None
+        matched_model = ModelRegistry.get_shared(self.model_dict_path).lookup(
+            model_name
         )
 
-        if matched_model is None:
-            logger.critical(f"Unable to find {model_name} in {self.model_dict_path}.")
-            raise KeyError(
-                f"{model_name} not found in model dictionary {self.model_dict_path}."
-            )
-
-        # The feature: "translate model url to full url if it starts with '/' " is no longer implemented here
-
         logger.info("Model Information Loaded.")
 
         return matched_model
 
+    def extract_and_remove_emotions(self, text: str) -> tuple[str, list]:
+        """
+        Find the emotion keywords in the input string and remove them, in a single pass.
+
+        Parameters:
+            text (str): The string to check for emotions.
+
+        Returns:
+            tuple[str, list]: The cleaned string, and the values (the expression index) of the emotions found in the string, in order.
+        """
+        expression_list = []
+
+        def collect(match: re.Match) -> str:
+            expression = self._emotion_of(match)
+            if expression is None:
+                return match.group(0)
+            expression_list.append(expression)
+            return ""
+
+        return self._emo_pattern.sub(collect, text), expression_list
+
     def extract_emotion(self, str_to_check: str) -> list:
         """
         Check the input string for any emotion keywords and return a list of values (the expression index) of the emotions found in the string.
@@ -153,42 +288,17 @@ class Live2dModel:
         Returns:
             list: A list of values of the emotions found in the string. An empty list is returned if no emotions are found.
         """
-
-        expression_list = []
-        str_to_check = str_to_check.lower()
-
-        i = 0
-        while i < len(str_to_check):
-            if str_to_check[i] != "[":
-                i += 1
-                continue
-            for key in self.emo_map.keys():
-                emo_tag = f"[{key}]"
-                if str_to_check[i : i + len(emo_tag)] == emo_tag:
-                    expression_list.append(self.emo_map[key])
-                    i += len(emo_tag) - 1
-                    break
-            i += 1
-        return expression_list
+        expressions = map(self._emotion_of, self._emo_pattern.finditer(str_to_check))
+        return [expression for expression in expressions if expression is not None]
 
     def remove_emotion_keywords(self, target_str: str) -> str:
         """
         Remove the emotion keywords from the input string and return the cleaned string.
 
         Parameters:
-            str_to_check (str): The string to check for emotions.
+            target_str (str): The string to check for emotions.
 
         Returns:
             str: The cleaned string with the emotion keywords removed.
         """
-
-        lower_str = target_str.lower()
-
-        for key in self.emo_map.keys():
-            lower_key = f"[{key}]".lower()
-            while lower_key in lower_str:
-                start_index = lower_str.find(lower_key)
-                end_index = start_index + len(lower_key)
-                target_str = target_str[:start_index] + target_str[end_index:]
-                lower_str = lower_str[:start_index] + lower_str[end_index:]
-        return target_str
+        return self.extract_and_remove_emotions(target_str)[0]
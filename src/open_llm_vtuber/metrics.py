@@ -0,0 +1,315 @@
+import time
+import itertools
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_SAMPLES = 1024
+DEFAULT_MAX_TURNS = 50
+# Timeline entries kept per turn
+MAX_TURN_EVENTS = 200
+
+
+class Histogram:
+    """
+    Latency distribution of a stage, in seconds. Percentiles are computed
+    over the most recent `samples` observations, count and mean over all.
+    """
+
+    def __init__(self, samples: int = DEFAULT_SAMPLES):
+        self._recent: deque = deque(maxlen=samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def _percentile(ordered: list, fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> dict:
+        """Count, mean, p50/p95/p99 and max, in milliseconds"""
+        if not self.count:
+            return {"count": 0}
+        ordered = sorted(self._recent)
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3,
+            "p50_ms": self._percentile(ordered, 0.50) * 1e3,
+            "p95_ms": self._percentile(ordered, 0.95) * 1e3,
+            "p99_ms": self._percentile(ordered, 0.99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+@dataclass
+class Turn:
+    """
+    Timeline of one conversation turn: (name, offset from the turn start,
+    duration or None) of its spans and events
+    """
+
+    turn_id: int
+    label: str
+    start: float
+    events: List[tuple] = field(default_factory=list)
+    seen: set = field(default_factory=set)
+    end: Optional[float] = None
+    interrupted: bool = False
+    _token: object = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "turn_id": self.turn_id,
+            "label": self.label,
+            "duration_ms": (self.end - self.start) * 1e3 if self.end else None,
+            "interrupted": self.interrupted,
+            "events": [
+                {
+                    "event": name,
+                    "at_ms": offset * 1e3,
+                    "duration_ms": None if duration is None else duration * 1e3,
+                }
+                for name, offset, duration in self.events
+            ],
+        }
+
+
+class _Span:
+    """Times a `with` block into a histogram"""
+
+    __slots__ = ("_metrics", "_name", "_turn", "_timeline", "_start")
+
+    def __init__(
+        self, metrics: "Metrics", name: str, turn: Optional[Turn], timeline: bool
+    ):
+        self._metrics = metrics
+        self._name = name
+        self._turn = turn
+        self._timeline = timeline
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(
+            self._name, time.perf_counter() - self._start, self._turn, self._timeline
+        )
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_current_turn: ContextVar[Optional[Turn]] = ContextVar("current_turn", default=None)
+
+
+class Metrics:
+    """
+    Stage latencies of the conversation pipeline.
+
+    Durations (`span`, `observe`) and offsets from the start of the current
+    turn (`mark`) are aggregated into histograms. The current turn is a
+    context variable set by `start_turn`, so tasks created within a turn
+    (TTS jobs, the agent stream) record into it without passing ids around.
+    Code running outside the turn's tasks, such as a client writer task,
+    passes the turn it captured with `current_turn`.
+
+    Events marked within a turn also go to its timeline; only the first
+    occurrence of an event in a turn feeds the event's histogram, which thus
+    measures the time to the first occurrence. Events that happened before
+    the turn started, such as the arrival of the chat messages it answers,
+    have a negative offset.
+
+    When disabled every call returns immediately and `span` returns a shared
+    no-op context manager.
+    """
+
+    _shared: Optional["Metrics"] = None
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        samples: int = DEFAULT_SAMPLES,
+        max_turns: int = DEFAULT_MAX_TURNS,
+    ):
+        """
+        Args:
+            enabled: Record anything at all
+            samples: Observations kept per histogram for the percentiles
+            max_turns: Recent turns whose timeline is kept
+        """
+        self.enabled = enabled
+        self.samples = samples
+        self.max_turns = max_turns
+        self._ids = itertools.count(1)
+        self.reset()
+
+    @classmethod
+    def get_shared(cls) -> "Metrics":
+        """Get the process-wide metrics, creating them enabled if needed"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def configure(cls, **kwargs) -> "Metrics":
+        """Replace the process-wide metrics with ones built from kwargs"""
+        cls._shared = cls(**kwargs)
+        return cls._shared
+
+    def reset(self) -> None:
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.turns: "OrderedDict[int, Turn]" = OrderedDict()
+
+    # ==== turns
+
+    def start_turn(self, label: str = "") -> Optional[Turn]:
+        """Start a turn and make it current in this context"""
+        if not self.enabled:
+            return None
+        turn = Turn(next(self._ids), label[:200], time.perf_counter())
+        self.turns[turn.turn_id] = turn
+        while len(self.turns) > self.max_turns:
+            self.turns.popitem(last=False)
+        turn._token = _current_turn.set(turn)
+        self.count("turns")
+        return turn
+
+    def end_turn(self, turn: Optional[Turn], interrupted: bool = False) -> None:
+        """End a turn started in this context and make it no longer current"""
+        if turn is None or not self.enabled:
+            return
+        try:
+            _current_turn.reset(turn._token)
+        except ValueError:
+            # Started in another context, which keeps it current
+            pass
+        turn.end = time.perf_counter()
+        turn.interrupted = interrupted
+        self._histogram("turn").observe(turn.end - turn.start)
+        if interrupted:
+            self.count("turns_interrupted")
+
+    @staticmethod
+    def current_turn() -> Optional[Turn]:
+        return _current_turn.get()
+
+    # ==== recording
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.samples)
+        return histogram
+
+    @staticmethod
+    def _add_event(turn: Turn, name: str, offset: float, duration: Optional[float]) -> None:
+        if len(turn.events) < MAX_TURN_EVENTS:
+            turn.events.append((name, offset, duration))
+
+    def observe(
+        self,
+        name: str,
+        seconds: float,
+        turn: Optional[Turn] = None,
+        timeline: bool = True,
+    ) -> None:
+        """
+        Record a duration that just ended.
+
+        Args:
+            name: Histogram name
+            seconds: The duration
+            turn: Turn captured with `current_turn` in another context
+            timeline: Also add the span to the timeline of the turn, the
+                current one by default. Disable for per-frame spans, which
+                would crowd out the other events.
+        """
+        if not self.enabled:
+            return
+        self._histogram(name).observe(seconds)
+        if not timeline:
+            return
+        turn = turn or _current_turn.get()
+        if turn is not None:
+            offset = time.perf_counter() - seconds - turn.start
+            self._add_event(turn, name, offset, seconds)
+
+    def span(self, name: str, turn: Optional[Turn] = None, timeline: bool = True):
+        """Context manager recording the duration of its block, see `observe`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, turn, timeline)
+
+    def mark(
+        self,
+        event: str,
+        turn: Optional[Turn] = None,
+        once: bool = False,
+        at: Optional[float] = None,
+    ) -> None:
+        """
+        Record that an event happened in the turn, the current one by default.
+
+        Args:
+            event: Event name, also the name of its histogram
+            turn: Turn captured with `current_turn` in another context
+            once: Ignore the event if it already happened in the turn
+            at: time.perf_counter() time of the event, now by default
+        """
+        if not self.enabled:
+            return
+        turn = turn or _current_turn.get()
+        if turn is None:
+            return
+        first = event not in turn.seen
+        if once and not first:
+            return
+        offset = (time.perf_counter() if at is None else at) - turn.start
+        self._add_event(turn, event, offset, None)
+        if first:
+            turn.seen.add(event)
+            self._histogram(event).observe(offset)
+
+    # ==== export
+
+    def snapshot(self, turns: int = 10) -> dict:
+        """Histograms, counters and the timelines of the last `turns` turns"""
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "counters": dict(self.counters),
+            "histograms": {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            },
+            "turns": [turn.to_dict() for turn in list(self.turns.values())[-turns:]],
+        }
+
+
+def get_metrics() -> Metrics:
+    """The process-wide metrics"""
+    return Metrics.get_shared()
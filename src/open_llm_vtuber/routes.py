@@ -1,11 +1,19 @@
 import json
 import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from loguru import logger
 
 from .service_context import ServiceContext
-from .youtube.youtube_chat_service import YouTubeChatService
-from .conversation import conversation_chain, handle_youtube_chat
+from .youtube.broadcast_hub import BroadcastHub, Subscriber, YouTubeBroadcast
+from .youtube.chat_queue import ChatMessage, PRIORITY_HOST
+from .audio_transport import negotiate_transport
+from .client_sender import ClientSender
+
+# Live chat read by the overlay, shared by every connected client
+YOUTUBE_VIDEO_ID = "eETR3Q4ZMB0"
 
 # Store active connections
 active_connections = {}
@@ -14,16 +22,139 @@ async def cleanup_connection(websocket: WebSocket):
     """Cleanup connection and associated resources"""
     client_id = id(websocket)
     if client_id in active_connections:
-        youtube_service = active_connections[client_id].get('youtube_service')
-        if youtube_service:
-            youtube_service.stop()
-        task = active_connections[client_id].get('task')
-        if task:
-            task.cancel()
+        unsubscribe = active_connections[client_id].get('unsubscribe')
+        if unsubscribe:
+            unsubscribe()
+        sender = active_connections[client_id].get('sender')
+        if sender:
+            sender.close()
+            logger.info(f"Send stats of connection {client_id}: {sender.stats()}")
         del active_connections[client_id]
     logger.info(f"Cleaned up connection {client_id}")
 
-async def websocket_endpoint(websocket: WebSocket, service_context: ServiceContext):
+def create_sender(websocket: WebSocket, service_context: ServiceContext) -> ClientSender:
+    """Outbound queue of a client, with the limits of the system config"""
+    system_config = service_context.system_config
+    return ClientSender(
+        websocket.send_text,
+        websocket.send_bytes,
+        budget=system_config.client_send_budget,
+        policy=system_config.slow_client_policy,
+        name=str(id(websocket)),
+    )
+
+def client_stats() -> dict:
+    """Send queue stats of every connected client"""
+    return {
+        str(client_id): connection['sender'].stats()
+        for client_id, connection in active_connections.items()
+        if connection.get('sender')
+    }
+
+@dataclass
+class ClientSession:
+    """A connected client, as seen by the message handlers"""
+
+    websocket: WebSocket
+    service_context: ServiceContext
+    broadcast: YouTubeBroadcast
+    subscriber: Subscriber
+
+
+# ==== client message handlers
+
+
+async def handle_text_input(session: ClientSession, data: dict) -> None:
+    """Text typed in the overlay, answered in the broadcast before chat messages"""
+    text = (data.get("text") or "").strip()
+    if not text:
+        return
+    message = ChatMessage(
+        author=data.get("author") or "Host",
+        text=text,
+        author_id=f"client-{id(session.websocket)}",
+        priority=PRIORITY_HOST,
+    )
+    if not session.broadcast.submit(message):
+        logger.warning(f"Text input not queued: {text}")
+
+
+async def handle_interrupt(session: ClientSession, data: dict) -> None:
+    """
+    The client stopped the audio: cancel the reply in progress and tell the
+    agent what was heard
+    """
+    heard = data.get("text", "")
+    logger.info(f"Interrupted by client, heard: {heard}")
+    session.broadcast.interrupt(heard)
+
+
+async def handle_config_switch(session: ClientSession, data: dict) -> None:
+    """Switch the character config. The replies go through the client's queue."""
+    await session.service_context.handle_config_switch(
+        session.subscriber.send_text, data.get("file", "")
+    )
+
+
+async def ignore_message(session: ClientSession, data: dict) -> None:
+    pass
+
+
+MESSAGE_HANDLERS: Dict[str, Callable[[ClientSession, dict], Awaitable[None]]] = {
+    "text-input": handle_text_input,
+    "interrupt-signal": handle_interrupt,
+    "switch-config": handle_config_switch,
+    "frontend-ready": ignore_message,
+}
+
+
+async def dispatch_message(session: ClientSession, message: str) -> None:
+    """Run the handler of a client message. Errors are logged, not raised."""
+    try:
+        data = json.loads(message)
+        msg_type = data.get("type")
+    except (json.JSONDecodeError, AttributeError):
+        logger.warning(f"Ignoring malformed WebSocket message: {message[:200]}")
+        return
+    handler = MESSAGE_HANDLERS.get(msg_type)
+    if handler is None:
+        logger.warning(f"Unhandled WebSocket message type: {msg_type}")
+        return
+    logger.info(f"Received WebSocket message: {msg_type}")
+    try:
+        await handler(session, data)
+    except Exception as e:
+        logger.error(f"Error handling {msg_type} message: {e}")
+
+
+async def receive_messages(session: ClientSession, stop: asyncio.Event) -> None:
+    """
+    Dispatch client messages until the client disconnects or `stop` is set.
+    Waits on the pending receive and the stop event together, so nothing
+    runs while the connection is idle and a stop is seen immediately.
+    """
+    stop_wait = asyncio.create_task(stop.wait())
+    receive = None
+    try:
+        while True:
+            receive = asyncio.create_task(session.websocket.receive_text())
+            await asyncio.wait(
+                {receive, stop_wait}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not receive.done():
+                logger.info("YouTube broadcast stopped, ending WebSocket connection")
+                return
+            # Raises WebSocketDisconnect when the client is gone
+            await dispatch_message(session, receive.result())
+    finally:
+        for task in (receive, stop_wait):
+            if task and not task.done():
+                task.cancel()
+
+
+async def websocket_endpoint(
+    websocket: WebSocket, service_context: ServiceContext, hub: BroadcastHub
+):
     client_id = id(websocket)
     
     # Cleanup any existing connection with same ID
@@ -33,16 +164,20 @@ async def websocket_endpoint(websocket: WebSocket, service_context: ServiceConte
         await websocket.accept()
         logger.info(f"WebSocket connection established (ID: {client_id})")
         
+        # Frames to the client go through its own queue, so a slow client
+        # does not hold up the others
+        sender = create_sender(websocket, service_context)
+
         # Store connection info
         active_connections[client_id] = {
             'websocket': websocket,
-            'youtube_service': None,
-            'task': None
+            'sender': sender,
+            'unsubscribe': None,
         }
         
         # Send initial Live2D config
         live2d_config = service_context.get_live2d_config()
-        await websocket.send_text(json.dumps({
+        await sender.send_text(json.dumps({
             "type": "set-model-and-conf",
             "model_info": live2d_config,
             "conf_name": live2d_config["name"],
@@ -51,7 +186,7 @@ async def websocket_endpoint(websocket: WebSocket, service_context: ServiceConte
         logger.info(f"Sent Live2D config: {live2d_config}")
         
         # Send connection established message
-        await websocket.send_text(json.dumps({
+        await sender.send_text(json.dumps({
             "type": "full-text",
             "text": "Connection established"
         }))
@@ -64,48 +199,37 @@ async def websocket_endpoint(websocket: WebSocket, service_context: ServiceConte
             
             if data.get("type") == "frontend-ready":
                 logger.info("Frontend is ready, starting YouTube chat monitoring...")
+                # Clients that can play partial audio opt into chunked streaming
+                stream_audio = bool(data.get("stream_audio", False))
+                # Binary audio frames are opt-in, text-only clients keep base64 JSON
+                audio_transport = negotiate_transport(
+                    data, sender.send_text, sender.send_bytes
+                )
+                await sender.send_text(json.dumps({
+                    "type": "audio-transport",
+                    "mode": audio_transport.mode,
+                }))
                 
-                # Start YouTube chat monitoring
-                youtube_service = YouTubeChatService(video_id="eETR3Q4ZMB0")
-                active_connections[client_id]['youtube_service'] = youtube_service
-                
-                # Create task for YouTube chat monitoring
-                youtube_task = asyncio.create_task(handle_youtube_chat(
-                    youtube_service=youtube_service,
-                    agent_engine=service_context.agent_engine,
-                    websocket_send=websocket.send_text
-                ))
-                active_connections[client_id]['task'] = youtube_task
-
-                # Keep receiving WebSocket messages while YouTube task runs
+                # Join the shared YouTube chat broadcast: one chat ingest and
+                # one agent/TTS run per message, whatever the number of clients
+                subscriber = Subscriber(
+                    send_text=sender.send_text,
+                    send_bytes=sender.send_bytes,
+                    mode=audio_transport.mode,
+                    stream_audio=stream_audio,
+                    drop_pending=sender.drop_audio,
+                )
+                broadcast = hub.subscribe(YOUTUBE_VIDEO_ID, subscriber)
+                active_connections[client_id]['unsubscribe'] = (
+                    lambda: hub.unsubscribe(YOUTUBE_VIDEO_ID, subscriber)
+                )
+
+                # Handle client messages while the broadcast runs
+                session = ClientSession(websocket, service_context, broadcast, subscriber)
                 try:
-                    while True:
-                        if not youtube_service.is_active():
-                            logger.info("YouTube service stopped, ending WebSocket connection")
-                            break
-                            
-                        try:
-                            message = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                            data = json.loads(message)
-                            logger.info(f"Received WebSocket message: {data}")
-                            
-                            # Handle any additional WebSocket messages here
-                            
-                        except asyncio.TimeoutError:
-                            # Timeout is expected, just continue the loop
-                            continue
-                        except WebSocketDisconnect:
-                            logger.info("WebSocket disconnected")
-                            break
-                        
-                finally:
-                    # Cleanup if loop breaks
-                    if not youtube_task.done():
-                        youtube_task.cancel()
-                        try:
-                            await youtube_task
-                        except asyncio.CancelledError:
-                            pass
+                    await receive_messages(session, subscriber.stopped)
+                except WebSocketDisconnect:
+                    logger.info("WebSocket disconnected")
             else:
                 logger.warning(f"Received unexpected message type: {data.get('type')}")
                 
@@ -121,7 +245,9 @@ async def websocket_endpoint(websocket: WebSocket, service_context: ServiceConte
     except Exception as e:
         logger.error(f"Failed to establish WebSocket connection: {e}")
     finally:
-        # Always cleanup properly
+        # Always cleanup properly. Queued frames are discarded, the client
+        # only needs to stop playing.
+        await cleanup_connection(websocket)
         try:
             await websocket.send_text(json.dumps({
                 "type": "control",
@@ -129,16 +255,18 @@ async def websocket_endpoint(websocket: WebSocket, service_context: ServiceConte
             }))
         except:
             pass
-        await cleanup_connection(websocket)
         logger.info(f"WebSocket connection closed (ID: {client_id})")
 
-def create_routes() -> APIRouter:
+def create_routes(
+    service_context: ServiceContext,
+    hub: Optional[BroadcastHub] = None,
+) -> APIRouter:
     router = APIRouter()
-    service_context = ServiceContext()
+    hub = hub or BroadcastHub(service_context)
     
     @router.websocket("/client-ws")
     async def websocket(websocket: WebSocket):
-        await websocket_endpoint(websocket, service_context)
+        await websocket_endpoint(websocket, service_context, hub)
   
     return router
   
\ No newline at end of file
@@ -6,7 +6,11 @@ from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from .routes import create_routes
+from .routes import client_stats, create_routes
+from .config_manager import Config
+from .metrics import Metrics
+from .service_context import ServiceContext
+from .youtube.broadcast_hub import BroadcastHub
 
 class CustomStaticFiles(StaticFiles):
     async def get_response(self, path, scope):
@@ -17,8 +21,15 @@ class CustomStaticFiles(StaticFiles):
 
 
 class WebSocketServer:
-    def __init__(self):
+    def __init__(self, config: Config, enable_metrics: bool = True):
+        """
+        Args:
+            config: Configuration loaded from conf.yaml
+            enable_metrics: Record the stage latencies served on /metrics.
+                When disabled, the instrumentation is a no-op.
+        """
         self.app = FastAPI()
+        self.metrics = Metrics.configure(enabled=enable_metrics)
 
         # Add CORS
         self.app.add_middleware(
@@ -36,7 +47,22 @@ class WebSocketServer:
         frontend_path = workspace_root / "frontend"
 
         # Include routes
-        self.app.include_router(create_routes())
+        self.service_context = ServiceContext(config)
+        self.hub = BroadcastHub(self.service_context)
+        self.app.include_router(create_routes(self.service_context, self.hub))
+
+        @self.app.get("/metrics")
+        async def metrics():
+            """
+            Stage latency histograms, recent turns, client send queues,
+            YouTube chat queues and the stats of the shared components
+            """
+            return {
+                **self.metrics.snapshot(),
+                **self.service_context.stats(),
+                "clients": client_stats(),
+                "broadcasts": self.hub.stats(),
+            }
 
         # Mount static files with absolute paths
         self.app.mount(
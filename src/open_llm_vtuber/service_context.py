@@ -1,20 +1,26 @@
 import os
 import json
+import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Awaitable, Callable, Optional, Dict, Any
 import time
 
 from loguru import logger
-from fastapi import WebSocket
 
 from .live2d_model import Live2dModel
 from .agent.agent_factory import AgentFactory
+from .tts.edge_tts import EdgeTTSEngine
+from .tts.tts_cache import CachedTTSEngine, TTSCache
+from .utils.flush_policy import AdaptiveFlushPolicy
+from .translate.translate_factory import TranslateFactory
+from .translate.translation_stage import TranslationStage
 
 from .config_manager import (
     Config,
     CharacterConfig,
     SystemConfig,
     TTSConfig,
+    TranslatorConfig,
     read_yaml,
     validate_config,
 )
@@ -24,10 +30,22 @@ class ServiceContext:
     """Initializes, stores, and updates the tts, and llm instances and other
     configurations for a connected client."""
 
-    def __init__(self):
+    def __init__(self, config: Config):
+        """
+        Args:
+            config: Configuration loaded from conf.yaml
+        """
+        self.config = config
+        self.system_config = config.system_config
+        self.character_config = config.character_config
         self.live2d_model = None
         self.tts_engine = None
         self.agent_engine = None
+        # Adapts sentence chunks to the TTS backlog, shared by agent and chains
+        self.flush_policy = AdaptiveFlushPolicy()
+        # Translates the TTS text, None unless translate_audio is enabled
+        self.translation = None
+        self._closing_translation: Optional[asyncio.Task] = None
         self.is_speaking = False
         self.current_audio_end = 0
         self.expressions_config = self._load_expressions_config()
@@ -35,7 +53,11 @@ class ServiceContext:
         # Initialize components
         self.init_live2d()
         self.init_agent()
-        
+        self.init_tts()
+        self.init_translate(
+            config.character_config.tts_preprocessor_config.translator_config
+        )
+
     def _load_expressions_config(self) -> Dict[str, Any]:
         """Load expressions and animations config from JSON file"""
         try:
@@ -99,11 +121,50 @@ class ServiceContext:
     def init_agent(self):
         """Initialize agent with ollama"""
         try:
-            self.agent_engine = AgentFactory.create_agent()
+            agent_settings = self.character_config.agent_config.agent_settings
+            self.agent_engine = AgentFactory.create_agent(
+                segment_language=agent_settings.basic_memory_agent.segment_language,
+                flush_policy=self.flush_policy,
+            )
             logger.info("Agent initialized with ollama")
         except Exception as e:
             logger.error(f"Failed to initialize agent: {e}")
 
+    def init_tts(self):
+        """Initialize the edge-tts engine behind the shared TTS cache"""
+        try:
+            self.tts_engine = CachedTTSEngine(EdgeTTSEngine(), TTSCache())
+        except Exception as e:
+            logger.error(f"Failed to initialize TTS engine: {e}")
+
+    def init_translate(self, translator_config: TranslatorConfig) -> None:
+        """Initialize the async translation stage of the TTS text"""
+        if self.translation:
+            self._close_translation(self.translation)
+        try:
+            self.translation = TranslateFactory.create_stage(translator_config)
+        except Exception as e:
+            self.translation = None
+            logger.error(f"Failed to initialize translator: {e}")
+
+    def _close_translation(self, translation: TranslationStage) -> None:
+        """Close a replaced translation stage, in a task when on the event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(translation.close())
+            return
+        # Keep a reference, the loop only holds weak references to tasks
+        self._closing_translation = loop.create_task(translation.close())
+
+    def stats(self) -> dict:
+        """Stats of the shared pipeline components, served on /metrics"""
+        stats = {"flush_policy": self.flush_policy.stats()}
+        tts_cache = getattr(self.tts_engine, "cache", None)
+        if tts_cache is not None:
+            stats["tts_cache"] = tts_cache.stats()
+        return stats
+
     def is_audio_playing(self) -> bool:
         """Check if audio is currently playing"""
         return time.time() < self.current_audio_end
@@ -170,6 +231,11 @@ class ServiceContext:
         # init agent from character config
         self.init_agent()
 
+        # init translation from the tts preprocessor config
+        self.init_translate(
+            config.character_config.tts_preprocessor_config.translator_config
+        )
+
         # store typed config references
         self.config = config
         self.system_config = config.system_config
@@ -179,7 +245,7 @@ class ServiceContext:
 
     async def handle_config_switch(
         self,
-        websocket: WebSocket,
+        send_text: Callable[[str], Awaitable[None]],
         config_file_name: str,
     ) -> None:
         """
@@ -187,7 +253,8 @@ class ServiceContext:
         Change the configuration to a new config and notify the client.
 
         Parameters:
-        - websocket (WebSocket): The WebSocket connection.
+        - send_text (Callable): Sends a text frame to the client, through its
+          ClientSender.
         - config_file_name (str): The name of the configuration file.
         """
         try:
@@ -227,18 +294,18 @@ class ServiceContext:
                 )
 
                 # Send responses to client
-                await websocket.send_text(
+                await send_text(
                     json.dumps(
                         {
                             "type": "set-model-and-conf",
-                            "model_info": self.live2d_model.model_info,
+                            "model_info": self.live2d_model,
                             "conf_name": self.character_config.conf_name,
                             "conf_uid": self.character_config.conf_uid,
                         }
                     )
                 )
 
-                await websocket.send_text(
+                await send_text(
                     json.dumps(
                         {
                             "type": "config-switched",
@@ -256,7 +323,7 @@ class ServiceContext:
         except Exception as e:
             logger.error(f"Error switching configuration: {e}")
             logger.debug(self)
-            await websocket.send_text(
+            await send_text(
                 json.dumps(
                     {
                         "type": "error",
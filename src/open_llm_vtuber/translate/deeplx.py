@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+from loguru import logger
+
+from .translate_interface import TranslateInterface
+
+
+class DeepLXTranslate(TranslateInterface):
+    """Translation through a DeepLX server"""
+
+    def __init__(
+        self,
+        api_endpoint: str,
+        target_lang: str,
+        timeout: float = 5.0,
+        use_async: bool = True,
+    ):
+        """
+        Args:
+            api_endpoint: DeepLX endpoint, e.g. http://localhost:1188/v2/translate
+            target_lang: Target language code, e.g. "JA"
+            timeout: HTTP timeout of one request, in seconds
+            use_async: Translate batches with the non-blocking client instead
+                of blocking requests run in a thread
+        """
+        self.api_endpoint = api_endpoint
+        self.target_lang = target_lang
+        self.timeout = timeout
+        self.native_async = use_async
+        self._async_client: httpx.AsyncClient | None = None
+        logger.info(f"Initialized DeepLX translator: {api_endpoint} -> {target_lang}")
+
+    def _request(self, text: str) -> dict:
+        return {"text": text, "source_lang": "auto", "target_lang": self.target_lang}
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> str:
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def translate(self, text: str) -> str:
+        response = httpx.post(
+            self.api_endpoint, json=self._request(text), timeout=self.timeout
+        )
+        return self._parse(response)
+
+    async def async_translate_batch(self, texts: list[str]) -> list[str]:
+        """Send one request per text concurrently, over a shared connection pool"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout)
+        responses = await asyncio.gather(
+            *(
+                self._async_client.post(self.api_endpoint, json=self._request(text))
+                for text in texts
+            )
+        )
+        return [self._parse(response) for response in responses]
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the non-blocking client"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
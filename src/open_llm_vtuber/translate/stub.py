@@ -0,0 +1,27 @@
+import time
+
+from .translate_interface import TranslateInterface
+
+
+class StubTranslate(TranslateInterface):
+    """
+    Local translator for tests and benchmarks. Marks the text with the target
+    language instead of translating it, optionally after blocking like a
+    network call would.
+    """
+
+    def __init__(self, target_lang: str = "stub", delay: float = 0.0):
+        """
+        Args:
+            target_lang: Language written in front of the text
+            delay: Seconds each call blocks for
+        """
+        self.target_lang = target_lang
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text: str) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return f"[{self.target_lang}] {text}"
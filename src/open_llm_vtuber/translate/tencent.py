@@ -0,0 +1,44 @@
+from loguru import logger
+
+from .translate_interface import TranslateInterface
+
+
+class TencentTranslate(TranslateInterface):
+    """Translation through Tencent Cloud Machine Translation (TMT)"""
+
+    def __init__(
+        self,
+        secret_id: str,
+        secret_key: str,
+        region: str,
+        source_lang: str,
+        target_lang: str,
+    ):
+        # Optional dependency, only needed when this provider is selected
+        from tencentcloud.common import credential
+        from tencentcloud.tmt.v20180321 import models, tmt_client
+
+        self._models = models
+        self._client = tmt_client.TmtClient(
+            credential.Credential(secret_id, secret_key), region
+        )
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        logger.info(f"Initialized Tencent translator: {source_lang} -> {target_lang}")
+
+    def translate(self, text: str) -> str:
+        request = self._models.TextTranslateRequest()
+        request.SourceText = text
+        request.Source = self.source_lang
+        request.Target = self.target_lang
+        request.ProjectId = 0
+        return self._client.TextTranslate(request).TargetText
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        """One TextTranslateBatch call for all the texts"""
+        request = self._models.TextTranslateBatchRequest()
+        request.SourceTextList = list(texts)
+        request.Source = self.source_lang
+        request.Target = self.target_lang
+        request.ProjectId = 0
+        return list(self._client.TextTranslateBatch(request).TargetTextList)
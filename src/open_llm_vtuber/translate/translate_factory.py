@@ -0,0 +1,65 @@
+from typing import Optional
+
+from loguru import logger
+
+from ..config_manager.tts_preprocessor import TranslatorConfig
+from .translate_interface import TranslateInterface
+from .translation_stage import TranslationStage
+
+
+class TranslateFactory:
+    """Creates translators and translation stages from TranslatorConfig"""
+
+    @staticmethod
+    def get_translator(config: TranslatorConfig) -> TranslateInterface:
+        """
+        Create the translator selected by `translate_provider`
+
+        Raises:
+            ValueError: The provider is unknown or its configuration is missing
+        """
+        provider = config.translate_provider
+        logger.info(f"Initializing translator: {provider}")
+        if provider == "deeplx":
+            if config.deeplx is None:
+                raise ValueError("DeepLX configuration is missing")
+            from .deeplx import DeepLXTranslate
+
+            return DeepLXTranslate(
+                api_endpoint=config.deeplx.deeplx_api_endpoint,
+                target_lang=config.deeplx.deeplx_target_lang,
+                timeout=config.deeplx.deeplx_timeout,
+                use_async=config.deeplx.deeplx_async,
+            )
+        if provider == "tencent":
+            if config.tencent is None:
+                raise ValueError("Tencent configuration is missing")
+            from .tencent import TencentTranslate
+
+            return TencentTranslate(
+                secret_id=config.tencent.secret_id,
+                secret_key=config.tencent.secret_key,
+                region=config.tencent.region,
+                source_lang=config.tencent.source_lang,
+                target_lang=config.tencent.target_lang,
+            )
+        if provider == "stub":
+            from .stub import StubTranslate
+
+            return StubTranslate()
+        raise ValueError(f"Unknown translate provider: {provider}")
+
+    @staticmethod
+    def create_stage(config: TranslatorConfig) -> Optional[TranslationStage]:
+        """
+        Create the async translation stage, or None when `translate_audio` is
+        disabled
+        """
+        if not config.translate_audio:
+            return None
+        return TranslationStage(
+            TranslateFactory.get_translator(config),
+            cache_size=config.translate_cache_size,
+            timeout=config.translate_timeout,
+            batch_size=config.translate_batch_size,
+        )
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+
+
+class TranslateInterface(ABC):
+    """
+    Translates the text sent to TTS.
+
+    Implementations only need `translate`. Providers with a batch API override
+    `translate_batch`. Providers with a non-blocking client implement
+    `async_translate_batch` and set `native_async`, so TranslationStage awaits
+    it instead of running the blocking methods in a thread. Providers holding
+    clients release them in `aclose`.
+    """
+
+    # Language the text is translated to, part of the translation cache key
+    target_lang: str = ""
+    # Whether async_translate_batch is implemented
+    native_async: bool = False
+
+    @abstractmethod
+    def translate(self, text: str) -> str:
+        """
+        Translate the text. May block on network I/O.
+
+        Args:
+            text: Text to translate
+
+        Returns:
+            str: The translated text
+        """
+        raise NotImplementedError
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        """Translate several texts, in order. May block on network I/O."""
+        return [self.translate(text) for text in texts]
+
+    async def async_translate_batch(self, texts: list[str]) -> list[str]:
+        """Translate several texts, in order, without blocking the event loop"""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Release the clients of the provider. Nothing to release by default."""
@@ -0,0 +1,205 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from .translate_interface import TranslateInterface
+
+
+class TranslationStage:
+    """
+    Translates TTS text without blocking the event loop.
+
+    Translations are kept in an LRU cache keyed by (text, target language).
+    Texts missing from the cache are translated together in one batch, with
+    the provider's non-blocking client when it has one and in a dedicated
+    thread pool otherwise. A batch that takes longer than `timeout` falls back
+    to the untranslated text, so a slow or unreachable provider delays speech
+    by at most `timeout` instead of stalling the conversation.
+    """
+
+    def __init__(
+        self,
+        translator: TranslateInterface,
+        cache_size: int = 512,
+        timeout: float = 3.0,
+        batch_size: int = 8,
+        max_workers: int = 2,
+    ):
+        """
+        Args:
+            translator: Provider doing the actual translation
+            cache_size: Maximum number of cached translations
+            timeout: Seconds to wait for one batch before giving up on it
+            batch_size: Maximum number of sentences translated together
+            max_workers: Threads running blocking translators
+        """
+        self.translator = translator
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.batch_size = batch_size
+        # Own pool, so a hanging provider cannot starve the default executor
+        self._executor = (
+            None
+            if translator.native_async
+            else ThreadPoolExecutor(max_workers, thread_name_prefix="translate")
+        )
+        self._cache: "OrderedDict[tuple[str, str], str]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def target_lang(self) -> str:
+        return self.translator.target_lang
+
+    def stats(self) -> dict:
+        """Cache and fallback counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "batches": self.batches,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "entries": len(self._cache),
+        }
+
+    # ==== cache
+
+    def _lookup(self, text: str) -> Optional[str]:
+        key = (text, self.target_lang)
+        translated = self._cache.get(key)
+        if translated is not None:
+            self._cache.move_to_end(key)
+        return translated
+
+    def _remember(self, text: str, translated: str) -> None:
+        self._cache[(text, self.target_lang)] = translated
+        self._cache.move_to_end((text, self.target_lang))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ==== translation
+
+    async def _call_translator(self, texts: list[str]) -> list[str]:
+        if self.translator.native_async:
+            return await self.translator.async_translate_batch(texts)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.translator.translate_batch, texts
+        )
+
+    async def translate_batch(self, texts: list[str]) -> list[str]:
+        """
+        Translate several texts, in order. Texts that could not be translated
+        in time, or at all, are returned unchanged and are not cached.
+        """
+        results = list(texts)
+        missing: dict[str, list[int]] = {}
+        for index, text in enumerate(texts):
+            if not text.strip():
+                continue
+            translated = self._lookup(text)
+            if translated is None:
+                missing.setdefault(text, []).append(index)
+            else:
+                self.hits += 1
+                results[index] = translated
+        if not missing:
+            return results
+
+        pending = list(missing)
+        self.misses += len(pending)
+        self.batches += 1
+        try:
+            translated = await asyncio.wait_for(
+                self._call_translator(pending), self.timeout
+            )
+        except asyncio.TimeoutError:
+            # A blocking call keeps its thread until it returns, its result is dropped
+            self.timeouts += 1
+            logger.warning(
+                f"Translation of {len(pending)} sentence(s) timed out after "
+                f"{self.timeout}s, speaking the original text"
+            )
+            return results
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error translating: {e}, speaking the original text")
+            return results
+
+        for text, translation in zip(pending, translated):
+            self._remember(text, translation)
+            for index in missing[text]:
+                results[index] = translation
+        logger.debug(f"Translated {len(pending)} sentence(s) to {self.target_lang}")
+        return results
+
+    async def translate(self, text: str) -> str:
+        """Translate one text, see translate_batch"""
+        return (await self.translate_batch([text]))[0]
+
+    async def stream(
+        self, sentences: AsyncIterator[dict], key: str = "tts_text"
+    ) -> AsyncIterator[dict]:
+        """
+        Translate `key` of each sentence while the next ones are produced.
+
+        Sentences that arrive while a batch is being translated are translated
+        together in the next batch, up to `batch_size`, so a fast producer
+        costs one call per batch instead of one per sentence. Order is kept.
+
+        Args:
+            sentences: Sentence dicts, e.g. from split_sentences
+            key: Field holding the text to translate. Other fields are kept.
+
+        Yields:
+            dict: The sentences with `key` translated
+        """
+        ready: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async for sentence in sentences:
+                    await ready.put(sentence)
+            finally:
+                await ready.put(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            finished = False
+            while not finished:
+                batch = [await ready.get()]
+                while len(batch) < self.batch_size and not ready.empty():
+                    batch.append(ready.get_nowait())
+                if batch[-1] is done:
+                    batch.pop()
+                    finished = True
+                if not batch:
+                    continue
+
+                texts = [sentence.get(key) or "" for sentence in batch]
+                translated = await self.translate_batch(texts)
+                for sentence, text in zip(batch, translated):
+                    if sentence.get(key):
+                        sentence = {**sentence, key: text}
+                    yield sentence
+            # Re-raise an error of the producer
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def close(self) -> None:
+        """Shut down the thread pool and close the provider's clients"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        await self.translator.aclose()
@@ -0,0 +1,81 @@
+from typing import AsyncIterator
+
+from edge_tts import Communicate
+from loguru import logger
+
+DEFAULT_VOICE = "vi-VN-HoaiMyNeural"
+
+
+class EdgeTTSEngine:
+    """
+    Text-to-speech engine backed by edge-tts.
+
+    Audio is kept in memory: callers either consume the encoded chunks as they
+    arrive from the edge-tts service or collect the whole clip as bytes. Nothing
+    is written to disk.
+    """
+
+    def __init__(
+        self,
+        voice: str = DEFAULT_VOICE,
+        rate: str = "+0%",
+        pitch: str = "+0Hz",
+        volume: str = "+0%",
+    ):
+        """
+        Initialize the edge-tts engine
+
+        Args:
+            voice: Voice name (use 'edge-tts --list-voices' to list available voices)
+            rate: Speaking rate adjustment, e.g. "+10%"
+            pitch: Pitch adjustment, e.g. "-5Hz"
+            volume: Volume adjustment, e.g. "+0%"
+        """
+        self.voice = voice
+        self.rate = rate
+        self.pitch = pitch
+        self.volume = volume
+        logger.info(f"Initialized EdgeTTSEngine with voice: {voice}")
+
+    def cache_settings(self) -> dict:
+        """Settings that change the synthesized audio, used in cache keys"""
+        return {
+            "engine": "edge_tts",
+            "voice": self.voice,
+            "rate": self.rate,
+            "pitch": self.pitch,
+            "volume": self.volume,
+        }
+
+    async def stream_audio(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Synthesize text and yield the encoded (mp3) audio chunks as soon as
+        edge-tts delivers them.
+
+        Args:
+            text: Text to synthesize
+
+        Yields:
+            bytes: Encoded audio chunks in playback order
+        """
+        communicate = Communicate(
+            text, self.voice, rate=self.rate, pitch=self.pitch, volume=self.volume
+        )
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+
+    async def async_generate_audio(self, text: str) -> bytes:
+        """
+        Synthesize text and return the complete encoded (mp3) clip.
+
+        Args:
+            text: Text to synthesize
+
+        Returns:
+            bytes: The encoded audio
+        """
+        audio = bytearray()
+        async for chunk in self.stream_audio(text):
+            audio += chunk
+        return bytes(audio)
@@ -0,0 +1,313 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from ..utils.stream_audio import (
+    STREAMING_DATA_SIZE,
+    get_volumes_from_bytes,
+    load_pcm_payload,
+    make_wav_header,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class CachedAudio:
+    """Encoded audio and its precomputed volume envelope"""
+
+    audio: bytes
+    volumes: list
+
+    @property
+    def size(self) -> int:
+        return len(self.audio) + 8 * len(self.volumes)
+
+
+def normalize_tts_text(text: str) -> str:
+    """Normalize text so trivially different spellings share a cache entry"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized audio.
+
+    Entries are keyed by the normalized TTS text and the engine settings
+    (voice, rate, pitch...). A memory tier with entry and byte limits sits in
+    front of an optional on-disk tier with a byte limit. Both evict the least
+    recently used entries first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = "./cache/tts",
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of entries in memory
+            max_bytes: Maximum audio bytes held in memory
+            cache_dir: Directory of the disk tier. None disables it.
+            max_disk_bytes: Maximum audio bytes stored on disk
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+        self._memory: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(text: str, settings: dict) -> str:
+        """Build the cache key of a text for the given engine settings"""
+        material = json.dumps(
+            [normalize_tts_text(text), settings], sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current sizes of both tiers"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._memory),
+            "bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # ==== memory tier
+
+    def _remember(self, key: str, entry: CachedAudio) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        while self._memory and (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+            self.evictions += 1
+
+    # ==== disk tier
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}.audio", self.cache_dir / f"{key}.json"
+
+    def _load_disk_index(self) -> None:
+        """Index the existing disk entries from least to most recently used"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(
+                self.cache_dir.glob("*.audio"), key=lambda p: p.stat().st_mtime
+            )
+        except OSError as e:
+            logger.warning(f"TTS disk cache disabled, cannot use {self.cache_dir}: {e}")
+            self.cache_dir = None
+            return
+        for path in files:
+            size = path.stat().st_size
+            self._disk[path.stem] = size
+            self._disk_bytes += size
+        logger.info(f"TTS disk cache: {len(self._disk)} entries in {self.cache_dir}")
+
+    def _read_disk(self, key: str) -> Optional[CachedAudio]:
+        audio_path, meta_path = self._paths(key)
+        try:
+            audio = audio_path.read_bytes()
+            volumes = json.loads(meta_path.read_text(encoding="utf-8"))["volumes"]
+            os.utime(audio_path)
+            return CachedAudio(audio, volumes)
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Unreadable TTS cache entry {key}: {e}")
+            self._unlink(key)
+            return None
+
+    def _write_disk(self, key: str, entry: CachedAudio, evicted: list) -> None:
+        audio_path, meta_path = self._paths(key)
+        tmp_path = audio_path.with_suffix(".tmp")
+        tmp_path.write_bytes(entry.audio)
+        meta_path.write_text(json.dumps({"volumes": entry.volumes}), encoding="utf-8")
+        os.replace(tmp_path, audio_path)
+        for old_key in evicted:
+            self._unlink(old_key)
+
+    def _unlink(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.debug(f"Failed to remove TTS cache file {path}: {e}")
+
+    # ==== public api
+
+    def peek(self, key: str) -> Optional[CachedAudio]:
+        """Memory-only lookup that does not touch the counters"""
+        return self._memory.get(key)
+
+    async def get(self, key: str) -> Optional[CachedAudio]:
+        """Look an entry up in memory, then on disk. Disk hits are promoted."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        if self.cache_dir and key in self._disk:
+            self._disk.move_to_end(key)
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is None:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            else:
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, entry: CachedAudio) -> None:
+        """Store an entry in memory and on disk"""
+        self._remember(key, entry)
+        if not self.cache_dir:
+            return
+        size = len(entry.audio)
+        if size > self.max_disk_bytes:
+            return
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = size
+        self._disk_bytes += size
+        # Pick the least recently used entries to evict before writing
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes:
+            old_key, old_size = self._disk.popitem(last=False)
+            self._disk_bytes -= old_size
+            evicted.append(old_key)
+        self.evictions += len(evicted)
+        try:
+            await asyncio.to_thread(self._write_disk, key, entry, evicted)
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+            self._disk_bytes -= self._disk.pop(key, 0)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        self._memory.clear()
+        self._memory_bytes = 0
+        for key in self._disk:
+            self._unlink(key)
+        self._disk.clear()
+        self._disk_bytes = 0
+
+
+class CachedTTSEngine:
+    """
+    Wraps a TTS engine with a TTSCache. Cache hits are served without calling
+    the engine. Misses are streamed through unchanged and stored once complete,
+    together with their volume envelope.
+
+    Engines yielding raw PCM declare it with a `pcm_format` attribute
+    (PcmFormat). Their samples are passed through untouched behind a WAV
+    header, and the envelope is computed on them directly, without ffmpeg.
+    """
+
+    def __init__(self, tts_engine, cache: Optional[TTSCache] = None, chunk_length_ms: int = 20):
+        """
+        Args:
+            tts_engine: Engine exposing `stream_audio(text)`
+            cache: Cache to use. Defaults to a new TTSCache.
+            chunk_length_ms: Slice length of the precomputed volumes
+        """
+        self.tts_engine = tts_engine
+        self.cache = cache or TTSCache()
+        self.chunk_length_ms = chunk_length_ms
+
+    def cache_settings(self) -> dict:
+        settings = getattr(self.tts_engine, "cache_settings", None)
+        settings = settings() if settings else {"engine": type(self.tts_engine).__name__}
+        return {**settings, "slice_length": self.chunk_length_ms}
+
+    def _key(self, text: str) -> str:
+        return TTSCache.make_key(text, self.cache_settings())
+
+    async def stream_audio(self, text: str) -> AsyncIterator[bytes]:
+        """Yield the cached clip on a hit, otherwise stream and cache the synthesis"""
+        key = self._key(text)
+        entry = await self.cache.get(key)
+        if entry is not None:
+            logger.debug(f"TTS cache hit: {text}")
+            yield entry.audio
+            return
+
+        pcm_format = getattr(self.tts_engine, "pcm_format", None)
+        if pcm_format:
+            # The length is unknown until synthesis ends
+            yield make_wav_header(STREAMING_DATA_SIZE, *pcm_format)
+
+        audio = bytearray()
+        async for chunk in self.tts_engine.stream_audio(text):
+            audio += chunk
+            yield chunk
+
+        if audio:
+            if pcm_format:
+                entry = await asyncio.to_thread(self._load_pcm, bytes(audio), pcm_format)
+            else:
+                volumes = await asyncio.to_thread(
+                    get_volumes_from_bytes, bytes(audio), self.chunk_length_ms
+                )
+                entry = CachedAudio(bytes(audio), volumes)
+            await self.cache.put(key, entry)
+
+    def _load_pcm(self, pcm: bytes, pcm_format) -> CachedAudio:
+        """Cache entry of raw PCM: the samples behind a header with their size"""
+        try:
+            payload, wav = load_pcm_payload(pcm, pcm_format, self.chunk_length_ms)
+            return CachedAudio(wav, payload["volumes"])
+        except ValueError as e:
+            logger.debug(f"Could not compute volumes from PCM: {e}")
+            return CachedAudio(make_wav_header(len(pcm), *pcm_format) + pcm, [])
+
+    async def async_generate_audio(self, text: str) -> bytes:
+        """Synthesize text, or fetch it from the cache, as one clip"""
+        audio = bytearray()
+        async for chunk in self.stream_audio(text):
+            audio += chunk
+        return bytes(audio)
+
+    def volumes_for(self, text: str) -> Optional[list]:
+        """Volumes of a clip that was just synthesized or served from cache"""
+        entry = self.cache.peek(self._key(text))
+        return entry.volumes if entry else None
@@ -0,0 +1,165 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from loguru import logger
+
+from ..metrics import get_metrics
+
+# Number of sentences synthesized ahead of the one being sent
+DEFAULT_LOOKAHEAD = 2
+
+
+@dataclass
+class TTSJob:
+    """
+    A sentence scheduled for synthesis.
+
+    Attributes:
+        seq: Position of the sentence in the response, starting at 0
+        tts_text: Text sent to the TTS engine. Empty for display-only sentences.
+        payload: Frame fields to send with the audio (type, text, actions...)
+        volumes: Volume envelope of the audio, when the engine provides one
+    """
+
+    seq: int
+    tts_text: str
+    payload: dict
+    volumes: Optional[list] = None
+    _chunks: asyncio.Queue = field(default_factory=asyncio.Queue, repr=False)
+    _error: Optional[BaseException] = field(default=None, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _has_slot: bool = field(default=False, repr=False)
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """
+        Yield the encoded audio chunks as the engine produces them.
+        Chunks synthesized ahead of time are yielded immediately.
+
+        Raises:
+            The synthesis error, once the chunks produced before it are consumed
+        """
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+        if self._error is not None:
+            raise self._error
+
+    async def audio(self) -> bytes:
+        """Wait for the synthesis to finish and return the complete clip"""
+        audio = bytearray()
+        async for chunk in self.iter_chunks():
+            audio += chunk
+        return bytes(audio)
+
+
+class TTSPipeline:
+    """
+    Synthesizes the sentences of a response while earlier sentences are still
+    being sent and played.
+
+    Sentences are read from the input stream as soon as they are available, so
+    the LLM is never blocked by synthesis. At most `max_lookahead` sentences are
+    synthesized ahead of the one currently being sent, which bounds both the
+    concurrent TTS calls and the audio held in memory. Sentences are handed to
+    the consumer strictly in sequence order.
+    """
+
+    def __init__(self, tts_engine, max_lookahead: int = DEFAULT_LOOKAHEAD):
+        """
+        Args:
+            tts_engine: Engine exposing `stream_audio(text) -> AsyncIterator[bytes]`
+            max_lookahead: Sentences synthesized ahead of the one being sent
+        """
+        if max_lookahead < 0:
+            raise ValueError("max_lookahead must be >= 0")
+        self.tts_engine = tts_engine
+        self.max_lookahead = max_lookahead
+        # Sentences received and not fully handed to the consumer yet
+        self.backlog = 0
+
+    async def _synthesize(self, job: TTSJob, slots: asyncio.Semaphore) -> None:
+        """Fill the job's chunk queue. Slots are released by the consumer."""
+        await slots.acquire()
+        job._has_slot = True
+        metrics = get_metrics()
+        try:
+            if job.tts_text:
+                metrics.mark("tts_start")
+                with metrics.span("tts"):
+                    async for chunk in self.tts_engine.stream_audio(job.tts_text):
+                        job._chunks.put_nowait(chunk)
+                metrics.mark("tts_end")
+                # Cached engines know the volume envelope of what they served
+                volumes_for = getattr(self.tts_engine, "volumes_for", None)
+                if volumes_for:
+                    job.volumes = volumes_for(job.tts_text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"TTS failed for sentence {job.seq}: {e}")
+            job._error = e
+        finally:
+            job._chunks.put_nowait(None)
+
+    async def run(
+        self,
+        sentences: AsyncIterator[dict],
+        consume: Callable[[TTSJob], Awaitable[None]],
+    ) -> int:
+        """
+        Synthesize and hand over every sentence of the stream.
+
+        Args:
+            sentences: Stream of dicts with `tts_text` (text to synthesize) and
+                the remaining keys forming the frame payload
+            consume: Coroutine function sending one job to the client. It is
+                called once per sentence, in order.
+
+        Returns:
+            int: The number of sentences processed
+        """
+        jobs: asyncio.Queue = asyncio.Queue()
+        # One slot for the sentence being sent plus the look-ahead
+        slots = asyncio.Semaphore(self.max_lookahead + 1)
+        pending: list[TTSJob] = []
+
+        async def produce():
+            seq = 0
+            try:
+                async for sentence in sentences:
+                    payload = dict(sentence)
+                    tts_text = payload.pop("tts_text", "") or ""
+                    job = TTSJob(seq=seq, tts_text=tts_text, payload=payload)
+                    job._task = asyncio.create_task(self._synthesize(job, slots))
+                    pending.append(job)
+                    jobs.put_nowait(job)
+                    self.backlog += 1
+                    seq += 1
+            finally:
+                jobs.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        count = 0
+        try:
+            while (job := await jobs.get()) is not None:
+                try:
+                    await consume(job)
+                finally:
+                    if not job._task.done():
+                        job._task.cancel()
+                    if job._has_slot:
+                        slots.release()
+                    self.backlog -= 1
+                count += 1
+            await producer
+        finally:
+            self.backlog = 0
+            if not producer.done():
+                producer.cancel()
+            for job in pending:
+                if job._task and not job._task.done():
+                    job._task.cancel()
+        return count
@@ -0,0 +1,134 @@
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+IDLE = "idle"
+NORMAL = "normal"
+BUSY = "busy"
+
+
+class AdaptiveFlushPolicy:
+    """
+    Decides how SentenceDivider cuts a streamed response into TTS chunks,
+    based on the TTS backlog: the number of sentences handed to the TTS
+    pipeline and not sent to the client yet.
+
+    - idle: TTS has spare capacity. The buffer is checked after fewer
+      characters and any sentence may be split at its first comma, so audio
+      starts as early as possible.
+    - busy: synthesis is behind. Consecutive sentences are merged up to
+      `max_coalesced_length` characters, so fewer and longer TTS calls are made.
+    - normal: the divider behaves as without a policy.
+
+    One policy is meant to live as long as a voice is used, so its stats can
+    be compared across voices when tuning latency against throughput. It is
+    shared by concurrent conversation chains: the backlog source is a
+    context variable, so each chain's task (and the tasks it creates, such
+    as the agent stream) reads the backlog of its own TTS pipeline.
+    """
+
+    def __init__(
+        self,
+        idle_backlog: int = 1,
+        busy_backlog: int = 3,
+        idle_threshold: int = 10,
+        threshold: int = 25,
+        busy_threshold: int = 60,
+        max_coalesced_length: int = 200,
+    ):
+        """
+        Args:
+            idle_backlog: Backlog at or below which TTS counts as idle
+            busy_backlog: Backlog at or above which TTS counts as busy
+            idle_threshold: Buffered characters before looking for a boundary when idle
+            threshold: Buffered characters before looking for a boundary otherwise
+            busy_threshold: Buffered characters before looking for a boundary when busy
+            max_coalesced_length: Maximum length of merged sentences when busy
+        """
+        if idle_backlog >= busy_backlog:
+            raise ValueError("idle_backlog must be lower than busy_backlog")
+        self.idle_backlog = idle_backlog
+        self.busy_backlog = busy_backlog
+        self.thresholds = {
+            IDLE: idle_threshold,
+            NORMAL: threshold,
+            BUSY: busy_threshold,
+        }
+        self.max_coalesced_length = max_coalesced_length
+        self._backlog: ContextVar[Optional[Callable[[], int]]] = ContextVar(
+            "flush_backlog", default=None
+        )
+        self.reset_stats()
+
+    def attach(self, backlog: Callable[[], int]) -> None:
+        """Set the function reporting the TTS backlog in the current context"""
+        self._backlog.set(backlog)
+
+    def backlog(self) -> int:
+        """Current TTS backlog, 0 when no pipeline is attached in this context"""
+        source = self._backlog.get()
+        depth = source() if source else 0
+        if depth > self._max_backlog:
+            self._max_backlog = depth
+        return depth
+
+    @property
+    def mode(self) -> str:
+        depth = self.backlog()
+        if depth <= self.idle_backlog:
+            return IDLE
+        if depth >= self.busy_backlog:
+            return BUSY
+        return NORMAL
+
+    # ==== decisions
+
+    def flush_threshold(self) -> int:
+        """Buffered characters after which the divider looks for a boundary"""
+        return self.thresholds[self.mode]
+
+    def split_at_commas(self, first_sentence: bool) -> bool:
+        """
+        Whether the current sentence may be cut at its first comma.
+
+        Args:
+            first_sentence: The divider would split it anyway (first sentence
+                with faster_first_response)
+        """
+        mode = self.mode
+        return mode == IDLE or (mode == NORMAL and first_sentence)
+
+    def should_coalesce(self, length: int) -> bool:
+        """Whether a sentence of this length should wait for the next one"""
+        return length < self.max_coalesced_length and self.mode == BUSY
+
+    # ==== stats
+
+    def record_chunk(self, text: str, sentences: int = 1) -> None:
+        """Count a chunk emitted by the divider, made of one or more sentences"""
+        mode = self.mode
+        self._chunks[mode] += 1
+        self._chars[mode] += len(text)
+        self._coalesced += sentences - 1
+
+    def record_comma_split(self) -> None:
+        self._comma_splits += 1
+
+    def stats(self) -> dict:
+        """Decision counters, per backlog mode where relevant"""
+        return {
+            "chunks": dict(self._chunks),
+            "avg_chunk_length": {
+                mode: self._chars[mode] / count if count else 0.0
+                for mode, count in self._chunks.items()
+            },
+            "comma_splits": self._comma_splits,
+            "coalesced_sentences": self._coalesced,
+            "max_backlog": self._max_backlog,
+        }
+
+    def reset_stats(self) -> None:
+        self._chunks = {IDLE: 0, NORMAL: 0, BUSY: 0}
+        self._chars = {IDLE: 0, NORMAL: 0, BUSY: 0}
+        self._comma_splits = 0
+        self._coalesced = 0
+        self._max_backlog = 0
@@ -1,11 +1,15 @@
 import re
-from typing import List, Tuple, AsyncIterator, Optional
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Tuple, AsyncIterator, Optional, Union
 import pysbd
 from loguru import logger
 from langdetect import detect
 from enum import Enum
 from dataclasses import dataclass
 
+from .flush_policy import AdaptiveFlushPolicy
+
 # Constants for additional checks
 COMMAS = [
     ",",
@@ -73,6 +77,21 @@ SUPPORTED_LANGUAGES = {
 }
 
 
+# Every END_PUNCTUATIONS entry ends with one of these characters and every
+# comma is a single character, so membership tests work per character
+_END_CHARS = frozenset("".join(END_PUNCTUATIONS))
+_COMMA_CHARS = frozenset(COMMAS)
+_PUNCTUATIONS = frozenset(COMMAS + END_PUNCTUATIONS)
+_ABBREVIATION_SUFFIXES = tuple(ABBREVIATIONS)
+_SENTENCE_END = re.compile("[" + re.escape("".join(sorted(_END_CHARS))) + "]")
+
+# Language value that asks for detection from the text itself
+AUTO_DETECT = "auto"
+
+# Shorter text gives unreliable language detection results
+MIN_DETECT_LENGTH = 20
+
+
 def detect_language(text: str) -> str:
     """
     Detect text language and check if it's supported by pysbd.
@@ -86,6 +105,15 @@ def detect_language(text: str) -> str:
         return None
 
 
+@lru_cache(maxsize=None)
+def get_segmenter(lang: str) -> pysbd.Segmenter:
+    """
+    Get the pysbd Segmenter of a language. Segmenters are created once per
+    language and reused, segment() keeps no state between calls.
+    """
+    return pysbd.Segmenter(language=lang, clean=False)
+
+
 def is_complete_sentence(text: str) -> bool:
     """
     Check if text ends with sentence-ending punctuation and not abbreviation.
@@ -100,10 +128,10 @@ def is_complete_sentence(text: str) -> bool:
     if not text:
         return False
 
-    if any(text.endswith(abbrev) for abbrev in ABBREVIATIONS):
+    if text.endswith(_ABBREVIATION_SUFFIXES):
         return False
 
-    return any(text.endswith(punct) for punct in END_PUNCTUATIONS)
+    return text[-1] in _END_CHARS
 
 
 def contains_comma(text: str) -> bool:
@@ -116,7 +144,7 @@ def contains_comma(text: str) -> bool:
     Returns:
         bool: Whether the text contains a comma
     """
-    return any(comma in text for comma in COMMAS)
+    return not _COMMA_CHARS.isdisjoint(text)
 
 
 def comma_splitter(text: str) -> Tuple[str, str]:
@@ -151,7 +179,7 @@ def is_punctuation(text: str) -> bool:
     Returns:
         bool: Whether the text is a punctuation mark
     """
-    return text in COMMAS or text in END_PUNCTUATIONS
+    return text in _PUNCTUATIONS
 
 
 def contains_end_punctuation(text: str) -> bool:
@@ -164,7 +192,7 @@ def contains_end_punctuation(text: str) -> bool:
     Returns:
         bool: Whether the text contains ending punctuation
     """
-    return any(punct in text for punct in END_PUNCTUATIONS)
+    return not _END_CHARS.isdisjoint(text)
 
 
 def segment_text_by_regex(text: str) -> Tuple[List[str], str]:
@@ -172,6 +200,9 @@ def segment_text_by_regex(text: str) -> Tuple[List[str], str]:
     Segment text into complete sentences using regex pattern matching.
     More efficient but less accurate than pysbd.
 
+    Every end punctuation character ends a sentence, except when the sentence
+    then ends with an abbreviation ("Mr."): it continues up to the next one.
+
     Args:
         text: Text to segment into sentences
 
@@ -182,38 +213,31 @@ def segment_text_by_regex(text: str) -> Tuple[List[str], str]:
         return [], ""
 
     complete_sentences = []
-    remaining_text = text.strip()
-
-    # Create pattern for matching sentences ending with any end punctuation
-    escaped_punctuations = [re.escape(p) for p in END_PUNCTUATIONS]
-    pattern = r"(.*?(?:[" + "|".join(escaped_punctuations) + r"]))"
-
-    while remaining_text:
-        match = re.search(pattern, remaining_text)
-        if not match:
-            break
-
-        end_pos = match.end(1)
-        potential_sentence = remaining_text[:end_pos].strip()
+    text = text.strip()
+    start = 0
 
-        # Skip if sentence ends with abbreviation
-        if any(potential_sentence.endswith(abbrev) for abbrev in ABBREVIATIONS):
-            remaining_text = remaining_text[end_pos:].lstrip()
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        sentence = text[start:end].strip()
+        if sentence.endswith(_ABBREVIATION_SUFFIXES):
             continue
+        complete_sentences.append(sentence)
+        start = end
 
-        complete_sentences.append(potential_sentence)
-        remaining_text = remaining_text[end_pos:].lstrip()
-
-    return complete_sentences, remaining_text
+    return complete_sentences, text[start:].lstrip()
 
 
-def segment_text_by_pysbd(text: str) -> Tuple[List[str], str]:
+def segment_text_by_pysbd(
+    text: str, lang: Optional[str] = AUTO_DETECT
+) -> Tuple[List[str], str]:
     """
     Segment text into complete sentences and remaining text.
     Uses pysbd for supported languages, falls back to regex for others.
 
     Args:
         text: Text to segment into sentences
+        lang: Language of the text. AUTO_DETECT detects it from the text,
+            None or an unsupported language uses regex.
 
     Returns:
         Tuple[List[str], str]: (list of complete sentences, remaining incomplete text)
@@ -222,13 +246,14 @@ def segment_text_by_pysbd(text: str) -> Tuple[List[str], str]:
         return [], ""
 
     try:
-        # Detect language
-        lang = detect_language(text)
+        if lang == AUTO_DETECT:
+            lang = detect_language(text)
+        elif lang not in SUPPORTED_LANGUAGES:
+            lang = None
 
         if lang is not None:
             # Use pysbd for supported languages
-            segmenter = pysbd.Segmenter(language=lang, clean=False)
-            sentences = segmenter.segment(text)
+            sentences = get_segmenter(lang).segment(text)
 
             if not sentences:
                 return [], text
@@ -263,6 +288,100 @@ def segment_text_by_pysbd(text: str) -> Tuple[List[str], str]:
         return segment_text_by_regex(text)
 
 
+class SegmenterInterface(ABC):
+    """
+    Splits buffered text into complete sentences and an unfinished rest.
+    Implementations are registered by name with `register_segmenter` and
+    selected through SentenceDivider's `segment_method`.
+    """
+
+    # Whether segment() needs the language of the stream
+    uses_language: bool = False
+
+    @abstractmethod
+    def segment(self, text: str, lang: Optional[str] = None) -> Tuple[List[str], str]:
+        """
+        Args:
+            text: Text to segment into sentences
+            lang: Language of the stream, when uses_language is set
+
+        Returns:
+            Tuple[List[str], str]: (list of complete sentences, remaining incomplete text)
+        """
+
+
+class RegexSegmenter(SegmenterInterface):
+    """Splits at end punctuation, see `segment_text_by_regex`"""
+
+    def segment(self, text: str, lang: Optional[str] = None) -> Tuple[List[str], str]:
+        return segment_text_by_regex(text)
+
+
+class PysbdSegmenter(SegmenterInterface):
+    """pysbd for the languages it supports, regex for the others"""
+
+    uses_language = True
+
+    def segment(
+        self, text: str, lang: Optional[str] = AUTO_DETECT
+    ) -> Tuple[List[str], str]:
+        return segment_text_by_pysbd(text, lang)
+
+
+_SEGMENTERS: Dict[str, SegmenterInterface] = {
+    "regex": RegexSegmenter(),
+    "pysbd": PysbdSegmenter(),
+}
+
+
+def register_segmenter(name: str, segmenter: SegmenterInterface) -> None:
+    """Make a segmenter available as a SentenceDivider segment_method"""
+    _SEGMENTERS[name] = segmenter
+
+
+def get_segmenter_backend(name: str) -> SegmenterInterface:
+    """Get a registered segmenter. Unknown names fall back to pysbd."""
+    segmenter = _SEGMENTERS.get(name)
+    if segmenter is None:
+        logger.warning(f"Unknown segment method '{name}', using pysbd")
+        segmenter = _SEGMENTERS["pysbd"]
+    return segmenter
+
+
+@lru_cache(maxsize=None)
+def compile_tag_patterns(valid_tags: Tuple[str, ...]) -> Tuple[re.Pattern, re.Pattern]:
+    """
+    Build the tag scanners for a set of tag names, once per set.
+
+    Returns:
+        Tuple[re.Pattern, re.Pattern]: A pattern matching any complete tag
+        (<tag>, </tag> or <tag/>) in a single pass, and a pattern matching the
+        start of an opening or self-closing tag (<tag)
+    """
+    # Longest names first, so a name that prefixes another cannot shadow it
+    names = "|".join(
+        re.escape(tag) for tag in sorted(set(valid_tags), key=len, reverse=True)
+    )
+    tag_pattern = re.compile(
+        rf"<(?:/(?P<end>{names})|(?P<name>{names})(?P<self>/)?)>"
+    )
+    opening_pattern = re.compile(rf"<(?:{names})")
+    return tag_pattern, opening_pattern
+
+
+# Characters that can end a sentence, split the first one or close a tag.
+# Buffered text without any of them cannot produce output.
+_TRIGGER_CHARS = frozenset("".join(END_PUNCTUATIONS) + "".join(COMMAS) + ">")
+
+_NON_SPACE = re.compile(r"\S")
+
+
+def _skip_space(text: str, pos: int) -> int:
+    """Position of the first non-whitespace character of text from pos on"""
+    match = _NON_SPACE.search(text, pos)
+    return match.start() if match else len(text)
+
+
 class TagState(Enum):
     """State of a tag in text"""
 
@@ -299,22 +418,60 @@ class SentenceDivider:
     def __init__(
         self,
         faster_first_response: bool = True,
-        segment_method: str = "pysbd",
+        segment_method: Union[str, SegmenterInterface] = "pysbd",
         valid_tags: List[str] = None,
+        language: Optional[str] = None,
+        flush_policy: Optional[AdaptiveFlushPolicy] = None,
     ):
         """
         Initialize the SentenceDivider.
 
         Args:
             faster_first_response: Whether to split first sentence at commas
-            segment_method: Method for segmenting sentences
+            segment_method: Name of a registered segmenter ("pysbd", "regex")
+                or a segmenter instance
             valid_tags: List of valid tag names to detect
+            language: Language of the responses for pysbd, e.g. from the
+                character config. None detects it once per response stream.
+            flush_policy: Adapts chunk sizes to the TTS backlog. None keeps
+                the fixed flush threshold and first-comma split.
         """
         self.faster_first_response = faster_first_response
         self.segment_method = segment_method
+        self._segmenter = (
+            segment_method
+            if isinstance(segment_method, SegmenterInterface)
+            else get_segmenter_backend(segment_method)
+        )
+        self.language = language
+        self._language = language or AUTO_DETECT
+        self.flush_policy = flush_policy
         self.valid_tags = valid_tags or ["think"]
+        self._tag_pattern, self._opening_pattern = compile_tag_patterns(
+            tuple(self.valid_tags)
+        )
+        # Longest "<tag" prefix, i.e. how far back a new token can complete one
+        self._opening_length = max(len(tag) for tag in self.valid_tags) + 1
         self._is_first_sentence = True
-        self._buffer = ""
+        # Tokens of the current response, only ever appended to
+        self._tokens: List[str] = []
+        # Committed cursor: text before it was emitted. Token index and the
+        # character offset within that token.
+        self._committed_token = 0
+        self._committed_char = 0
+        # Uncommitted text the segmenter returned modified, so it is not a
+        # slice of the tokens. It comes before the tokens after the cursor.
+        self._carry = ""
+        # Length of the uncommitted text
+        self._pending_length = 0
+        # End of the scanned text, to find a "<tag" split across tokens
+        self._scan_tail = ""
+        self._opening_pending = False
+        # Punctuation or ">" arrived since the buffer was last processed
+        self._dirty = False
+        # Sentence waiting to be merged with the next ones, and its size
+        self._held: Optional[SentenceWithTags] = None
+        self._held_count = 0
         # Replace active_tags dict with a stack to handle nesting
         self._tag_stack = []
 
@@ -336,191 +493,262 @@ class SentenceDivider:
         """
         return self._tag_stack[-1] if self._tag_stack else None
 
-    def _extract_tag(self, text: str) -> Tuple[Optional[TagInfo], str]:
+    def _apply_tag(self, match: re.Match) -> TagInfo:
         """
-        Extract the first tag from text if present.
-        Handles nested tags by maintaining a tag stack.
+        Update the tag stack for a tag matched by the tag pattern.
 
         Args:
-            text: Text to check for tags
+            match: Match of the tag pattern
 
         Returns:
-            Tuple of (TagInfo if tag found else None, remaining text)
+            TagInfo: The tag and its state
         """
-        # Find the first occurrence of any tag
-        first_tag = None
-        first_pos = len(text)
-        tag_type = None
-        matched_tag = None
-
-        # Check for self-closing tags
-        for tag in self.valid_tags:
-            pattern = f"<{tag}/>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.SELF_CLOSING
-                matched_tag = tag
-
-        # Check for opening tags
-        for tag in self.valid_tags:
-            pattern = f"<{tag}>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.START
-                matched_tag = tag
-
-        # Check for closing tags
-        for tag in self.valid_tags:
-            pattern = f"</{tag}>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.END
-                matched_tag = tag
-
-        if not first_tag:
-            return None, text
-
-        # Handle the found tag
-        if tag_type == TagState.START:
-            # Push new tag onto stack
-            self._tag_stack.append(TagInfo(matched_tag, TagState.START))
-        elif tag_type == TagState.END:
+        if match.group("end"):
+            name = match.group("end")
             # Verify matching tags
-            if not self._tag_stack or self._tag_stack[-1].name != matched_tag:
-                logger.warning(f"Mismatched closing tag: {matched_tag}")
+            if not self._tag_stack or self._tag_stack[-1].name != name:
+                logger.warning(f"Mismatched closing tag: {name}")
             else:
                 self._tag_stack.pop()
+            return TagInfo(name, TagState.END)
+
+        name = match.group("name")
+        if match.group("self"):
+            return TagInfo(name, TagState.SELF_CLOSING)
+        # Push new tag onto stack
+        self._tag_stack.append(TagInfo(name, TagState.START))
+        return TagInfo(name, TagState.START)
+
+    def _append(self, token: str) -> None:
+        """
+        Add a token to the response. Only the token itself, plus enough of
+        the previous text to complete a "<tag" split across tokens, is scanned.
+        Nothing is joined until the text needs processing.
+        """
+        self._tokens.append(token)
+        self._pending_length += len(token)
+        if not _TRIGGER_CHARS.isdisjoint(token):
+            self._dirty = True
+        scanned = self._scan_tail + token
+        if self._opening_pattern.search(scanned):
+            self._opening_pending = True
+        self._scan_tail = scanned[-(self._opening_length - 1) :]
+
+    def _uncommitted(self) -> str:
+        """Join the text after the committed cursor, the only text segmented"""
+        tail = "".join(self._tokens[self._committed_token :])
+        if self._committed_char:
+            tail = tail[self._committed_char :]
+        return self._carry + tail if self._carry else tail
+
+    def _commit(self, text: str, pos: int, carried: bool = False) -> None:
+        """
+        Move the committed cursor past the first `pos` characters of the
+        uncommitted text. Each token is stepped over once.
+
+        Args:
+            text: The uncommitted text, as processed
+            pos: Length of its emitted front
+            carried: text was replaced by a remainder that is not a slice of
+                the tokens, kept in the carry instead
+        """
+        self._pending_length = len(text) - pos
+        if carried:
+            self._carry = text[pos:]
+            self._committed_token = len(self._tokens)
+            self._committed_char = 0
+            return
+        if self._carry:
+            used = min(pos, len(self._carry))
+            self._carry = self._carry[used:]
+            pos -= used
+        while pos:
+            left = len(self._tokens[self._committed_token]) - self._committed_char
+            if pos < left:
+                self._committed_char += pos
+                return
+            pos -= left
+            self._committed_token += 1
+            self._committed_char = 0
+
+    def _commit_all(self) -> None:
+        """Mark the whole response as emitted"""
+        self._committed_token = len(self._tokens)
+        self._committed_char = 0
+        self._carry = ""
+        self._pending_length = 0
+
+    @staticmethod
+    def _remainder_start(
+        text: str, start: int, end: int, remaining: str
+    ) -> Optional[int]:
+        """
+        Find the unfinished end of text[start:end] as a position in text.
+        Segmenters return it stripped, but it stays glued to the next token.
+
+        Returns:
+            Optional[int]: Its start, end if nothing remains, or None if the
+            segmenter returned text that is not a slice of the input
+        """
+        if not remaining:
+            return end
+        stop = end
+        while stop > start and text[stop - 1].isspace():
+            stop -= 1
+        begin = stop - len(remaining)
+        if begin >= start and text.startswith(remaining, begin):
+            return begin
+        return None
 
-        return (TagInfo(matched_tag, tag_type), text[first_tag.end() :].lstrip())
+    def _sentences(
+        self, texts: List[str], tags: List[TagInfo]
+    ) -> List[SentenceWithTags]:
+        """Wrap the non-blank texts in sentences under the current tags"""
+        tags = tags or [TagInfo("", TagState.NONE)]
+        return [
+            SentenceWithTags(text=text.strip(), tags=tags)
+            for text in texts
+            if text.strip()
+        ]
 
     async def _process_buffer(self) -> List[SentenceWithTags]:
         """
-        Process the current buffer and return complete sentences with tags.
-        Handles tags that may appear anywhere in the buffer.
+        Process the uncommitted text and return complete sentences with tags.
+        Handles tags that may appear anywhere in it. The text is walked with
+        a position, sentences and tags are sliced out of it, and the committed
+        cursor is moved past them at the end.
 
         Returns:
             List[SentenceWithTags]: List of sentences with their tag information
         """
+        if not self._dirty:
+            # Nothing that could end a sentence or a tag arrived
+            return []
+        self._dirty = False
+        text = self._uncommitted()
+        pos = _skip_space(text, 0)
+        carried = False
         result = []
 
-        while self._buffer.strip():
-            # Find the next tag position
-            next_tag_pos = len(self._buffer)
-            for tag in self.valid_tags:
-                patterns = [f"<{tag}>", f"</{tag}>", f"<{tag}/>"]
-                for pattern in patterns:
-                    pos = self._buffer.find(pattern)
-                    if pos != -1 and pos < next_tag_pos:
-                        next_tag_pos = pos
-
-            if next_tag_pos == 0:
-                # Tag is at the start of buffer
-                tag_info, remaining = self._extract_tag(self._buffer)
-                if tag_info:
-                    result.append(
-                        SentenceWithTags(
-                            text=self._buffer[
-                                : len(self._buffer) - len(remaining)
-                            ].strip(),
-                            tags=[tag_info],  # Tag itself is a single-item list
-                        )
-                    )
-                    self._buffer = remaining
-                    continue
-
-            elif next_tag_pos < len(self._buffer):
-                # Tag is in the middle - process text before tag first
-                text_before_tag = self._buffer[:next_tag_pos]
-                current_tags = self._get_current_tags()
-
-                # Process complete sentences in text before tag
-                if contains_end_punctuation(text_before_tag):
-                    sentences, remaining = self._segment_text(text_before_tag)
-                    for sentence in sentences:
-                        if sentence.strip():
-                            result.append(
-                                SentenceWithTags(
-                                    text=sentence.strip(),
-                                    tags=current_tags or [TagInfo("", TagState.NONE)],
-                                )
-                            )
-
-                    if remaining.strip():
-                        result.append(
-                            SentenceWithTags(
-                                text=remaining.strip(),
-                                tags=current_tags or [TagInfo("", TagState.NONE)],
-                            )
-                        )
-
-                elif text_before_tag.strip():
-                    # No complete sentence but has content
-                    result.append(
-                        SentenceWithTags(
-                            text=text_before_tag.strip(),
-                            tags=current_tags or [TagInfo("", TagState.NONE)],
-                        )
-                    )
-
-                # Process the tag
-                self._buffer = self._buffer[next_tag_pos:]
-                tag_info, remaining = self._extract_tag(self._buffer)
-                if tag_info:
-                    result.append(
-                        SentenceWithTags(
-                            text=self._buffer[
-                                : len(self._buffer) - len(remaining)
-                            ].strip(),
-                            tags=[tag_info],
-                        )
-                    )
-                    self._buffer = remaining
+        while pos < len(text):
+            # Find the next tag, all tag names in one pass
+            match = self._tag_pattern.search(text, pos)
+
+            if match:
+                if match.start() > pos:
+                    # Tag is in the middle - process text before tag first
+                    text_before_tag = text[pos : match.start()]
+                    current_tags = self._get_current_tags()
+
+                    # Process complete sentences in text before tag
+                    if contains_end_punctuation(text_before_tag):
+                        sentences, remaining = self._segment_text(text_before_tag)
+                        result += self._sentences(sentences + [remaining], current_tags)
+                    else:
+                        # No complete sentence but has content
+                        result += self._sentences([text_before_tag], current_tags)
+
+                # Process the tag, a single-item tag list
+                result.append(
+                    SentenceWithTags(text=match.group(0), tags=[self._apply_tag(match)])
+                )
+                pos = _skip_space(text, match.end())
                 continue
 
             # No tags found - process normal text
             current_tags = self._get_current_tags()
+            rest = text[pos:]
 
             # Handle first sentence with comma if enabled
-            if (
-                self._is_first_sentence
-                and self.faster_first_response
-                and contains_comma(self._buffer)
-            ):
-                sentence, remaining = comma_splitter(self._buffer)
-                if sentence.strip():
-                    result.append(
-                        SentenceWithTags(
-                            text=sentence.strip(),
-                            tags=current_tags or [TagInfo("", TagState.NONE)],
-                        )
-                    )
-                self._buffer = remaining
-                self._is_first_sentence = False
-                continue
-
+            if self._split_at_comma() and contains_comma(rest):
+                sentence, remaining = comma_splitter(rest)
+                if self.flush_policy:
+                    self.flush_policy.record_comma_split()
+                result += self._sentences([sentence], current_tags)
+                segmented = False
             # Process normal sentences
-            if contains_end_punctuation(self._buffer):
-                sentences, remaining = self._segment_text(self._buffer)
-                self._buffer = remaining
-                self._is_first_sentence = False
-                for sentence in sentences:
-                    if sentence.strip():
-                        result.append(
-                            SentenceWithTags(
-                                text=sentence.strip(),
-                                tags=current_tags or [TagInfo("", TagState.NONE)],
-                            )
-                        )
-            break
+            elif contains_end_punctuation(rest):
+                sentences, remaining = self._segment_text(rest)
+                result += self._sentences(sentences, current_tags)
+                segmented = True
+            else:
+                break
+            self._is_first_sentence = False
+
+            start = self._remainder_start(text, pos, len(text), remaining)
+            if start is None:
+                text, pos, carried = remaining, 0, True
+            else:
+                pos = start
+            if segmented:
+                # The segmenter went up to the end of the text
+                break
 
+        self._opening_pending = self._opening_pattern.search(text, pos) is not None
+        self._commit(text, pos, carried)
         return result
 
+    def _split_at_comma(self) -> bool:
+        """Whether the current sentence is cut at its first comma"""
+        first = self._is_first_sentence and self.faster_first_response
+        if self.flush_policy is None:
+            return first
+        return self.flush_policy.split_at_commas(first)
+
+    def _release(
+        self, sentences: List[SentenceWithTags], final: bool = False
+    ) -> List[SentenceWithTags]:
+        """
+        Merge consecutive sentences with the same tags while the flush policy
+        asks to coalesce them, and return the ones ready to be emitted.
+
+        Args:
+            sentences: Sentences produced by the last flush, in order
+            final: End of stream, nothing is held back anymore
+        """
+        policy = self.flush_policy
+        if policy is None:
+            return sentences
+
+        ready = []
+
+        def emit(sentence: SentenceWithTags, count: int = 1):
+            if not sentence.tags or sentence.tags[0].state in (
+                TagState.NONE,
+                TagState.INSIDE,
+            ):
+                policy.record_chunk(sentence.text, count)
+            ready.append(sentence)
+
+        for sentence in sentences:
+            mergeable = all(
+                tag.state in (TagState.NONE, TagState.INSIDE) for tag in sentence.tags
+            )
+            if self._held is not None:
+                merged_length = len(self._held.text) + 1 + len(sentence.text)
+                if (
+                    mergeable
+                    and sentence.tags == self._held.tags
+                    and policy.should_coalesce(merged_length)
+                ):
+                    self._held.text = f"{self._held.text} {sentence.text}"
+                    self._held_count += 1
+                    continue
+                emit(self._held, self._held_count)
+                self._held = None
+            if mergeable and not final and policy.should_coalesce(len(sentence.text)):
+                self._held = sentence
+                self._held_count = 1
+            else:
+                emit(sentence)
+
+        if self._held is not None and (
+            final or not policy.should_coalesce(len(self._held.text))
+        ):
+            emit(self._held, self._held_count)
+            self._held = None
+        return ready
+
     async def process_stream(self, token_stream) -> AsyncIterator[SentenceWithTags]:
         """
         Process a stream of tokens and yield complete sentences with tag information.
@@ -531,71 +759,102 @@ class SentenceDivider:
         Yields:
             SentenceWithTags: Complete sentences with their tag information
         """
-        self._full_response = []
+        self._tokens = []
+        self._commit_all()
+        self._language = self.language or AUTO_DETECT
         last_token_was_punct = False
         buffer_threshold = 25
 
         async for token in token_stream:
-            self._buffer += token
-            self._full_response.append(token)
+            self._append(token)
+            if self._held is not None:
+                # The TTS backlog may have dropped since the sentence was held
+                for sentence in self._release([]):
+                    yield sentence
 
             if is_punctuation(token):
                 last_token_was_punct = True
                 continue
 
+            if self.flush_policy:
+                buffer_threshold = self.flush_policy.flush_threshold()
+
             # Process buffer after punctuation, when buffer gets too long,
             # or when we see a tag
             should_process = (
                 last_token_was_punct
-                or len(self._buffer) >= buffer_threshold
-                or any(f"<{tag}" in self._buffer for tag in self.valid_tags)
+                or self._pending_length >= buffer_threshold
+                or self._opening_pending
             )
 
             if should_process:
                 last_token_was_punct = False
                 sentences = await self._process_buffer()
-                for sentence in sentences:
+                for sentence in self._release(sentences):
                     yield sentence
 
         # Process remaining text at end of stream
-        if self._buffer.strip():
-            tag_info, remaining = self._extract_tag(self._buffer)
-            if tag_info:
-                yield SentenceWithTags(
-                    text=self._buffer[: len(self._buffer) - len(remaining)].strip(),
-                    tags=[tag_info],
-                )
-                self._buffer = remaining
-
-            if self._buffer.strip():
-                sentences, remaining = self._segment_text(self._buffer)
-                current_tags = self._get_current_tags()
-
-                for sentence in sentences:
-                    if sentence.strip():
-                        yield SentenceWithTags(
-                            text=sentence.strip(),
-                            tags=current_tags or [TagInfo("", TagState.NONE)],
-                        )
-            if remaining.strip():
-                yield SentenceWithTags(
-                    text=remaining.strip(),
-                    tags=current_tags or [TagInfo("", TagState.NONE)],
+        self._dirty = False
+        text = self._uncommitted()
+        pos = _skip_space(text, 0)
+        tail = []
+        if pos < len(text):
+            match = self._tag_pattern.search(text, pos)
+            if match:
+                # The first tag, with the text before it
+                tail.append(
+                    SentenceWithTags(
+                        text=text[pos : match.end()].strip(),
+                        tags=[self._apply_tag(match)],
+                    )
                 )
+                pos = _skip_space(text, match.end())
+
+            if pos < len(text):
+                sentences, remaining = self._segment_text(text[pos:])
+                tail += self._sentences(sentences + [remaining], self._get_current_tags())
+        self._commit_all()
+        self._scan_tail = ""
+        self._opening_pending = False
+        for sentence in self._release(tail, final=True):
+            yield sentence
 
     @property
     def complete_response(self) -> str:
         """Get the complete response accumulated so far"""
-        return "".join(self._full_response)
+        return "".join(self._tokens)
 
     def _segment_text(self, text: str) -> Tuple[List[str], str]:
         """Segment text using the configured method"""
-        if self.segment_method == "regex":
-            return segment_text_by_regex(text)
-        return segment_text_by_pysbd(text)
+        if self._segmenter.uses_language:
+            return self._segmenter.segment(text, self._stream_language())
+        return self._segmenter.segment(text)
+
+    def _stream_language(self) -> Optional[str]:
+        """
+        Language used to segment the current stream. It is detected once, on
+        the response received so far as soon as it is long enough to be
+        reliable, and then kept so sentences of one response are split
+        consistently. Shorter text is split by regex without detection.
+        """
+        if self._language != AUTO_DETECT:
+            return self._language
+        response = self.complete_response.strip()
+        if len(response) < MIN_DETECT_LENGTH:
+            return None
+        self._language = detect_language(response)
+        logger.debug(f"Segmenting this response as language: {self._language}")
+        return self._language
 
     def reset(self):
         """Reset the divider state for a new conversation"""
         self._is_first_sentence = True
-        self._buffer = ""
+        self._tokens = []
+        self._commit_all()
+        self._scan_tail = ""
+        self._opening_pending = False
+        self._dirty = False
+        self._held = None
+        self._held_count = 0
+        self._language = self.language or AUTO_DETECT
         self._tag_stack = []
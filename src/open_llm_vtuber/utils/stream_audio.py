@@ -1,9 +1,49 @@
+import io
+import os
+import math
+import mmap
 import base64
+import struct
+from typing import NamedTuple
+import numpy as np
+from loguru import logger
 from pydub import AudioSegment
 from pydub.utils import make_chunks
 from ..agent.output_types import Actions
 
 
+def _get_volume_by_chunks_pydub(audio: AudioSegment, chunk_length_ms: int) -> list:
+    """
+    Reference implementation of `_get_volume_by_chunks`: one AudioSegment
+    and one `.rms` call per chunk. Kept for benchmarks and comparisons.
+    """
+    chunks = make_chunks(audio, chunk_length_ms)
+    volumes = [chunk.rms for chunk in chunks]
+    max_volume = max(volumes)
+    if max_volume == 0:
+        raise ValueError("Audio is empty or all zero.")
+    return [volume / max_volume for volume in volumes]
+
+
+def _samples_from_raw(raw_data: bytes, sample_width: int) -> np.ndarray:
+    """View raw little-endian PCM as signed samples, like audioop reads them"""
+    if sample_width == 1:
+        return np.frombuffer(raw_data, dtype=np.int8)
+    if sample_width == 2:
+        return np.frombuffer(raw_data, dtype="<i2")
+    if sample_width == 3:
+        triplets = np.frombuffer(raw_data, dtype=np.uint8).reshape(-1, 3)
+        samples = (
+            triplets[:, 0].astype(np.int32)
+            | (triplets[:, 1].astype(np.int32) << 8)
+            | (triplets[:, 2].astype(np.int32) << 16)
+        )
+        return np.where(samples & 0x800000, samples - (1 << 24), samples)
+    if sample_width == 4:
+        return np.frombuffer(raw_data, dtype="<i4")
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
 def _get_volume_by_chunks(audio: AudioSegment, chunk_length_ms: int) -> list:
     """
     Calculate the normalized volume (RMS) for each chunk of the audio.
@@ -15,43 +55,310 @@ def _get_volume_by_chunks(audio: AudioSegment, chunk_length_ms: int) -> list:
     Returns:
         list: Normalized volumes for each chunk.
     """
-    chunks = make_chunks(audio, chunk_length_ms)
-    volumes = [chunk.rms for chunk in chunks]
-    max_volume = max(volumes)
-    if max_volume == 0:
+    return _get_volume_by_pcm(
+        audio.raw_data,
+        audio.sample_width,
+        audio.channels,
+        audio.frame_rate,
+        chunk_length_ms,
+    )
+
+
+def _get_volume_by_pcm(
+    raw_data,
+    sample_width: int,
+    channels: int,
+    frame_rate: int,
+    chunk_length_ms: int,
+    unsigned: bool = False,
+) -> list:
+    """
+    Calculate the normalized volume (RMS) for each chunk of raw PCM.
+
+    The sample buffer is read once, without copying when it is a memoryview or
+    mmap, reshaped into equal chunks and the sums of squares of all chunks are
+    computed in one vectorized pass. Chunk boundaries, silence padding of the
+    last chunk and integer truncation follow `make_chunks` and
+    `AudioSegment.rms`, so the result matches the per-chunk pydub
+    implementation exactly for 8/16-bit audio. Loud 24/32-bit audio can differ
+    in the last floating point bit.
+
+    Parameters:
+        raw_data: Little-endian PCM frames (bytes, memoryview or mmap)
+        sample_width (int): Bytes per sample
+        channels (int): Number of interleaved channels
+        frame_rate (int): Frames per second
+        chunk_length_ms (int): The length of each audio chunk in milliseconds.
+        unsigned (bool): 8-bit samples are unsigned, as in WAV files
+
+    Returns:
+        list: Normalized volumes for each chunk.
+    """
+    volumes = _chunk_rms(
+        raw_data, sample_width, channels, frame_rate, chunk_length_ms, unsigned
+    )
+    # Raised once the sample views of _chunk_rms are gone: kept alive by the
+    # traceback, they would stop the caller from releasing its memoryview or
+    # closing its mmap
+    if not len(volumes) or volumes.max() == 0:
         raise ValueError("Audio is empty or all zero.")
-    return [volume / max_volume for volume in volumes]
+    return (volumes / volumes.max()).tolist()
 
 
-def prepare_audio_payload(
+def _chunk_rms(
+    raw_data,
+    sample_width: int,
+    channels: int,
+    frame_rate: int,
+    chunk_length_ms: int,
+    unsigned: bool,
+) -> np.ndarray:
+    """RMS of each chunk of raw PCM, empty when there is no chunk"""
+    frame_width = sample_width * channels
+    usable = len(raw_data) - len(raw_data) % frame_width
+    if unsigned and sample_width == 1:
+        # Same values as the bias pydub applies to 8-bit WAV data
+        samples = (np.frombuffer(raw_data, dtype=np.uint8, count=usable) ^ 0x80).view(
+            np.int8
+        )
+    else:
+        samples = _samples_from_raw(memoryview(raw_data)[:usable], sample_width)
+    # Squares of 32-bit samples overflow int64 sums, use doubles like audioop
+    acc_dtype = np.float64 if sample_width == 4 else np.int64
+    frame_count = len(samples) // channels
+    length_ms = round(1000 * (frame_count / frame_rate)) if frame_rate else 0
+
+    number_of_chunks = math.ceil(length_ms / float(chunk_length_ms))
+    if number_of_chunks == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Chunk boundaries in frames, computed the way pydub slices by milliseconds
+    frames_per_ms = frame_rate / 1000.0
+    start_ms = np.arange(number_of_chunks, dtype=np.int64) * chunk_length_ms
+    end_ms = np.minimum(start_ms + chunk_length_ms, length_ms)
+    starts = (start_ms * frames_per_ms).astype(np.int64)
+    ends = (end_ms * frames_per_ms).astype(np.int64)
+    # Frames past the end of the data are silence padding added by pydub:
+    # they add nothing to the sums but count in the means
+    available_ends = np.minimum(ends, frame_count)
+
+    sums = np.zeros(number_of_chunks, dtype=acc_dtype)
+    frames_per_chunk = int(ends[0] - starts[0])
+    full = number_of_chunks - 1
+    if full and np.array_equal(
+        starts, np.arange(number_of_chunks, dtype=np.int64) * frames_per_chunk
+    ):
+        # All chunks but the last one have the same length: one reshape
+        body = samples[: full * frames_per_chunk * channels].reshape(full, -1)
+        sums[:full] = np.einsum("ij,ij->i", body, body, dtype=acc_dtype)
+    elif full:
+        # Uneven chunk lengths (e.g. 11025 Hz): sum the squares per range.
+        # Chunks are contiguous, so each range ends where the next one starts.
+        squares = samples[: starts[-1] * channels].astype(acc_dtype) ** 2
+        sums[:full] = np.add.reduceat(squares, starts[:-1] * channels)
+    tail = samples[starts[-1] * channels : available_ends[-1] * channels]
+    sums[-1] = np.einsum("i,i->", tail, tail, dtype=acc_dtype)
+
+    counts = (ends - starts) * channels
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.where(counts > 0, sums.astype(np.float64) / counts, 0.0)
+    return np.sqrt(means).astype(np.int64)
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# SubFormat GUID of integer PCM in a WAVE_FORMAT_EXTENSIBLE fmt chunk
+KSDATAFORMAT_SUBTYPE_PCM = bytes.fromhex("0100000000001000800000aa00389b71")
+_RIFF_HEADER = struct.Struct("<4sI4s")
+_CHUNK_HEADER = struct.Struct("<4sI")
+_FMT_CHUNK = struct.Struct("<HHIIHH")
+# cbSize, wValidBitsPerSample, dwChannelMask, then the SubFormat GUID
+_FMT_EXTENSION = struct.Struct("<HHI16s")
+
+
+class WavInfo(NamedTuple):
+    """PCM format and location of the sample data inside a WAV buffer"""
+
+    channels: int
+    sample_rate: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+
+
+def parse_wav_header(buffer) -> WavInfo | None:
+    """
+    Parse the RIFF header of an in-memory WAV file without decoding it.
+
+    Only integer PCM is recognized (plain, or WAVE_FORMAT_EXTENSIBLE with the
+    PCM SubFormat), which is what pydub reads without ffmpeg. Streamed WAV
+    files with a placeholder data size are clamped to the bytes actually
+    present.
+
+    Parameters:
+        buffer: The WAV file contents (bytes, memoryview or mmap)
+
+    Returns:
+        WavInfo | None: The format and data location, or None if the buffer is
+        not PCM WAV
+    """
+    if len(buffer) < _RIFF_HEADER.size:
+        return None
+    riff, _, wave = _RIFF_HEADER.unpack_from(buffer, 0)
+    if riff != b"RIFF" or wave != b"WAVE":
+        return None
+
+    fmt = None
+    pos = _RIFF_HEADER.size
+    while pos + _CHUNK_HEADER.size <= len(buffer):
+        chunk_id, size = _CHUNK_HEADER.unpack_from(buffer, pos)
+        pos += _CHUNK_HEADER.size
+        if chunk_id == b"fmt ":
+            if size < _FMT_CHUNK.size or pos + _FMT_CHUNK.size > len(buffer):
+                return None
+            fmt = _FMT_CHUNK.unpack_from(buffer, pos)
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE:
+                # Float or compressed data may hide behind the extensible tag
+                extension = pos + _FMT_CHUNK.size
+                if (
+                    size < _FMT_CHUNK.size + _FMT_EXTENSION.size
+                    or extension + _FMT_EXTENSION.size > len(buffer)
+                ):
+                    return None
+                sub_format = _FMT_EXTENSION.unpack_from(buffer, extension)[3]
+                if sub_format != KSDATAFORMAT_SUBTYPE_PCM:
+                    return None
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, _, _, bits = fmt
+            if audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE):
+                return None
+            if not channels or not sample_rate or bits not in (8, 16, 24, 32):
+                return None
+            return WavInfo(
+                channels=channels,
+                sample_rate=sample_rate,
+                sample_width=bits // 8,
+                data_offset=pos,
+                data_size=min(size, len(buffer) - pos),
+            )
+        # Chunks are padded to an even size
+        pos += size + (size & 1)
+    return None
+
+
+class PcmFormat(NamedTuple):
+    """Layout of the raw PCM produced by a TTS engine"""
+
+    sample_rate: int
+    sample_width: int = 2
+    channels: int = 1
+
+
+# Data size written in the header of a WAV stream whose length is not known yet.
+# parse_wav_header clamps it to the bytes actually present.
+STREAMING_DATA_SIZE = 0xFFFFFFFF - 36
+
+
+def make_wav_header(
+    data_size: int, sample_rate: int, sample_width: int = 2, channels: int = 1
+) -> bytes:
+    """Build the 44-byte header of a PCM WAV file holding data_size bytes"""
+    block_align = sample_width * channels
+    return (
+        _RIFF_HEADER.pack(b"RIFF", 36 + data_size, b"WAVE")
+        + _CHUNK_HEADER.pack(b"fmt ", _FMT_CHUNK.size)
+        + _FMT_CHUNK.pack(
+            WAVE_FORMAT_PCM,
+            channels,
+            sample_rate,
+            sample_rate * block_align,
+            block_align,
+            sample_width * 8,
+        )
+        + _CHUNK_HEADER.pack(b"data", data_size)
+    )
+
+
+def _get_volume_by_wav(buffer, info: WavInfo, chunk_length_ms: int) -> list:
+    """Calculate the normalized volumes of a parsed WAV buffer in place"""
+    with memoryview(buffer) as view:
+        data = view[info.data_offset : info.data_offset + info.data_size]
+        try:
+            return _get_volume_by_pcm(
+                data,
+                info.sample_width,
+                info.channels,
+                info.sample_rate,
+                chunk_length_ms,
+                unsigned=True,
+            )
+        finally:
+            data.release()
+
+
+def get_volumes_from_bytes(audio_bytes: bytes, chunk_length_ms: int = 20) -> list:
+    """
+    Decode encoded audio from memory and calculate its normalized volumes.
+
+    Parameters:
+        audio_bytes (bytes): The encoded audio. PCM WAV is read directly,
+            any other format is decoded with ffmpeg.
+        chunk_length_ms (int): The length of each audio chunk in milliseconds.
+
+    Returns:
+        list: Normalized volumes for each chunk, or an empty list if the audio
+        cannot be decoded or is silent.
+    """
+    try:
+        info = parse_wav_header(audio_bytes)
+        if info is not None:
+            return _get_volume_by_wav(audio_bytes, info, chunk_length_ms)
+        audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+        return _get_volume_by_chunks(audio, chunk_length_ms)
+    except Exception as e:
+        logger.debug(f"Could not compute volumes from audio bytes: {e}")
+        return []
+
+
+def load_audio_payload(
     audio_path: str | None,
     chunk_length_ms: int = 20,
     display_text: str = None,
     actions: Actions = None,
-) -> dict[str, any]:
+) -> tuple[dict[str, any], bytes | None]:
     """
-    Prepares the audio payload for sending to a broadcast endpoint.
-    If audio_path is None, returns a payload with audio=None for silent display.
+    Prepares the audio payload metadata and the raw wav bytes separately, so the
+    caller can choose how to put the audio on the wire (binary frame or base64).
+    If audio_path is None, returns the silent display payload and None.
 
     Parameters:
-        audio_path (str | None): The path to the audio file to be processed, or None for silent display
+        audio_path (str | None): The path to the audio file to be processed,
+            or None for silent display
         chunk_length_ms (int): The length of each audio chunk in milliseconds
         display_text (str, optional): Text to be displayed with the audio
         actions (Actions, optional): Actions associated with the audio
 
     Returns:
-        dict: The audio payload to be sent
+        tuple: The payload without the `audio` field, and the wav bytes (or None)
     """
+    payload = {
+        "type": "audio",
+        "volumes": [],
+        "slice_length": chunk_length_ms,
+        "text": display_text,
+        "actions": actions.to_dict() if actions else None,
+    }
     if not audio_path:
-        # Return payload for silent display
-        return {
-            "type": "audio",
-            "audio": None,
-            "volumes": [],
-            "slice_length": chunk_length_ms,
-            "text": display_text,
-            "actions": actions.to_dict() if actions else None,
-        }
+        # Payload for silent display
+        return payload, None
+
+    wav = _load_wav_file(audio_path, chunk_length_ms)
+    if wav is not None:
+        # Already PCM WAV: sent as is, no decode and re-encode
+        payload["volumes"], audio_bytes = wav
+        return payload, audio_bytes
 
     try:
         audio = AudioSegment.from_file(audio_path)
@@ -60,20 +367,105 @@ def prepare_audio_payload(
         raise ValueError(
             f"Error loading or converting generated audio file to wav file '{audio_path}': {e}"
         )
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-    volumes = _get_volume_by_chunks(audio, chunk_length_ms)
+    payload["volumes"] = _get_volume_by_chunks(audio, chunk_length_ms)
+
+    return payload, audio_bytes
+
+
+def load_pcm_payload(
+    pcm: bytes,
+    pcm_format: PcmFormat,
+    chunk_length_ms: int = 20,
+    display_text: str = None,
+    actions: Actions = None,
+) -> tuple[dict[str, any], bytes]:
+    """
+    Same as `load_audio_payload` for raw PCM produced by a TTS engine. The
+    samples are passed through untouched behind a WAV header.
+
+    Parameters:
+        pcm (bytes): Signed little-endian PCM frames (unsigned for 8-bit)
+        pcm_format (PcmFormat): Sample rate, sample width and channels of pcm
+        chunk_length_ms (int): The length of each audio chunk in milliseconds
+        display_text (str, optional): Text to be displayed with the audio
+        actions (Actions, optional): Actions associated with the audio
 
+    Returns:
+        tuple: The payload without the `audio` field, and the wav bytes
+    """
     payload = {
         "type": "audio",
-        "audio": audio_base64,
-        "volumes": volumes,
+        "volumes": _get_volume_by_pcm(
+            pcm,
+            pcm_format.sample_width,
+            pcm_format.channels,
+            pcm_format.sample_rate,
+            chunk_length_ms,
+            unsigned=True,
+        ),
         "slice_length": chunk_length_ms,
         "text": display_text,
         "actions": actions.to_dict() if actions else None,
     }
+    return payload, make_wav_header(len(pcm), *pcm_format) + pcm
+
+
+def _load_wav_file(audio_path: str, chunk_length_ms: int) -> tuple[list, bytes] | None:
+    """
+    Read a PCM WAV file through mmap: the envelope is computed on the mapped
+    samples and the file bytes are returned unchanged.
+
+    Returns:
+        tuple | None: The volumes and file bytes, or None if the file is not
+        PCM WAV and needs ffmpeg
+    """
+    try:
+        with open(audio_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError as e:
+        logger.debug(f"WAV fast path unavailable for '{audio_path}': {e}")
+        return None
+
+    with mapped:
+        info = parse_wav_header(mapped)
+        if info is None:
+            return None
+        volumes = _get_volume_by_wav(mapped, info, chunk_length_ms)
+        return volumes, mapped[:]
 
+
+def prepare_audio_payload(
+    audio_path: str | None,
+    chunk_length_ms: int = 20,
+    display_text: str = None,
+    actions: Actions = None,
+) -> dict[str, any]:
+    """
+    Prepares the audio payload for sending to a broadcast endpoint.
+    If audio_path is None, returns a payload with audio=None for silent display.
+
+    Parameters:
+        audio_path (str | None): The path to the audio file to be processed,
+            or None for silent display
+        chunk_length_ms (int): The length of each audio chunk in milliseconds
+        display_text (str, optional): Text to be displayed with the audio
+        actions (Actions, optional): Actions associated with the audio
+
+    Returns:
+        dict: The audio payload to be sent
+    """
+    payload, audio_bytes = load_audio_payload(
+        audio_path, chunk_length_ms, display_text, actions
+    )
+    payload["audio"] = (
+        base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else None
+    )
     return payload
 
 
 # Example usage:
-# payload, duration = prepare_audio_payload("path/to/audio.mp3", display_text="Hello", expression_list=[0,1,2])
+# payload = prepare_audio_payload(
+#     "path/to/audio.mp3", display_text="Hello", expression_list=[0, 1, 2]
+# )
@@ -1,7 +1,33 @@
 import re
 import unicodedata
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 from loguru import logger
-from ..translate.translate_interface import TranslateInterface
+
+if TYPE_CHECKING:
+    from ..translate.translate_interface import TranslateInterface
+
+_WHITESPACE = re.compile(r"\s+")
+_DOUBLE_ASTERISKS = re.compile(r"\*\*([^*]+)\*\*")
+_SINGLE_ASTERISKS = re.compile(r"\*([^*]+)\*")
+
+
+class _SpecialCharTable(dict):
+    """
+    `str.translate` table deleting every character that is not a letter,
+    number, punctuation or whitespace. Each codepoint is classified on first
+    use and cached.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        keep = unicodedata.category(char)[0] in "LNP" or char.isspace()
+        value = codepoint if keep else None
+        self[codepoint] = value
+        return value
+
+
+_SPECIAL_CHAR_TABLE = _SpecialCharTable()
 
 
 def tts_filter(
@@ -11,7 +37,7 @@ def tts_filter(
     ignore_parentheses: bool,
     ignore_asterisks: bool,
     ignore_angle_brackets: bool,
-    translator: TranslateInterface | None = None,
+    translator: "TranslateInterface | None" = None,
 ) -> str:
     """
     Filter or do anything to the text before TTS generates the audio.
@@ -26,46 +52,25 @@ def tts_filter(
         ignore_asterisks (bool): Whether to ignore text within asterisks.
         translator (TranslateInterface, optional):
             The translator to use. If None, we'll skip the translation. Defaults to None.
+            It is called synchronously, code on the event loop translates
+            through TranslationStage instead.
 
     Returns:
         str: The filtered text.
     """
-    if ignore_asterisks:
-        try:
-            text = filter_asterisks(text)
-        except Exception as e:
-            logger.warning(f"Error ignoring asterisks: {e}")
-            logger.warning(f"Text: {text}")
-            logger.warning("Skipping...")
-
-    if ignore_brackets:
-        try:
-            text = filter_brackets(text)
-        except Exception as e:
-            logger.warning(f"Error ignoring brackets: {e}")
-            logger.warning(f"Text: {text}")
-            logger.warning("Skipping...")
-    if ignore_parentheses:
-        try:
-            text = filter_parentheses(text)
-        except Exception as e:
-            logger.warning(f"Error ignoring parentheses: {e}")
-            logger.warning(f"Text: {text}")
-            logger.warning("Skipping...")
-    if remove_special_char:
-        try:
-            text = remove_special_characters(text)
-        except Exception as e:
-            logger.warning(f"Error removing special characters: {e}")
-            logger.warning(f"Text: {text}")
-            logger.warning("Skipping...")
-    if ignore_angle_brackets:
-        try:
-            text = filter_angle_brackets(text)
-        except Exception as e:
-            logger.warning(f"Error ignoring angle brackets: {e}")
-            logger.warning(f"Text: {text}")
-            logger.warning("Skipping...")
+    try:
+        text = _fused_filter(
+            text,
+            remove_special_char,
+            ignore_brackets,
+            ignore_parentheses,
+            ignore_asterisks,
+            ignore_angle_brackets,
+        )
+    except Exception as e:
+        logger.warning(f"Error filtering text: {e}")
+        logger.warning(f"Text: {text}")
+        logger.warning("Skipping...")
     if translator:
         try:
             logger.info("Translating...")
@@ -80,6 +85,103 @@ def tts_filter(
     return text
 
 
+def _fused_filter(
+    text: str,
+    remove_special_char: bool,
+    ignore_brackets: bool,
+    ignore_parentheses: bool,
+    ignore_asterisks: bool,
+    ignore_angle_brackets: bool,
+) -> str:
+    """
+    Same output as running filter_asterisks, filter_brackets,
+    filter_parentheses, remove_special_characters and filter_angle_brackets
+    in that order for the enabled flags, with a single Python-level scan.
+
+    Asterisk spans are removed with precompiled regexes, all bracket kinds in
+    one scan over the delimiters, and special characters with NFKC plus a
+    cached translate table. Whitespace is collapsed once, where the last
+    stage doing it would have.
+    """
+    if ignore_asterisks and "*" in text:
+        text = _DOUBLE_ASTERISKS.sub("", text)
+        text = _SINGLE_ASTERISKS.sub("", text)
+
+    # Special character removal deletes "<" and ">" before the angle bracket
+    # stage sees them, so it has nothing to nest on
+    delimiters = _delimiter_pattern(
+        ignore_brackets,
+        ignore_parentheses,
+        ignore_angle_brackets and not remove_special_char,
+    )
+    if delimiters:
+        text = _filter_delimited(text, delimiters)
+
+    collapses = ignore_asterisks or ignore_brackets or ignore_parentheses
+    if remove_special_char:
+        if collapses and not ignore_angle_brackets:
+            text = _WHITESPACE.sub(" ", text).strip()
+        if not text.isascii():
+            text = unicodedata.normalize("NFKC", text)
+        text = text.translate(_SPECIAL_CHAR_TABLE)
+    if ignore_angle_brackets or (collapses and not remove_special_char):
+        text = _WHITESPACE.sub(" ", text).strip()
+    return text
+
+
+@lru_cache(maxsize=None)
+def _delimiter_pattern(
+    brackets: bool, parentheses: bool, angle_brackets: bool
+) -> Optional[re.Pattern]:
+    """Pattern matching the delimiters of the enabled bracket kinds"""
+    chars = (
+        ("[]" if brackets else "")
+        + ("()" if parentheses else "")
+        + ("<>" if angle_brackets else "")
+    )
+    return re.compile("[" + re.escape(chars) + "]") if chars else None
+
+
+def _filter_delimited(text: str, delimiters: re.Pattern) -> str:
+    """
+    Remove the text within [], () and <> in one scan over the delimiters.
+
+    Each kind nests on its own. As with the chained filters, a kind only sees
+    the text left by the previous ones: brackets hide parentheses and both
+    hide angle brackets. Unmatched closing symbols are dropped.
+    """
+    result = []
+    brackets = parentheses = angles = 0
+    start = 0
+    for match in delimiters.finditer(text):
+        pos = match.start()
+        if not (brackets or parentheses or angles):
+            result.append(text[start:pos])
+        start = pos + 1
+        char = text[pos]
+        if char == "[":
+            brackets += 1
+        elif char == "]":
+            if brackets:
+                brackets -= 1
+        elif brackets:
+            continue
+        elif char == "(":
+            parentheses += 1
+        elif char == ")":
+            if parentheses:
+                parentheses -= 1
+        elif parentheses:
+            continue
+        elif char == "<":
+            angles += 1
+        elif angles:
+            angles -= 1
+    if not (brackets or parentheses or angles):
+        result.append(text[start:])
+    return "".join(result)
+
+
 def remove_special_characters(text: str) -> str:
     """
     Filter text to remove all non-letter, non-number, and non-punctuation characters.
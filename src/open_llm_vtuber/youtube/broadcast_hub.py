@@ -0,0 +1,405 @@
+import json
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from ..audio_transport import AudioTransport, TRANSPORT_BINARY, TRANSPORT_JSON
+from ..client_sender import FRAME_AUDIO, FRAME_AUDIO_CHUNK, FRAME_CONTROL, FRAME_SENTENCE
+from ..conversation import TurnController, handle_youtube_chat
+from .chat_queue import ChatMessage, PRIORITY_HOST
+from .youtube_chat_service import YouTubeChatService
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """
+    A client socket receiving the frames of a broadcast. `send_text` and
+    `send_bytes` take the frame and its kind, like ClientSender. `stopped` is set
+    when it leaves the broadcast, or the broadcast ends. `drop_pending`
+    discards the audio queued for the client when the reply is interrupted.
+    """
+
+    send_text: Callable[[str, str], Awaitable[None]]
+    send_bytes: Optional[Callable[[bytes, str], Awaitable[None]]] = None
+    mode: str = TRANSPORT_JSON
+    stream_audio: bool = False
+    drop_pending: Optional[Callable[[], int]] = None
+    stopped: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+
+@dataclass
+class _AudioStream:
+    """State of one audio payload (sequence id) within an audience"""
+
+    subscribers: frozenset
+    index: int = 0
+    payload: dict = field(default_factory=dict)
+    audio: bytearray = field(default_factory=bytearray)
+
+
+class _Audience:
+    """
+    Subscribers sharing a wire format (transport mode and audio streaming).
+
+    Frames are serialized once per audience by an AudioTransport in its mode
+    and the resulting text or binary frame is sent to every member, so base64
+    encoding and JSON serialization do not grow with the number of subscribers. Audio
+    only goes to the members that received the header of its sequence id, so
+    clients joining mid-sentence never get orphan chunks.
+    """
+
+    def __init__(self, mode: str, stream_audio: bool, on_failure: Callable):
+        self.mode = mode
+        self.stream_audio = stream_audio
+        self.subscribers: set[Subscriber] = set()
+        self._on_failure = on_failure
+        self._streams: Dict[int, _AudioStream] = {}
+
+    async def _fan_out(self, targets: frozenset, send: Callable, *frame) -> None:
+        # Members may have left since the header of the stream
+        members = [s for s in targets if s in self.subscribers]
+        results = await asyncio.gather(
+            *(send(subscriber)(*frame) for subscriber in members),
+            return_exceptions=True,
+        )
+        for subscriber, result in zip(members, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Dropping broadcast subscriber after send error: {result}")
+                self._on_failure(subscriber)
+
+    def _transport(self, targets: Optional[frozenset] = None) -> AudioTransport:
+        """Transport serializing frames once for the targets, all members by default"""
+        targets = frozenset(self.subscribers) if targets is None else targets
+
+        async def send_text(text: str, kind: str) -> None:
+            await self._fan_out(targets, lambda s: s.send_text, text, kind)
+
+        async def send_bytes(data: bytes, kind: str) -> None:
+            await self._fan_out(targets, lambda s: s.send_bytes, data, kind)
+
+        return AudioTransport(send_text, send_bytes, self.mode)
+
+    async def send_text(self, text: str, kind: str = FRAME_CONTROL) -> None:
+        await self._transport().send_text(text, kind)
+
+    # ==== audio, as sent by send_audio_stream over a binary transport
+
+    async def audio_header(
+        self, payload: dict, audio: Optional[bytes], seq: int, kind: str
+    ) -> None:
+        if payload.get("type") != "audio-chunk":
+            # A complete payload, every wire format can carry it as is
+            await self._transport().send_audio(payload, audio, seq, kind)
+            return
+        stream = _AudioStream(frozenset(self.subscribers), payload.get("index", 0))
+        self._streams[seq] = stream
+        if self.stream_audio:
+            await self._transport(stream.subscribers).send_audio(payload, audio, seq, kind)
+        else:
+            stream.payload = payload
+            stream.audio += audio or b""
+
+    async def audio_data(self, seq: int, audio: bytes) -> None:
+        stream = self._streams.get(seq)
+        if stream is None:
+            return
+        stream.index += 1
+        if not self.stream_audio:
+            stream.audio += audio
+            return
+        transport = self._transport(stream.subscribers)
+        if transport.binary:
+            await transport.send_audio_data(seq, audio)
+        else:
+            frame = {"type": "audio-chunk", "index": stream.index, "is_final": False}
+            await transport.send_audio(frame, audio, seq, FRAME_AUDIO_CHUNK)
+
+    async def audio_final(self, payload: dict) -> None:
+        stream = self._streams.pop(payload.get("seq"), None)
+        if stream is None:
+            return
+        transport = self._transport(stream.subscribers)
+        if not self.stream_audio:
+            # Same frame as conversation_chain sends without streaming
+            frame = {
+                "type": "audio-and-expression",
+                "text": stream.payload.get("text"),
+                "actions": stream.payload.get("actions"),
+            }
+            if payload.get("volumes"):
+                frame["volumes"] = payload["volumes"]
+                frame["slice_length"] = payload["slice_length"]
+            await transport.send_audio(frame, bytes(stream.audio) or None, payload["seq"])
+        elif transport.binary:
+            await transport.send_json(payload)
+        else:
+            final = {k: v for k, v in payload.items() if k != "seq"}
+            final["audio"] = None
+            await transport.send_json(final)
+
+
+class BroadcastTransport:
+    """
+    AudioTransport stand-in handed to conversation_chain by a broadcast.
+
+    The chain runs once in binary streaming mode, the most detailed form of
+    the audio frames, and every audience converts the frames to its own wire
+    format: base64 JSON chunks, or one `audio-and-expression` frame per
+    sentence for clients that do not stream audio.
+    """
+
+    binary = True
+    mode = TRANSPORT_BINARY
+
+    def __init__(self, broadcast: "YouTubeBroadcast"):
+        self._broadcast = broadcast
+        self._seq = 0
+
+    def next_seq(self) -> int:
+        self._seq = (self._seq + 1) % (1 << 32)
+        return self._seq
+
+    async def _each(self, method: str, *args) -> None:
+        audiences = list(self._broadcast.audiences.values())
+        await asyncio.gather(*(getattr(audience, method)(*args) for audience in audiences))
+
+    async def send_json(self, payload: dict, kind: str = FRAME_AUDIO) -> None:
+        if payload.get("type") == "audio-chunk" and payload.get("is_final"):
+            await self._each("audio_final", payload)
+        else:
+            await self._each("send_text", json.dumps(payload), kind)
+
+    async def send_audio(
+        self,
+        payload: dict,
+        audio: bytes | None,
+        seq: int | None = None,
+        kind: str = FRAME_SENTENCE,
+    ) -> int:
+        seq = self.next_seq() if seq is None else seq
+        await self._each("audio_header", payload, audio, seq, kind)
+        return seq
+
+    async def send_audio_data(self, seq: int, audio: bytes) -> None:
+        await self._each("audio_data", seq, audio)
+
+
+class YouTubeBroadcast:
+    """
+    One YouTube chat ingest and one agent/TTS pipeline for a video, whose
+    frames are published to every subscribed client.
+
+    The ingest starts with the first subscriber and stops with the last one,
+    so LLM and TTS calls do not grow with the number of viewers.
+
+    The reply being generated is cut short (barge-in) when a client sends an
+    interrupt, or when a message of `barge_in_priority` or higher is queued.
+    """
+
+    def __init__(
+        self,
+        video_id: str,
+        service_context,
+        service_factory: Callable[[str], YouTubeChatService] = YouTubeChatService,
+        barge_in_priority: int = PRIORITY_HOST,
+    ):
+        """
+        Args:
+            video_id: YouTube video whose live chat is read
+            service_context: Provides the agent, TTS engine and translation
+            service_factory: Builds the chat service of a video id
+            barge_in_priority: Lowest message priority interrupting the reply.
+                By default only messages typed by the streamer do.
+        """
+        self.video_id = video_id
+        self.service_context = service_context
+        self.service_factory = service_factory
+        self.barge_in_priority = barge_in_priority
+        self.audiences: Dict[tuple, _Audience] = {}
+        self.youtube_service: Optional[YouTubeChatService] = None
+        self.task: Optional[asyncio.Task] = None
+        self.turns: Optional[TurnController] = None
+        self._stop_audio: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(audience.subscribers) for audience in self.audiences.values())
+
+    def is_active(self) -> bool:
+        """Whether the ingest is running"""
+        return (
+            self.task is not None
+            and not self.task.done()
+            and bool(self.youtube_service and self.youtube_service.is_active())
+        )
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        key = (subscriber.mode, subscriber.stream_audio)
+        audience = self.audiences.get(key)
+        if audience is None:
+            audience = self.audiences[key] = _Audience(
+                subscriber.mode, subscriber.stream_audio, self.unsubscribe
+            )
+        audience.subscribers.add(subscriber)
+        logger.info(
+            f"Subscribed to YouTube broadcast {self.video_id} "
+            f"({self.subscriber_count} subscribers)"
+        )
+        if self.task is None or self.task.done():
+            self._start()
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        key = (subscriber.mode, subscriber.stream_audio)
+        audience = self.audiences.get(key)
+        if audience is None or subscriber not in audience.subscribers:
+            return
+        audience.subscribers.discard(subscriber)
+        subscriber.stopped.set()
+        if not audience.subscribers:
+            del self.audiences[key]
+        logger.info(
+            f"Unsubscribed from YouTube broadcast {self.video_id} "
+            f"({self.subscriber_count} subscribers)"
+        )
+        if not self.audiences:
+            self.stop()
+
+    def submit(self, message: ChatMessage) -> bool:
+        """
+        Queue a message from a client (e.g. typed in the overlay) with the
+        chat messages, so it goes through the same agent/TTS run
+
+        Returns:
+            bool: Whether the message was queued
+        """
+        if not self.youtube_service:
+            return False
+        return self.youtube_service.chat_queue.put(message)
+
+    async def send_text(self, text: str, kind: str = FRAME_CONTROL) -> None:
+        """Send a text frame of a given kind to every subscriber"""
+        audiences = list(self.audiences.values())
+        await asyncio.gather(*(audience.send_text(text, kind) for audience in audiences))
+
+    def interrupt(self, heard: Optional[str] = None) -> bool:
+        """
+        Cancel the reply being generated, drop the audio queued for every
+        subscriber and tell the clients to stop playing.
+
+        Args:
+            heard: Text the interrupting client played, passed to the agent
+
+        Returns:
+            bool: Whether a reply was being generated
+        """
+        if self.turns is None:
+            return False
+        interrupted = self.turns.interrupt(heard)
+        if not interrupted:
+            return False
+        dropped = 0
+        for audience in self.audiences.values():
+            for subscriber in audience.subscribers:
+                if subscriber.drop_pending:
+                    dropped += subscriber.drop_pending()
+        logger.info(f"Interrupted YouTube broadcast reply, dropped {dropped} queued frames")
+        self._stop_audio = asyncio.create_task(
+            self.send_text(json.dumps({"type": "control", "text": "stop-audio"}))
+        )
+        return True
+
+    def stats(self) -> dict:
+        """Subscribers, interruptions and chat queue and poller metrics"""
+        stats = {
+            "subscribers": self.subscriber_count,
+            "active": self.is_active(),
+            "interrupts": self.turns.interrupts if self.turns else 0,
+        }
+        if self.youtube_service:
+            stats.update(self.youtube_service.stats())
+        return stats
+
+    def _on_urgent(self, message: ChatMessage) -> None:
+        logger.info(f"Barge-in by {message.author}")
+        self.interrupt()
+
+    def _start(self) -> None:
+        self.youtube_service = self.service_factory(self.video_id)
+        chat_queue = self.youtube_service.chat_queue
+        chat_queue.urgent_priority = self.barge_in_priority
+        chat_queue.on_urgent = self._on_urgent
+        self.turns = TurnController(self.service_context.agent_engine)
+        self.task = asyncio.create_task(
+            handle_youtube_chat(
+                youtube_service=self.youtube_service,
+                agent_engine=self.service_context.agent_engine,
+                websocket_send=self.send_text,
+                tts_engine=self.service_context.tts_engine,
+                stream_audio=True,
+                audio_transport=BroadcastTransport(self),
+                get_translation=lambda: self.service_context.translation,
+                turns=self.turns,
+            )
+        )
+        self.task.add_done_callback(self._on_done)
+        logger.info(f"Started YouTube broadcast for video: {self.video_id}")
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        # The chat ended on its own, not through stop()
+        if task is self.task:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop the ingest and release every subscriber"""
+        if self.youtube_service:
+            self.youtube_service.stop()
+        if self.task and not self.task.done():
+            self.task.cancel()
+        self.youtube_service = None
+        self.task = None
+        self.turns = None
+        for audience in self.audiences.values():
+            for subscriber in audience.subscribers:
+                subscriber.stopped.set()
+        self.audiences.clear()
+        logger.info(f"Stopped YouTube broadcast for video: {self.video_id}")
+
+
+class BroadcastHub:
+    """Shares one YouTubeBroadcast per video id between all client sockets"""
+
+    def __init__(
+        self,
+        service_context,
+        service_factory: Callable[[str], YouTubeChatService] = YouTubeChatService,
+    ):
+        self.service_context = service_context
+        self.service_factory = service_factory
+        self.broadcasts: Dict[str, YouTubeBroadcast] = {}
+
+    def subscribe(self, video_id: str, subscriber: Subscriber) -> YouTubeBroadcast:
+        """Add a client to the broadcast of a video, starting it if needed"""
+        broadcast = self.broadcasts.get(video_id)
+        if broadcast is None:
+            broadcast = self.broadcasts[video_id] = YouTubeBroadcast(
+                video_id, self.service_context, self.service_factory
+            )
+        broadcast.subscribe(subscriber)
+        return broadcast
+
+    def stats(self) -> dict:
+        """Stats of every broadcast, by video id"""
+        return {
+            video_id: broadcast.stats() for video_id, broadcast in self.broadcasts.items()
+        }
+
+    def unsubscribe(self, video_id: str, subscriber: Subscriber) -> None:
+        """Remove a client, stopping the broadcast after its last subscriber"""
+        broadcast = self.broadcasts.get(video_id)
+        if broadcast is None:
+            return
+        broadcast.unsubscribe(subscriber)
+        if not broadcast.audiences:
+            del self.broadcasts[video_id]
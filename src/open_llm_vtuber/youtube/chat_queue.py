@@ -0,0 +1,267 @@
+import re
+import time
+import heapq
+import asyncio
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..metrics import get_metrics
+
+# Lower is served first
+PRIORITY_HOST = -1  # Typed by the streamer in the overlay
+PRIORITY_SUPERCHAT = 0
+PRIORITY_MEMBER = 1
+PRIORITY_NORMAL = 2
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class ChatMessage:
+    """A live chat message waiting for the agent"""
+
+    author: str
+    text: str
+    author_id: str = ""
+    priority: int = PRIORITY_NORMAL
+    # Amount as displayed by YouTube for paid messages, e.g. "$5.00"
+    amount: str = ""
+    received: float = 0.0
+
+    @classmethod
+    def from_pytchat(cls, item, received: float) -> "ChatMessage":
+        """Build a message from a pytchat chat item"""
+        author = item.author
+        if item.type in ("superChat", "superSticker"):
+            priority = PRIORITY_SUPERCHAT
+        elif author.isChatSponsor or author.isChatOwner or author.isChatModerator:
+            priority = PRIORITY_MEMBER
+        else:
+            priority = PRIORITY_NORMAL
+        return cls(
+            author=author.name,
+            text=item.message,
+            author_id=author.channelId or author.name,
+            priority=priority,
+            amount=getattr(item, "amountString", "") if priority == PRIORITY_SUPERCHAT else "",
+            received=received,
+        )
+
+    def format(self) -> str:
+        """Line of the agent prompt"""
+        if self.amount:
+            return f"{self.author} (Super Chat {self.amount}): {self.text}"
+        return f"{self.author}: {self.text}"
+
+
+@dataclass(order=True)
+class _Entry:
+    priority: int
+    order: int
+    message: ChatMessage = field(compare=False)
+
+
+class ChatQueue:
+    """
+    Bounded priority queue of live chat messages.
+
+    Messages typed by the streamer come out first, then super chats, then
+    messages of members (and the channel owner and moderators), then everyone
+    else, each in arrival order. On the way in, repeats of a recent message
+    are dropped and each author gets at most one message per
+    `author_interval` seconds. Neither filter applies to the streamer and
+    paid messages.
+    When the queue is full, a new message replaces the oldest one of the
+    lowest priority, if that priority is lower than its own, and is dropped
+    otherwise.
+
+    `get_batch` returns everything pending up to `max_batch` messages, so the
+    messages that arrived while the agent was busy are coalesced into one
+    prompt.
+
+    `on_urgent`, when set, is called with each queued message of priority
+    `urgent_priority` or higher, so the consumer can cut its current reply
+    short.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 50,
+        dedup_window: float = 30.0,
+        author_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_size: Maximum number of pending messages
+            dedup_window: Seconds during which an identical text is dropped
+            author_interval: Minimum seconds between two messages of an author
+            clock: Monotonic time source, in seconds
+        """
+        self.max_size = max_size
+        self.dedup_window = dedup_window
+        self.author_interval = author_interval
+        self.clock = clock
+
+        self._heap: List[_Entry] = []
+        self._order = itertools.count()
+        self._recent_texts: "OrderedDict[str, float]" = OrderedDict()
+        self._last_by_author: Dict[str, float] = {}
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.urgent_priority = PRIORITY_HOST
+        self.on_urgent: Optional[Callable[[ChatMessage], None]] = None
+        self.reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ==== filters
+
+    @staticmethod
+    def _dedup_key(text: str) -> str:
+        return _WHITESPACE.sub(" ", text).strip().casefold()
+
+    def _is_duplicate(self, message: ChatMessage, now: float) -> bool:
+        if message.priority <= PRIORITY_SUPERCHAT:
+            return False
+        recent = self._recent_texts
+        # Texts are in arrival order, forget the ones out of the window
+        while recent and now - next(iter(recent.values())) >= self.dedup_window:
+            recent.popitem(last=False)
+        key = self._dedup_key(message.text)
+        if key in recent:
+            return True
+        recent[key] = now
+        return False
+
+    def _is_rate_limited(self, message: ChatMessage, now: float) -> bool:
+        if message.priority <= PRIORITY_SUPERCHAT:
+            return False
+        last = self._last_by_author.get(message.author_id)
+        if last is not None and now - last < self.author_interval:
+            return True
+        self._last_by_author[message.author_id] = now
+        if len(self._last_by_author) > 4 * self.max_size:
+            # Forget the authors whose interval is over
+            self._last_by_author = {
+                author: seen
+                for author, seen in self._last_by_author.items()
+                if now - seen < self.author_interval
+            }
+        return False
+
+    def _drop(self, reason: str) -> None:
+        self._drops[reason] += 1
+
+    # ==== queue
+
+    def put(self, message: ChatMessage) -> bool:
+        """
+        Queue a message unless it is filtered out or the queue is full of
+        messages of the same or a higher priority.
+
+        Returns:
+            bool: Whether the message was queued
+        """
+        if self._closed:
+            return False
+        now = self.clock()
+        message.received = message.received or now
+        if not message.text or not message.text.strip():
+            self._drop("empty")
+            return False
+        if self._is_rate_limited(message, now):
+            self._drop("rate_limited")
+            return False
+        if self._is_duplicate(message, now):
+            self._drop("duplicate")
+            return False
+
+        if len(self._heap) >= self.max_size:
+            # Oldest entry of the lowest priority
+            worst = max(self._heap, key=lambda entry: (entry.priority, -entry.order))
+            if worst.priority <= message.priority:
+                self._drop("overflow")
+                return False
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self._drop("evicted")
+
+        heapq.heappush(self._heap, _Entry(message.priority, next(self._order), message))
+        self._accepted += 1
+        self._max_depth = max(self._max_depth, len(self._heap))
+        self._ready.set()
+        if self.on_urgent and message.priority <= self.urgent_priority:
+            self.on_urgent(message)
+        return True
+
+    async def get_batch(self, max_batch: int) -> List[ChatMessage]:
+        """
+        Wait for messages and pop up to `max_batch` of them, highest priority
+        first. Returns an empty list once the queue is closed and drained.
+        """
+        while not self._heap:
+            if self._closed:
+                return []
+            self._ready.clear()
+            await self._ready.wait()
+
+        now = self.clock()
+        batch = []
+        metrics = get_metrics()
+        while self._heap and len(batch) < max_batch:
+            message = heapq.heappop(self._heap).message
+            wait = max(0.0, now - message.received)
+            metrics.observe("chat_wait", wait)
+            self._served += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            batch.append(message)
+        self._batches += 1
+        if len(batch) > 1:
+            self._coalesced += len(batch) - 1
+        return batch
+
+    def close(self) -> None:
+        """Refuse new messages and wake the waiting consumer"""
+        self._closed = True
+        self._ready.set()
+
+    # ==== metrics
+
+    def stats(self) -> dict:
+        """Depth, drops per reason and wait time of the served messages"""
+        return {
+            "depth": len(self._heap),
+            "max_depth": self._max_depth,
+            "accepted": self._accepted,
+            "served": self._served,
+            "batches": self._batches,
+            "coalesced": self._coalesced,
+            "drops": dict(self._drops),
+            "avg_wait": self._total_wait / self._served if self._served else 0.0,
+            "max_wait": self._max_wait,
+        }
+
+    def reset_stats(self) -> None:
+        self._accepted = 0
+        self._served = 0
+        self._batches = 0
+        self._coalesced = 0
+        self._max_depth = len(getattr(self, "_heap", ()))
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._drops = {
+            "empty": 0,
+            "duplicate": 0,
+            "rate_limited": 0,
+            "overflow": 0,
+            "evicted": 0,
+        }
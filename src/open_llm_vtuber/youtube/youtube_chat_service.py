@@ -1,74 +1,210 @@
-import pytchat
-import asyncio
-from loguru import logger
-
-class YouTubeChatService:
-    def __init__(self, video_id: str):
-        """
-        Initialize YouTube chat service with video ID
-        """
-        self.video_id = video_id
-        self.chat = None
-        self.is_running = True
-        self.batch_size = 3  # Luôn lấy 3 tin nhắn gần nhất
-        self.connect()
-        logger.info(f"Created YouTube chat service for video: {video_id}")
-
-    def connect(self):
-        """Create new chat connection"""
-        try:
-            self.chat = pytchat.create(video_id=self.video_id)
-            if not self.chat.is_alive():
-                logger.error(f"Failed to initialize chat for video {self.video_id}")
-            else:
-                logger.info("YouTube chat connection is alive")
-        except Exception as e:
-            logger.error(f"Error creating chat connection: {e}")
-
-    async def listen(self):
-        """
-        Listen for chat messages and return 3 most recent messages
-        """
-        logger.info("Starting YouTube chat listener...")
-        
-        while self.is_running:
-            try:
-                if not self.chat or not self.chat.is_alive():
-                    logger.warning("Chat connection dead, attempting to reconnect...")
-                    self.connect()
-                    await asyncio.sleep(1)
-                    continue
-
-                chat_data = self.chat.get()
-                if chat_data:
-                    # Lấy tin nhắn từ pytchat
-                    messages = []
-                    for chat_item in chat_data.sync_items():
-                        messages.append(f"{chat_item.author.name}: {chat_item.message}")
-                    
-                    if messages:
-                        # Chỉ lấy 3 tin nhắn mới nhất
-                        latest_messages = messages[-self.batch_size:]
-                        grouped_message = "\n".join(latest_messages)
-                        logger.info(f"Processing {len(latest_messages)} latest messages")
-                        yield grouped_message
-
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Error in chat listener: {e}")
-                if self.is_running:
-                    self.connect()
-                    await asyncio.sleep(1)
-                    continue
-
-    def is_active(self):
-        """Check if chat is still active"""
-        return self.is_running and (self.chat and self.chat.is_alive())
-
-    def stop(self):
-        """Stop the chat listener"""
-        self.is_running = False
-        if self.chat:
-            self.chat.terminate()
-            logger.info("YouTube chat listener stopped") 
\ No newline at end of file
+import time
+import random
+import asyncio
+import threading
+from typing import Optional
+
+import pytchat
+from loguru import logger
+
+from .chat_queue import ChatMessage, ChatQueue
+
+# Polling interval bounds, in seconds. The interval drops to the minimum
+# while messages arrive and grows by POLL_BACKOFF after each empty poll.
+MIN_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 5.0
+POLL_BACKOFF = 1.5
+
+# Reconnect delay bounds, in seconds: exponential with jitter
+MIN_RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 60.0
+
+
+class YouTubeChatService:
+    def __init__(
+        self,
+        video_id: str,
+        min_poll_interval: float = MIN_POLL_INTERVAL,
+        max_poll_interval: float = MAX_POLL_INTERVAL,
+        min_reconnect_delay: float = MIN_RECONNECT_DELAY,
+        max_reconnect_delay: float = MAX_RECONNECT_DELAY,
+        chat_queue: Optional[ChatQueue] = None,
+        batch_size: int = 5,
+    ):
+        """
+        Initialize YouTube chat service with video ID.
+
+        pytchat is blocking (HTTP fetches in `create` and `get`), so it runs in
+        a dedicated poller thread started by `listen`, which hands the polled
+        items to the event loop. There they go through the priority ChatQueue,
+        whose pending messages are coalesced into one prompt per `listen` item.
+
+        Args:
+            video_id: YouTube video whose live chat is read
+            min_poll_interval: Seconds between polls while messages arrive
+            max_poll_interval: Longest wait between polls of a quiet chat
+            min_reconnect_delay: Delay before the first reconnect attempt
+            max_reconnect_delay: Cap of the exponential reconnect delay
+            chat_queue: Queue filtering and ordering the messages. Defaults to
+                a ChatQueue with default limits.
+            batch_size: Maximum number of messages coalesced into one prompt
+        """
+        self.video_id = video_id
+        self.chat = None
+        self.is_running = True
+        self.batch_size = batch_size
+        self.chat_queue = chat_queue or ChatQueue()
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.min_reconnect_delay = min_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.poll_interval = min_poll_interval
+        self.reconnects = 0
+        # time.perf_counter() time the oldest message of the last prompt was
+        # received, for the turn metrics
+        self.batch_received: Optional[float] = None
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        logger.info(f"Created YouTube chat service for video: {video_id}")
+
+    def connect(self) -> bool:
+        """Create new chat connection. Blocking, called from the poller thread."""
+        try:
+            # Not interruptable: pytchat would install a SIGINT handler, which
+            # is only allowed in the main thread
+            self.chat = pytchat.create(video_id=self.video_id, interruptable=False)
+            if not self.chat.is_alive():
+                logger.error(f"Failed to initialize chat for video {self.video_id}")
+                return False
+            logger.info("YouTube chat connection is alive")
+            return True
+        except Exception as e:
+            logger.error(f"Error creating chat connection: {e}")
+            return False
+
+    # ==== poller thread
+
+    def _reconnect_delay(self, attempt: int) -> float:
+        """Exponential delay of a reconnect attempt, with jitter so several
+        services do not reconnect in lockstep"""
+        delay = min(self.max_reconnect_delay, self.min_reconnect_delay * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _call_in_loop(self, callback, *args) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The event loop is closed, nobody is listening anymore
+            self._stop_event.set()
+
+    def _poll(self) -> None:
+        attempt = 0
+
+        def back_off() -> None:
+            nonlocal attempt
+            delay = self._reconnect_delay(attempt)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"Reconnecting to YouTube chat in {delay:.1f}s")
+            self._stop_event.wait(delay)
+
+        try:
+            while not self._stop_event.is_set():
+                if not self.chat or not self.chat.is_alive():
+                    if self.chat:
+                        logger.warning("Chat connection dead, attempting to reconnect...")
+                    if not self.connect():
+                        back_off()
+                        continue
+
+                try:
+                    chat_data = self.chat.get()
+                    items = list(chat_data.sync_items()) if chat_data else []
+                except Exception as e:
+                    logger.error(f"Error in chat listener: {e}")
+                    # Reconnect with the same backoff as a failed connect, a
+                    # chat that connects but cannot be read would spin otherwise
+                    self.chat = None
+                    back_off()
+                    continue
+
+                # Only a successful poll resets the backoff
+                attempt = 0
+                if items:
+                    self._call_in_loop(self._accept, items, time.monotonic())
+                    self.poll_interval = self.min_poll_interval
+                else:
+                    self.poll_interval = min(
+                        self.max_poll_interval, self.poll_interval * POLL_BACKOFF
+                    )
+                self._stop_event.wait(self.poll_interval)
+        finally:
+            if self.chat and self._stop_event.is_set():
+                # Connected while stop() ran
+                self.chat.terminate()
+            self._call_in_loop(self.chat_queue.close)
+
+    def _start_poller(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(
+            target=self._poll, name=f"youtube-chat-{self.video_id}", daemon=True
+        )
+        self._thread.start()
+
+    # ==== event loop side
+
+    def _accept(self, items: list, received: float) -> None:
+        """Queue polled pytchat items, on the event loop"""
+        for item in items:
+            try:
+                message = ChatMessage.from_pytchat(item, received)
+            except Exception as e:
+                logger.warning(f"Skipping malformed chat item: {e}")
+                continue
+            self.chat_queue.put(message)
+
+    async def listen(self):
+        """
+        Listen for chat messages and yield prompts of up to `batch_size`
+        pending messages, highest priority first
+        """
+        logger.info("Starting YouTube chat listener...")
+        if self._thread is None:
+            self._start_poller()
+
+        while self.is_running:
+            batch = await self.chat_queue.get_batch(self.batch_size)
+            if not batch:
+                break
+            grouped_message = "\n".join(message.format() for message in batch)
+            age = self.chat_queue.clock() - min(message.received for message in batch)
+            self.batch_received = time.perf_counter() - age
+            logger.info(
+                f"Processing {len(batch)} messages, {len(self.chat_queue)} pending"
+            )
+            yield grouped_message
+
+    def stats(self) -> dict:
+        """Chat queue metrics and poller state"""
+        return {
+            **self.chat_queue.stats(),
+            "poll_interval": self.poll_interval,
+            "reconnects": self.reconnects,
+        }
+
+    def is_active(self):
+        """Check if chat is still active. Stays active while reconnecting."""
+        return self.is_running and (
+            self._thread is None or self._thread.is_alive()
+        )
+
+    def stop(self):
+        """Stop the chat listener"""
+        self.is_running = False
+        self._stop_event.set()
+        self.chat_queue.close()
+        if self.chat:
+            self.chat.terminate()
+            logger.info("YouTube chat listener stopped")